@@ -315,10 +315,10 @@ export function Dashboard({ lectures, loading, error, onLectureSelect, onUploadC
                 </div>
                 <div className="flex gap-2">
                   <Badge variant="outline" className="text-xs">
-                    {lecture.transcript ? "Transcript Available" : "Processing Transcript"}
+                    {lecture.has_transcript ? "Transcript Available" : "Processing Transcript"}
                   </Badge>
                   <Badge variant="outline" className="text-xs">
-                    {lecture.notes ? "Notes Generated" : "Notes Pending"}
+                    {lecture.has_notes ? "Notes Generated" : "Notes Pending"}
                   </Badge>
                 </div>
               </div>
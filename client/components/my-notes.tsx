@@ -5,7 +5,7 @@ import { FileText, Clock, Calendar, Download, Brain } from "lucide-react"
 import { Button } from "@/components/ui/button"
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card"
 import { Badge } from "@/components/ui/badge"
-import { getLectures, type Lecture, formatDuration, formatDate } from "@/lib/api"
+import { getLectures, getLectureNotes, type Lecture, formatDuration, formatDate } from "@/lib/api"
 
 interface MyNotesProps {
   onLectureSelect: (lecture: Lecture) => void
@@ -19,10 +19,11 @@ export function MyNotes({ onLectureSelect }: MyNotesProps) {
   useEffect(() => {
     const fetchLectures = async () => {
       try {
-        const data = await getLectures()
+        // Notes themselves are only fetched when a lecture is opened or downloaded
+        const data = await getLectures(["id", "title", "description", "created_at", "duration", "status", "has_notes", "folder_id"])
         // Only show lectures that have completed notes
         const completedLectures = data.filter(
-          lecture => lecture.status === "completed" && lecture.notes
+          lecture => lecture.status === "completed" && lecture.has_notes
         )
         setLectures(completedLectures)
       } catch (err) {
@@ -37,13 +38,14 @@ export function MyNotes({ onLectureSelect }: MyNotesProps) {
   }, [])
 
   const handleDownloadPDF = async (lecture: Lecture) => {
-    if (!lecture.notes) return;
+    if (!lecture.has_notes) return;
   
     try {
+      const notes = await getLectureNotes(lecture.id);
       const html2pdf = (await import('html2pdf.js')).default;
   
       const element = document.createElement('div');
-      element.innerHTML = lecture.notes;
+      element.innerHTML = notes;
       element.className = 'lecture-notes';
       document.body.appendChild(element);
       const opt = {
@@ -127,14 +129,11 @@ export function MyNotes({ onLectureSelect }: MyNotesProps) {
                 <div className="p-4 bg-muted rounded-lg">
                   <div className="flex items-center gap-2 mb-3">
                     <Brain className="h-4 w-4 text-primary" />
-                    <h4 className="text-sm font-medium">Note Preview</h4>
+                    <h4 className="text-sm font-medium">Notes Ready</h4>
                   </div>
-                  <div 
-                    className="prose prose-sm max-w-none text-muted-foreground line-clamp-3"
-                    dangerouslySetInnerHTML={{ 
-                      __html: lecture.notes || 'No notes available.'
-                    }} 
-                  />
+                  <p className="text-sm text-muted-foreground line-clamp-3">
+                    {lecture.description || 'Overview, key concepts, main points, examples and summary.'}
+                  </p>
                   <Button
                     variant="link"
                     className="mt-2 h-auto p-0"
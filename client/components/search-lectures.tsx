@@ -1,62 +1,96 @@
 "use client"
 
 import { useState, useEffect } from "react"
-import { Search, FileText, Clock, Calendar } from "lucide-react"
+import { Search, FileText, Calendar } from "lucide-react"
 import { Input } from "@/components/ui/input"
+import { Button } from "@/components/ui/button"
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card"
 import { Badge } from "@/components/ui/badge"
-import { getLectures, type Lecture, formatDuration, formatDate } from "@/lib/api"
+import {
+  getLectureById,
+  searchLectures,
+  type Lecture,
+  type LectureSearchResult,
+  formatDate,
+} from "@/lib/api"
 
 interface SearchLecturesProps {
   onLectureSelect: (lecture: Lecture) => void
 }
 
+// Wait for typing to pause before querying the server
+const SEARCH_DELAY_MS = 300
+
 export function SearchLectures({ onLectureSelect }: SearchLecturesProps) {
   const [searchQuery, setSearchQuery] = useState("")
-  const [lectures, setLectures] = useState<Lecture[]>([])
-  const [loading, setLoading] = useState(true)
+  const [results, setResults] = useState<LectureSearchResult[]>([])
+  const [nextOffset, setNextOffset] = useState<number | null>(null)
+  const [loading, setLoading] = useState(false)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [error, setError] = useState<string | null>(null)
-  const [filteredLectures, setFilteredLectures] = useState<Lecture[]>([])
 
+  // The server ranks matches in titles, transcripts and notes; only the first page is fetched here
   useEffect(() => {
-    const fetchLectures = async () => {
+    const query = searchQuery.trim()
+    if (!query) {
+      setResults([])
+      setNextOffset(null)
+      setLoading(false)
+      return
+    }
+
+    let cancelled = false
+    setLoading(true)
+    const timer = setTimeout(async () => {
       try {
-        const data = await getLectures()
-        setLectures(data)
-        setFilteredLectures(data)
+        const page = await searchLectures(query)
+        if (!cancelled) {
+          setResults(page.results)
+          setNextOffset(page.nextOffset)
+          setError(null)
+        }
       } catch (err) {
-        setError("Failed to load lectures")
-        console.error("Error fetching lectures:", err)
+        if (!cancelled) {
+          setError("Failed to search lectures")
+          console.error("Error searching lectures:", err)
+        }
       } finally {
-        setLoading(false)
+        if (!cancelled) {
+          setLoading(false)
+        }
       }
+    }, SEARCH_DELAY_MS)
+
+    return () => {
+      cancelled = true
+      clearTimeout(timer)
     }
+  }, [searchQuery])
 
-    fetchLectures()
-  }, [])
+  const loadMore = async () => {
+    if (nextOffset === null) return
+    setLoadingMore(true)
+    try {
+      const page = await searchLectures(searchQuery.trim(), nextOffset)
+      setResults((previous) => [...previous, ...page.results])
+      setNextOffset(page.nextOffset)
+    } catch (err) {
+      setError("Failed to search lectures")
+      console.error("Error searching lectures:", err)
+    } finally {
+      setLoadingMore(false)
+    }
+  }
 
-  // Update filtered lectures when search query changes
-  useEffect(() => {
-    const searchTerms = searchQuery.toLowerCase().split(" ")
-    const filtered = lectures.filter((lecture) => {
-      const titleMatch = searchTerms.every(term =>
-        lecture.title.toLowerCase().includes(term)
-      )
-      const transcriptMatch = lecture.transcript
-        ? searchTerms.every(term =>
-            lecture.transcript!.toLowerCase().includes(term)
-          )
-        : false
-      const notesMatch = lecture.notes
-        ? searchTerms.every(term =>
-            lecture.notes!.toLowerCase().includes(term)
-          )
-        : false
-
-      return titleMatch || transcriptMatch || notesMatch
-    })
-    setFilteredLectures(filtered)
-  }, [lectures, searchQuery])
+  // Results carry only what the list shows; the lecture is loaded when it is opened
+  const selectResult = async (result: LectureSearchResult) => {
+    try {
+      onLectureSelect(await getLectureById(result.id))
+    } catch (err) {
+      setError("Failed to load lecture")
+      console.error("Error fetching lecture:", err)
+    }
+  }
 
   const getStatusColor = (status: Lecture["status"]) => {
     switch (status) {
@@ -76,22 +110,6 @@ export function SearchLectures({ onLectureSelect }: SearchLecturesProps) {
     return status.charAt(0).toUpperCase() + status.slice(1).replace("_", " ")
   }
 
-  if (loading) {
-    return (
-      <div className="flex items-center justify-center h-full">
-        <div className="animate-spin rounded-full h-12 w-12 border-b-2 border-primary"></div>
-      </div>
-    )
-  }
-
-  if (error) {
-    return (
-      <div className="flex flex-col items-center justify-center h-full">
-        <div className="text-red-600 mb-4">{error}</div>
-      </div>
-    )
-  }
-
   return (
     <div className="flex-1 space-y-8 p-8">
       <div>
@@ -109,60 +127,75 @@ export function SearchLectures({ onLectureSelect }: SearchLecturesProps) {
         />
       </div>
 
-      <div className="grid grid-cols-1 gap-6">
-        {filteredLectures.map((lecture) => (
-          <Card
-            key={lecture.id}
-            className="cursor-pointer hover:shadow-lg transition-shadow"
-            onClick={() => onLectureSelect(lecture)}
-          >
-            <CardHeader className="pb-3">
-              <div className="flex items-start justify-between">
-                <CardTitle className="text-lg">{lecture.title}</CardTitle>
-                <Badge variant="secondary" className={getStatusColor(lecture.status)}>
-                  {formatStatus(lecture.status)}
-                </Badge>
-              </div>
-              {lecture.description && (
-                <p className="text-sm text-muted-foreground mt-1">{lecture.description}</p>
-              )}
-            </CardHeader>
-            <CardContent>
-              <div className="space-y-3">
-                <div className="flex items-center gap-2 text-sm text-muted-foreground">
-                  <Calendar className="h-4 w-4" />
-                  {formatDate(lecture.created_at)}
-                </div>
-                <div className="flex items-center gap-2 text-sm text-muted-foreground">
-                  <Clock className="h-4 w-4" />
-                  {formatDuration(lecture.duration)}
+      {error && <div className="text-red-600">{error}</div>}
+
+      {loading ? (
+        <div className="flex items-center justify-center py-12">
+          <div className="animate-spin rounded-full h-12 w-12 border-b-2 border-primary"></div>
+        </div>
+      ) : (
+        <div className="grid grid-cols-1 gap-6">
+          {results.map((result) => (
+            <Card
+              key={result.id}
+              className="cursor-pointer hover:shadow-lg transition-shadow"
+              onClick={() => selectResult(result)}
+            >
+              <CardHeader className="pb-3">
+                <div className="flex items-start justify-between">
+                  <CardTitle className="text-lg">{result.title}</CardTitle>
+                  <Badge variant="secondary" className={getStatusColor(result.status)}>
+                    {formatStatus(result.status)}
+                  </Badge>
                 </div>
-                {searchQuery && lecture.transcript && (
-                  <div className="mt-4 p-4 bg-muted rounded-lg">
-                    <h4 className="text-sm font-medium mb-2 flex items-center gap-2">
-                      <FileText className="h-4 w-4" />
-                      Matching Content
-                    </h4>
-                    <p className="text-sm text-muted-foreground line-clamp-3">
-                      {lecture.transcript}
-                    </p>
+              </CardHeader>
+              <CardContent>
+                <div className="space-y-3">
+                  <div className="flex items-center gap-2 text-sm text-muted-foreground">
+                    <Calendar className="h-4 w-4" />
+                    {formatDate(result.created_at)}
                   </div>
-                )}
-              </div>
-            </CardContent>
-          </Card>
-        ))}
-
-        {filteredLectures.length === 0 && (
-          <div className="flex flex-col items-center justify-center py-12">
-            <Search className="h-12 w-12 text-muted-foreground mb-4" />
-            <h3 className="text-lg font-medium text-foreground mb-2">No lectures found</h3>
-            <p className="text-muted-foreground">
-              Try adjusting your search terms
-            </p>
-          </div>
-        )}
-      </div>
+                  {result.snippet && (
+                    <div className="mt-4 p-4 bg-muted rounded-lg">
+                      <h4 className="text-sm font-medium mb-2 flex items-center gap-2">
+                        <FileText className="h-4 w-4" />
+                        Matching Content
+                      </h4>
+                      {/* The snippet is escaped by the server; only <mark> tags are markup */}
+                      <p
+                        className="text-sm text-muted-foreground line-clamp-3 [&_mark]:bg-yellow-200 [&_mark]:text-foreground"
+                        dangerouslySetInnerHTML={{ __html: result.snippet }}
+                      />
+                    </div>
+                  )}
+                </div>
+              </CardContent>
+            </Card>
+          ))}
+
+          {nextOffset !== null && (
+            <div className="flex justify-center">
+              <Button variant="outline" onClick={loadMore} disabled={loadingMore}>
+                {loadingMore ? "Loading..." : "Load more"}
+              </Button>
+            </div>
+          )}
+
+          {results.length === 0 && (
+            <div className="flex flex-col items-center justify-center py-12">
+              <Search className="h-12 w-12 text-muted-foreground mb-4" />
+              <h3 className="text-lg font-medium text-foreground mb-2">
+                {searchQuery.trim() ? "No lectures found" : "Search your lectures"}
+              </h3>
+              <p className="text-muted-foreground">
+                {searchQuery.trim()
+                  ? "Try adjusting your search terms"
+                  : "Type a word from a title, transcript or notes"}
+              </p>
+            </div>
+          )}
+        </div>
+      )}
     </div>
   )
-} 
\ No newline at end of file
+}
@@ -7,8 +7,10 @@ export interface Lecture {
   created_at: string;
   duration: number;
   status: 'completed' | 'failed' | 'transcribing' | 'generating_notes';
-  transcript: string | null;
-  notes: string | null;
+  transcript?: string | null;
+  notes?: string | null;
+  has_transcript?: boolean;
+  has_notes?: boolean;
   folder_id: string;
 }
 
@@ -32,12 +34,28 @@ export async function uploadLecture(file: File, title: string, description?: str
   return response.json();
 }
 
-export async function getLectures(): Promise<Lecture[]> {
-  const response = await fetch(`${API_BASE_URL}/lectures`);
-  if (!response.ok) {
-    throw new Error('Failed to fetch lectures');
-  }
-  return response.json();
+// Lists return summaries without transcript/notes unless they are requested in `fields`.
+// The server returns one page at a time with the next page's cursor in X-Next-Cursor;
+// pages are followed until there is none, so every lecture is returned.
+export async function getLectures(fields?: string[]): Promise<Lecture[]> {
+  const lectures: Lecture[] = [];
+  let cursor: string | null = null;
+  do {
+    const params = new URLSearchParams({ limit: '500' });
+    if (fields) {
+      params.set('fields', fields.join(','));
+    }
+    if (cursor) {
+      params.set('cursor', cursor);
+    }
+    const response = await fetch(`${API_BASE_URL}/lectures?${params}`);
+    if (!response.ok) {
+      throw new Error('Failed to fetch lectures');
+    }
+    lectures.push(...(await response.json()));
+    cursor = response.headers.get('X-Next-Cursor');
+  } while (cursor);
+  return lectures;
 }
 
 export async function getLectureById(id: string): Promise<Lecture> {
@@ -48,6 +66,40 @@ export async function getLectureById(id: string): Promise<Lecture> {
   return response.json();
 }
 
+// Notes HTML of one lecture, fetched only when it is opened or downloaded
+export async function getLectureNotes(id: number | string): Promise<string> {
+  const response = await fetch(`${API_BASE_URL}/lectures/${id}/notes`);
+  if (!response.ok) {
+    throw new Error('Failed to fetch notes');
+  }
+  return response.text();
+}
+
+export interface LectureSearchResult {
+  id: string;
+  title: string;
+  folder_id: string;
+  status: Lecture['status'];
+  created_at: string;
+  snippet: string; // HTML-escaped, with matches wrapped in <mark>
+  score: number;
+}
+
+// One page of ranked full-text results; nextOffset is null on the last page
+export async function searchLectures(
+  query: string,
+  offset = 0,
+  limit = 20
+): Promise<{ results: LectureSearchResult[]; nextOffset: number | null }> {
+  const params = new URLSearchParams({ q: query, offset: String(offset), limit: String(limit) });
+  const response = await fetch(`${API_BASE_URL}/search?${params}`);
+  if (!response.ok) {
+    throw new Error('Failed to search lectures');
+  }
+  const next = response.headers.get('X-Next-Offset');
+  return { results: await response.json(), nextOffset: next === null ? null : Number(next) };
+}
+
 export async function getLecture(id: number): Promise<Lecture> {
   const response = await fetch(`${API_BASE_URL}/lectures/${id}`);
   if (!response.ok) {
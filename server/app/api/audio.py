@@ -0,0 +1,124 @@
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional, Tuple
+import hashlib
+import mimetypes
+import re
+
+from ..repositories.lectures import lecture_repository
+from ..services.audio_index import EVICTED, audio_index
+from ..services.storage import storage_service
+
+BYTE_RANGE = re.compile(r'bytes=(\d*)-(\d*)$')
+
+router = APIRouter()
+# Stored files by key, replacing the old static mount over local_uploads
+files_router = APIRouter()
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """The (start, end) inclusive byte range of a single-range header, or None to send the whole file.
+
+    Raises ValueError for a range that cannot be satisfied.
+    """
+    match = BYTE_RANGE.match(header.strip())
+    if match is None:
+        # Multiple ranges or another unit: ignoring the header is allowed
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("Empty suffix range")
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("Range not satisfiable")
+    return start, end
+
+
+def _not_modified(request: Request, etag: str, modified: float) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _range_applies(request: Request, etag: str, modified: float) -> bool:
+    """If-Range: only honour Range when the client's copy is still current"""
+    if_range = request.headers.get("if-range")
+    if if_range is None:
+        return True
+    if if_range.startswith('"') or if_range.startswith('W/'):
+        return if_range.strip() == etag
+    try:
+        return int(modified) <= parsedate_to_datetime(if_range).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+async def audio_response(request: Request, key: str) -> Response:
+    """Serve a stored file with ETag and Last-Modified validators and single byte ranges"""
+    info = await storage_service.stat(key)
+    if info is None:
+        raise HTTPException(status_code=404, detail="Audio file not found")
+
+    etag = f'"{hashlib.sha1(f"{key}:{info.size}:{info.modified}".encode()).hexdigest()}"'
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(info.modified, usegmt=True),
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, max-age=3600",
+    }
+    if _not_modified(request, etag, info.modified):
+        return Response(status_code=304, headers=headers)
+
+    start, end, status = 0, info.size - 1, 200
+    range_header = request.headers.get("range")
+    if range_header and info.size and _range_applies(request, etag, info.modified):
+        try:
+            byte_range = parse_range(range_header, info.size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{info.size}"})
+        if byte_range is not None:
+            start, end = byte_range
+            status = 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{info.size}"
+
+    headers["Content-Length"] = str(end - start + 1)
+    media_type = mimetypes.guess_type(key)[0] or "application/octet-stream"
+    if request.method == "HEAD" or info.size == 0:
+        return Response(status_code=status, headers=headers, media_type=media_type)
+    return StreamingResponse(storage_service.read(key, start, end), status_code=status,
+                             headers=headers, media_type=media_type)
+
+
+@router.api_route("/lectures/{lecture_id}/audio", methods=["GET", "HEAD"])
+async def get_lecture_audio(lecture_id: str, request: Request):
+    """Stream the lecture audio, with support for Range requests and conditional GETs"""
+    lecture = await lecture_repository.get(lecture_id)
+    if lecture is None:
+        raise HTTPException(status_code=404, detail="Lecture not found")
+    entry = await audio_index.get(lecture.audio_digest) if lecture.audio_digest else None
+    if entry and entry.state == EVICTED and entry.audio_path == lecture.audio_url:
+        raise HTTPException(status_code=410, detail="Audio was removed by the retention policy")
+    return await audio_response(request, lecture.audio_url)
+
+
+@files_router.api_route("/files/{key}", methods=["GET", "HEAD"])
+async def get_file(key: str, request: Request):
+    """Serve a stored file by key"""
+    if key.startswith("."):
+        raise HTTPException(status_code=404, detail="Audio file not found")
+    return await audio_response(request, key)
@@ -0,0 +1,200 @@
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form
+from typing import List, Optional, Tuple
+import asyncio
+import json
+import mimetypes
+import os
+import uuid
+
+from dotenv import load_dotenv
+
+from ..models.batch import BatchImport, BatchRejection, BatchStatus
+from ..models.lecture import ProcessingStatus, QualityTier
+from ..repositories.batches import batch_repository
+from ..repositories.lectures import lecture_repository
+from ..services.admission import AdmissionError, admission_controller
+from ..services.audio_index import audio_index
+from ..services.audio_preprocessing import audio_preprocessor
+from ..services.job_queue import BULK, job_queue
+from ..services.metrics import span
+from ..services.storage import StoredFile, UploadTooLargeError, storage_service
+from .lectures import build_lecture, store_audio, too_many_requests, transcribe_payload
+
+load_dotenv()
+
+# Directory imports are only allowed below this server directory; disabled when unset
+IMPORT_ROOT = os.getenv("BATCH_IMPORT_ROOT")
+MAX_BATCH_FILES = int(os.getenv("BATCH_MAX_FILES", "500"))
+
+router = APIRouter()
+
+
+async def _submit_batch(source: str, user_id: str, folder_id: str, quality: QualityTier,
+                        files: List[Tuple[str, StoredFile]], rejected: List[BatchRejection],
+                        use_cache: bool = True) -> BatchStatus:
+    """Create lectures for (title, stored file) pairs in bulk and queue them as one batch.
+
+    Lectures are inserted in one transaction and their jobs queued in another, at
+    bulk priority so that interactive uploads are not stuck behind the batch.
+    Quota taken for rejected files and reused results is given back. If anything
+    fails, the batch and its lectures are removed again; the stored files are left
+    to the caller.
+    """
+    batch_id = str(uuid.uuid4())
+    lectures, reused = [], []
+    try:
+        await batch_repository.create(batch_id, source, user_id, folder_id)
+        for title, (audio_url, audio_digest, size) in files:
+            audio_url, entry = await store_audio(audio_url, audio_digest, size)
+            lecture, sections = build_lecture(audio_url, audio_digest, entry, title, None,
+                                              user_id, folder_id, quality, batch_id=batch_id,
+                                              use_cache=use_cache)
+            lectures.append(lecture)
+            if sections is not None:
+                reused.append((lecture.id, sections))
+
+        await lecture_repository.create_many(lectures)
+        for lecture_id, sections in reused:
+            await lecture_repository.update(lecture_id, sections=json.dumps(sections))
+        await job_queue.enqueue_many([
+            (lecture.id, "transcribe", transcribe_payload(lecture, use_cache=use_cache))
+            for lecture in lectures if lecture.status == ProcessingStatus.PENDING
+        ], priority=BULK, user_id=user_id)
+    except Exception:
+        try:
+            for lecture in lectures:
+                await job_queue.cancel(lecture.id)
+            await batch_repository.delete(batch_id)
+        except Exception as e:
+            print(f"Error removing failed batch {batch_id}: {str(e)}")
+        raise
+    admission_controller.refund(user_id, BULK, len(rejected) + len(reused))
+    print(f"Queued batch {batch_id}: {len(lectures)} lectures, {len(reused)} reused, {len(rejected)} rejected")
+
+    batch = await batch_repository.status(batch_id)
+    batch.rejected = rejected
+    return batch
+
+
+async def _discard_files(files: List[Tuple[str, StoredFile]]) -> None:
+    """Delete files stored for a batch that failed, unless other lectures now use them.
+
+    A file that replaced evicted audio is the original of earlier lectures and is
+    kept; one that was registered as new audio is removed from the index as well.
+    """
+    for _, (audio_url, audio_digest, _) in files:
+        try:
+            entry = await audio_index.get(audio_digest)
+            if entry is not None and entry.audio_path == audio_url:
+                if await lecture_repository.audio_in_use(audio_url, exclude_id=""):
+                    continue
+                await audio_index.remove(audio_digest)
+                await audio_preprocessor.remove(audio_digest)
+            await storage_service.delete_file(audio_url)
+        except Exception as e:
+            print(f"Error removing {audio_url} of a failed batch: {str(e)}")
+
+
+def _audio_files(directory: str, recursive: bool) -> List[str]:
+    """Audio files below directory, by extension, in name order"""
+    if recursive:
+        paths = [os.path.join(root, name) for root, _, names in os.walk(directory) for name in names]
+    else:
+        paths = [entry.path for entry in os.scandir(directory) if entry.is_file()]
+    return sorted(path for path in paths if (mimetypes.guess_type(path)[0] or "").startswith("audio/"))
+
+
+@router.post("/lectures/batch", response_model=BatchStatus)
+async def upload_batch(
+    files: List[UploadFile] = File(...),
+    folder_id: str = Form(...),
+    user_id: Optional[str] = Form(None),
+    quality: QualityTier = Form(QualityTier.STANDARD),
+    use_cache: bool = Form(True)
+):
+    """Upload many lecture recordings into one folder and process them as a batch.
+
+    Files that are not audio or are too large are skipped and listed in ``rejected``.
+    """
+    if len(files) > MAX_BATCH_FILES:
+        raise HTTPException(status_code=400, detail=f"A batch holds at most {MAX_BATCH_FILES} files")
+    effective_user_id = user_id or "default_user"
+    try:
+        await admission_controller.admit(effective_user_id, BULK, len(files))
+    except AdmissionError as e:
+        raise too_many_requests(e)
+
+    stored, rejected = [], []
+    try:
+        for file in files:
+            if not (file.content_type or "").startswith("audio/"):
+                rejected.append(BatchRejection(filename=file.filename, error="File must be an audio file"))
+                continue
+            try:
+                with span("upload"):
+                    stored_file = await storage_service.upload_file(file, effective_user_id)
+            except UploadTooLargeError as e:
+                rejected.append(BatchRejection(filename=file.filename, error=str(e)))
+                continue
+            stored.append((file.filename, stored_file))
+        return await _submit_batch("upload", effective_user_id, folder_id, quality, stored, rejected,
+                                   use_cache=use_cache)
+    except Exception as e:
+        await _discard_files(stored)
+        admission_controller.refund(effective_user_id, BULK, len(files))
+        print(f"Error in upload_batch: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/lectures/import", response_model=BatchStatus)
+async def import_directory(request: BatchImport):
+    """Import every audio file of a server directory below BATCH_IMPORT_ROOT as a batch.
+
+    Files are copied into storage, so the source directory is never modified.
+    """
+    if not IMPORT_ROOT:
+        raise HTTPException(status_code=403, detail="Directory import is disabled")
+    root = os.path.realpath(IMPORT_ROOT)
+    directory = os.path.realpath(os.path.join(root, request.directory))
+    if os.path.commonpath([root, directory]) != root:
+        raise HTTPException(status_code=403, detail="Directory is outside the import root")
+    if not os.path.isdir(directory):
+        raise HTTPException(status_code=404, detail="Directory not found")
+
+    paths = await asyncio.to_thread(_audio_files, directory, request.recursive)
+    if not paths:
+        raise HTTPException(status_code=400, detail="Directory contains no audio files")
+    if len(paths) > MAX_BATCH_FILES:
+        raise HTTPException(status_code=400, detail=f"A batch holds at most {MAX_BATCH_FILES} files")
+    effective_user_id = request.user_id or "default_user"
+    try:
+        await admission_controller.admit(effective_user_id, BULK, len(paths))
+    except AdmissionError as e:
+        raise too_many_requests(e)
+
+    stored, rejected = [], []
+    try:
+        for path in paths:
+            name = os.path.relpath(path, directory)
+            try:
+                stored_file = await storage_service.import_file(path, effective_user_id)
+            except UploadTooLargeError as e:
+                rejected.append(BatchRejection(filename=name, error=str(e)))
+                continue
+            stored.append((os.path.basename(path), stored_file))
+        return await _submit_batch("directory", effective_user_id, request.folder_id, request.quality,
+                                   stored, rejected, use_cache=request.use_cache)
+    except Exception as e:
+        await _discard_files(stored)
+        admission_controller.refund(effective_user_id, BULK, len(paths))
+        print(f"Error in import_directory: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/batches/{batch_id}", response_model=BatchStatus)
+async def get_batch(batch_id: str):
+    """Aggregate progress and throughput of a batch; list its lectures with /lectures?batch_id="""
+    batch = await batch_repository.status(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return batch
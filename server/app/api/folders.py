@@ -4,12 +4,10 @@ from datetime import datetime
 import uuid
 
 from ..models.folder import Folder, FolderCreate, FolderUpdate
+from ..repositories.folders import folder_repository
 
 router = APIRouter()
 
-# In-memory storage for folders (replace with database in production)
-folders = {}
-
 @router.post("/folders", response_model=Folder)
 async def create_folder(folder: FolderCreate):
     """Create a new folder"""
@@ -25,45 +23,39 @@ async def create_folder(folder: FolderCreate):
         lecture_count=0
     )
     
-    folders[folder_id] = new_folder
-    return new_folder
+    return await folder_repository.create(new_folder)
 
 @router.get("/folders", response_model=List[Folder])
 async def list_folders():
     """List all folders"""
-    return list(folders.values())
+    return await folder_repository.list()
 
 @router.get("/folders/{folder_id}", response_model=Folder)
 async def get_folder(folder_id: str):
     """Get folder by ID"""
-    if folder_id not in folders:
+    folder = await folder_repository.get(folder_id)
+    if folder is None:
         raise HTTPException(status_code=404, detail="Folder not found")
-    return folders[folder_id]
+    return folder
 
 @router.put("/folders/{folder_id}", response_model=Folder)
 async def update_folder(folder_id: str, folder_update: FolderUpdate):
     """Update folder"""
-    if folder_id not in folders:
+    if await folder_repository.get(folder_id) is None:
         raise HTTPException(status_code=404, detail="Folder not found")
     
-    current_folder = folders[folder_id]
     update_data = folder_update.dict(exclude_unset=True)
-    
-    for field, value in update_data.items():
-        setattr(current_folder, field, value)
-    
-    current_folder.updated_at = datetime.now()
-    return current_folder
+    return await folder_repository.update(folder_id, **update_data)
 
 @router.delete("/folders/{folder_id}")
 async def delete_folder(folder_id: str):
     """Delete folder"""
-    if folder_id not in folders:
+    folder = await folder_repository.get(folder_id)
+    if folder is None:
         raise HTTPException(status_code=404, detail="Folder not found")
     
-    # Check if folder has lectures (implement this check when lectures are added)
-    # if folder has lectures:
-    #     raise HTTPException(status_code=400, detail="Cannot delete folder with lectures")
+    if folder.lecture_count:
+        raise HTTPException(status_code=400, detail="Cannot delete folder with lectures")
     
-    del folders[folder_id]
+    await folder_repository.delete(folder_id)
     return {"message": "Folder deleted successfully"} 
\ No newline at end of file
@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+
+from ..services.job_queue import job_queue
+
+router = APIRouter()
+
+@router.get("/jobs/stats")
+async def get_job_stats(window_seconds: float = 300):
+    """Queue depth per stage and status, and per-stage throughput over the window"""
+    return await job_queue.stats(window_seconds=window_seconds)
@@ -1,139 +1,475 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks, Form
-from ..models.lecture import Lecture, ProcessingStatus
-from ..services.storage import storage_service
-from ..services.transcription import transcription_service
-from ..services.notes import notes_service
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from ..models.lecture import (
+    Lecture, LectureFields, LectureStatus, LectureSummary, ProcessingStatus, QualityTier, TranscriptUpdate,
+)
+from ..repositories.lectures import SUMMARY_FIELDS, lecture_repository
+from ..repositories.note_chunks import note_chunk_repository
+from ..services.storage import UploadTooLargeError, storage_service
+from ..services.admission import AdmissionError, admission_controller
+from ..services.audio_index import EVICTED, ORIGINAL, AudioIndexEntry, audio_index
+from ..services.audio_preprocessing import audio_preprocessor
+from ..services.job_queue import FAILED, INTERACTIVE, LEASED, SUCCEEDED, JobUpdate, job_queue
+from ..services.metrics import span
+from ..services.notes_render import (
+    ALL_SECTIONS, FORMATS, SECTION_KEYS, notes_render_cache, notes_to_html, notes_version, render_notes,
+)
+from ..services.progress import progress_hub
+import asyncio
+import hashlib
+import json
 import uuid
-from typing import List, Optional
-from datetime import datetime
+from typing import List, Optional, Tuple
+from datetime import datetime, timedelta
 
 
 router = APIRouter()
 
-# In-memory storage for demo (replace with database in production)
-lectures = {}
+def transcribe_payload(lecture: Lecture, force: bool = False, use_cache: bool = True) -> dict:
+    return {
+        "audio_url": lecture.audio_url,
+        "audio_digest": lecture.audio_digest,
+        "title": lecture.title,
+        "quality": lecture.quality.value,
+        "force": force,
+        "use_cache": use_cache,
+    }
 
-async def process_lecture(lecture_id: str):
-    """Background task to process the lecture"""
-    lecture = lectures[lecture_id]
-    
-    try:
-        print(f"Starting background processing for lecture {lecture_id}")
-        # Update status to transcribing
-        lecture.status = ProcessingStatus.TRANSCRIBING
-        print(f"Status updated to {lecture.status}")
-        
-        # Transcribe the audio file
-        print(f"Starting transcription of audio file: {lecture.audio_url}")
-        transcript, duration = await transcription_service.transcribe(lecture.audio_url)
-        print(f"Transcription completed. Length: {len(transcript)} chars, Duration: {duration}s")
-        
-        # Update lecture with transcript and duration
-        lecture.transcript = transcript
-        lecture.duration = duration
-        
-        # Generate notes from transcript
-        print(f"Generating notes for lecture {lecture_id}")
-        lecture.status = ProcessingStatus.GENERATING_NOTES
-        notes = await notes_service.generate_notes(transcript, lecture.title)
-        lecture.notes = notes
-        print(f"Notes generation completed. Length: {len(notes)} chars")
-        
-        # Mark as completed
-        lecture.status = ProcessingStatus.COMPLETED
-        print(f"Lecture {lecture_id} processing completed successfully")
-        
-    except Exception as e:
-        print(f"Error processing lecture {lecture_id}: {str(e)}")
-        lecture.status = ProcessingStatus.FAILED
-        raise HTTPException(status_code=500, detail=str(e))
+async def process_lecture(lecture: Lecture, force: bool = False, use_cache: bool = True):
+    """Queue the lecture for transcription; notes are queued when that stage succeeds.
+
+    With force, a transcript stored for the same audio is not reused. Without
+    use_cache, every notes section is generated by the model again.
+    """
+    await job_queue.enqueue(lecture.id, "transcribe", transcribe_payload(lecture, force, use_cache),
+                            user_id=lecture.user_id)
+    print(f"Queued lecture {lecture.id} for processing")
+
+async def queue_estimate(lecture_id: str) -> Tuple[Optional[int], Optional[datetime]]:
+    """Jobs ahead of a waiting lecture and when its processing is expected to start"""
+    position = await job_queue.position(lecture_id)
+    if position is None:
+        return None, None
+    ahead, seconds = position
+    return ahead, datetime.now() + timedelta(seconds=seconds) if seconds is not None else None
+
+def too_many_requests(e: AdmissionError) -> HTTPException:
+    return HTTPException(status_code=429, detail=str(e), headers=e.headers())
+
+async def store_audio(audio_url: str, audio_digest: str, size: int) -> Tuple[str, Optional[AudioIndexEntry]]:
+    """Register stored audio by digest; identical audio stored before keeps its existing copy.
+
+    Returns the storage key to use and the index entry of earlier identical audio, if any.
+    """
+    entry = await audio_index.get(audio_digest)
+    if entry is None:
+        await audio_index.register(audio_digest, audio_url, size)
+        return audio_url, None
+    if entry.state != EVICTED and await storage_service.stat(entry.audio_path) is not None:
+        print(f"Duplicate upload of audio {audio_digest}, reusing {entry.audio_path}")
+        await storage_service.delete_file(audio_url)
+        return entry.audio_path, entry
+
+    # The earlier copy is gone: this upload becomes the stored original for every lecture of this audio
+    print(f"Restoring evicted audio {audio_digest} from a new upload")
+    await audio_index.set_file(audio_digest, audio_url, size, ORIGINAL)
+    await audio_preprocessor.remove_archive(audio_digest)
+    await lecture_repository.replace_audio(entry.audio_path, audio_url)
+    entry.audio_path, entry.size, entry.state = audio_url, size, ORIGINAL
+    return audio_url, entry
+
+def build_lecture(audio_url: str, audio_digest: str, entry: Optional[AudioIndexEntry], title: str,
+                  description: Optional[str], user_id: str, folder_id: str, quality: QualityTier,
+                  batch_id: Optional[str] = None, use_cache: bool = True) -> Tuple[Lecture, Optional[dict]]:
+    """A new lecture for stored audio, and the notes sections it reuses, if any.
+
+    When results for the exact same audio exist the lecture is already completed
+    and its sections must be stored once the lecture is created, unless use_cache
+    is off.
+    """
+    current_time = datetime.now()
+    lecture = Lecture(
+        id=str(uuid.uuid4()),
+        title=title,
+        description=description,
+        audio_url=audio_url,
+        audio_digest=audio_digest,
+        user_id=user_id,
+        folder_id=folder_id,
+        status=ProcessingStatus.PENDING,
+        quality=quality,
+        batch_id=batch_id,
+        created_at=current_time,
+        updated_at=current_time,
+    )
+
+    # Results for this exact audio already exist, so there is nothing to process
+    reuse = (use_cache and entry and entry.transcript is not None and entry.sections is not None
+             and entry.notes_title == lecture.title and quality != QualityTier.HIGH)
+    if not reuse:
+        return lecture, None
+    lecture.transcript = entry.transcript
+    lecture.transcribed_at = current_time
+    lecture.duration = entry.duration
+    lecture.notes_version = notes_version(entry.sections)
+    lecture.progress = 100
+    lecture.status = ProcessingStatus.COMPLETED
+    return lecture, entry.sections
+
+async def _publish_job(job: JobUpdate):
+    """Forward a job's state to progress subscribers in this process"""
+    if job.status == FAILED:
+        progress_hub.update(job.lecture_id, status=ProcessingStatus.FAILED.value)
+    elif job.stage == "transcribe":
+        if job.status == LEASED:
+            # A retried job reports its segments from the start again
+            attempt = (job.id, job.attempts)
+            hub = progress_hub.get(job.lecture_id)
+            known = len(hub.segments) if hub and hub.attempt == attempt else 0
+            # Only the segments this process has not relayed yet are read
+            new_segments = await job_queue.segments(job.id, start=known) if job.segment_count > known else []
+            progress_hub.update(job.lecture_id, status=ProcessingStatus.TRANSCRIBING.value,
+                                percent=job.progress, segments=new_segments, attempt=attempt)
+        elif job.status == SUCCEEDED:
+            progress_hub.update(job.lecture_id, percent=100)
+    elif job.stage == "notes":
+        if job.status == LEASED:
+            progress_hub.update(job.lecture_id, status=ProcessingStatus.GENERATING_NOTES.value)
+        elif job.status == SUCCEEDED:
+            progress_hub.update(job.lecture_id, status=ProcessingStatus.COMPLETED.value)
+
+async def sync_job_updates(poll_interval: float = 0.5):
+    """Relay progress written by worker processes to this process's SSE subscribers"""
+    seq = await job_queue.latest_seq()
+    while True:
+        try:
+            for job in await job_queue.changes_since(seq):
+                seq = job.updated_seq
+                await _publish_job(job)
+        except Exception as e:
+            print(f"Error syncing job updates: {str(e)}")
+        await asyncio.sleep(poll_interval)
 
 @router.post("/lectures/upload", response_model=Lecture)
 async def upload_lecture(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     folder_id: str = Form(...),  # Make folder_id required form field
     title: Optional[str] = Form(None),
     description: Optional[str] = Form(None),
-    user_id: Optional[str] = Form(None)
+    user_id: Optional[str] = Form(None),
+    quality: QualityTier = Form(QualityTier.STANDARD),
+    use_cache: bool = Form(True)
 ):
-    """Upload a new lecture audio file and start processing"""
+    """Upload a new lecture audio file and start processing.
+
+    A draft quality transcript is produced fast and can be upgraded later
+    with /lectures/{id}/upgrade. With use_cache off, notes are generated by the
+    model even when the same audio or text was processed before.
+    """
     print(f"Received form data - folder_id: {folder_id}, title: {title}")  # Debug log
     
     if not file.content_type.startswith('audio/'):
         raise HTTPException(status_code=400, detail="File must be an audio file")
-    
+
+    # Use a default user_id if none provided
+    effective_user_id = user_id or "default_user"
+    try:
+        await admission_controller.admit(effective_user_id, INTERACTIVE)
+    except AdmissionError as e:
+        raise too_many_requests(e)
+
     try:
-        # Use a default user_id if none provided
-        effective_user_id = user_id or "default_user"
-        
         # Upload file to storage
-        audio_url = await storage_service.upload_file(file, effective_user_id)
-        
-        # Create new lecture with required fields
-        lecture_id = str(uuid.uuid4())
-        current_time = datetime.now()
-        
-        # Create lecture dictionary with all required fields
-        lecture_data = {
-            "id": lecture_id,
-            "title": title or file.filename,
-            "description": description,
-            "audio_url": audio_url,
-            "user_id": effective_user_id,
-            "folder_id": folder_id,
-            "status": ProcessingStatus.PENDING,
-            "created_at": current_time,
-            "updated_at": current_time,
-            "duration": 0,
-            "transcript": None,
-            "notes": None
-        }
-        
-        print(f"Creating lecture with data: {lecture_data}")  # Debug log
-        
-        # Create lecture instance
-        lecture = Lecture(**lecture_data)
-        
+        upload_timings = {}
+        with span("upload", upload_timings):
+            audio_url, audio_digest, size = await storage_service.upload_file(file, effective_user_id)
+        audio_url, entry = await store_audio(audio_url, audio_digest, size)
+
+        lecture, sections = build_lecture(
+            audio_url, audio_digest, entry, title or file.filename, description,
+            effective_user_id, folder_id, quality, use_cache=use_cache,
+        )
+        print(f"Creating lecture {lecture.id} in folder {folder_id}")  # Debug log
+
         # Store lecture
-        lectures[lecture_id] = lecture
+        await lecture_repository.create(lecture)
+        await lecture_repository.set_timings(lecture.id, "upload", {"total": upload_timings["upload"]})
         
-        # Start background processing
-        background_tasks.add_task(process_lecture, lecture_id)
+        if sections is not None:
+            await lecture_repository.update(lecture.id, sections=json.dumps(sections))
+            lecture.notes = notes_to_html(sections)
+            # Nothing to process, so the upload does not count against the quota
+            admission_controller.refund(effective_user_id, INTERACTIVE)
+        else:
+            # Queue processing for worker processes
+            await process_lecture(lecture, use_cache=use_cache)
+            lecture.queue_position, lecture.estimated_start = await queue_estimate(lecture.id)
         
         return lecture
     
+    except UploadTooLargeError as e:
+        admission_controller.refund(effective_user_id, INTERACTIVE)
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
+        admission_controller.refund(effective_user_id, INTERACTIVE)
         print(f"Error in upload_lecture: {str(e)}")  # Add logging
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/lectures/{lecture_id}", response_model=Lecture)
-async def get_lecture(lecture_id: str):
+async def get_lecture(lecture_id: str, timings: bool = Query(False, description="Include the processing time breakdown")):
     """Get lecture by ID"""
-    if lecture_id not in lectures:
+    lecture = await lecture_repository.get(lecture_id)
+    if lecture is None:
         raise HTTPException(status_code=404, detail="Lecture not found")
-    return lectures[lecture_id]
+    if lecture.notes is None and lecture.notes_version:
+        lecture.notes = await _render_notes(lecture_id, lecture.notes_version)
+    if timings:
+        _, value = await lecture_repository.get_field(lecture_id, "timings")
+        lecture.timings = json.loads(value) if value else {}
+    return lecture
 
-@router.get("/lectures", response_model=List[Lecture])
-async def list_lectures(user_id: str = None):
-    """List all lectures for a user"""
-    if user_id:
-        return [lecture for lecture in lectures.values() if lecture.user_id == user_id]
-    return list(lectures.values())
+@router.get("/lectures/{lecture_id}/progress", response_model=LectureStatus)
+async def get_lecture_progress(lecture_id: str):
+    """Get only the processing status of a lecture, for cheap polling"""
+    lecture = await lecture_repository.get(lecture_id)
+    if lecture is None:
+        raise HTTPException(status_code=404, detail="Lecture not found")
+    status = LectureStatus(id=lecture.id, status=lecture.status, progress=lecture.progress)
+    if lecture.status == ProcessingStatus.PENDING:
+        status.queue_position, status.estimated_start = await queue_estimate(lecture_id)
+    return status
+
+@router.post("/lectures/{lecture_id}/upgrade", response_model=LectureStatus)
+async def upgrade_lecture(lecture_id: str, quality: QualityTier = QualityTier.HIGH,
+                          use_cache: bool = Query(True, description="Reuse cached notes sections")):
+    """Transcribe a lecture again at a higher quality tier and regenerate its notes"""
+    lecture = await lecture_repository.get(lecture_id)
+    if lecture is None:
+        raise HTTPException(status_code=404, detail="Lecture not found")
+    if lecture.status not in (ProcessingStatus.COMPLETED, ProcessingStatus.FAILED):
+        raise HTTPException(status_code=409, detail="Lecture is still being processed")
+    try:
+        await admission_controller.admit(lecture.user_id, INTERACTIVE)
+    except AdmissionError as e:
+        raise too_many_requests(e)
+
+    lecture.quality = quality
+    lecture.status = ProcessingStatus.PENDING
+    if not use_cache:
+        await note_chunk_repository.replace(lecture_id, {})
+    await lecture_repository.update(lecture_id, quality=quality, status=ProcessingStatus.PENDING, progress=0)
+    progress_hub.update(lecture_id, status=ProcessingStatus.PENDING.value, percent=0)
+    await process_lecture(lecture, force=True, use_cache=use_cache)
+    queue_position, estimated_start = await queue_estimate(lecture_id)
+    return LectureStatus(id=lecture.id, status=lecture.status, progress=0,
+                         queue_position=queue_position, estimated_start=estimated_start)
+
+@router.put("/lectures/{lecture_id}/transcript")
+async def update_transcript(lecture_id: str, update: TranscriptUpdate):
+    """Replace the transcript with a corrected one; notes are updated with /regenerate"""
+    lecture = await lecture_repository.get(lecture_id)
+    if lecture is None:
+        raise HTTPException(status_code=404, detail="Lecture not found")
+    if lecture.status not in (ProcessingStatus.COMPLETED, ProcessingStatus.FAILED):
+        raise HTTPException(status_code=409, detail="Lecture is still being processed")
+    await lecture_repository.update(lecture_id, transcript=update.transcript)
+    return {"message": "Transcript updated successfully"}
+
+@router.post("/lectures/{lecture_id}/regenerate", response_model=LectureStatus)
+async def regenerate_notes(lecture_id: str,
+                           use_cache: bool = Query(True, description="Reuse cached notes sections")):
+    """Regenerate notes from the current transcript.
+
+    Only chunks whose text changed since the last generation are sent to the
+    model again; the reduce and summary steps are rerun on the result. With
+    use_cache off, every chunk and section is generated again.
+    """
+    lecture = await lecture_repository.get(lecture_id)
+    if lecture is None:
+        raise HTTPException(status_code=404, detail="Lecture not found")
+    if lecture.status not in (ProcessingStatus.COMPLETED, ProcessingStatus.FAILED):
+        raise HTTPException(status_code=409, detail="Lecture is still being processed")
+    if not lecture.transcript:
+        raise HTTPException(status_code=400, detail="Lecture has no transcript")
+    if lecture.transcribed_at is None:
+        # A failed transcription can leave the partial transcript written while it ran
+        raise HTTPException(status_code=409, detail="Transcription did not complete; upgrade the lecture to transcribe it again")
+    try:
+        await admission_controller.admit(lecture.user_id, INTERACTIVE)
+    except AdmissionError as e:
+        raise too_many_requests(e)
+
+    if not use_cache:
+        await note_chunk_repository.replace(lecture_id, {})
+    await lecture_repository.update(lecture_id, status=ProcessingStatus.PENDING)
+    progress_hub.update(lecture_id, status=ProcessingStatus.PENDING.value)
+    # No audio digest: notes of an edited transcript must not be reused for the original audio
+    await job_queue.enqueue(lecture_id, "notes", {
+        "transcript": lecture.transcript,
+        "title": lecture.title,
+        "audio_digest": None,
+        "use_cache": use_cache,
+    }, user_id=lecture.user_id)
+    return LectureStatus(id=lecture.id, status=ProcessingStatus.PENDING, progress=lecture.progress)
+
+@router.get("/lectures/{lecture_id}/events")
+async def stream_lecture_events(lecture_id: str):
+    """Stream processing status, percent complete and new transcript segments as Server-Sent Events"""
+    lecture = await lecture_repository.get(lecture_id)
+    if lecture is None:
+        raise HTTPException(status_code=404, detail="Lecture not found")
+    if progress_hub.get(lecture_id) is None:
+        progress_hub.update(lecture_id, status=lecture.status.value, percent=lecture.progress)
+
+    async def event_stream():
+        async for snapshot in progress_hub.subscribe(lecture_id):
+            if snapshot is None:
+                yield ": keepalive\n\n"
+            else:
+                yield f"event: progress\ndata: {json.dumps(snapshot)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/lectures", responses={200: {"model": List[LectureSummary]}})
+async def list_lectures(
+    user_id: Optional[str] = None,
+    folder_id: Optional[str] = None,
+    status: Optional[ProcessingStatus] = None,
+    batch_id: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return instead of the summary"),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None
+):
+    """List lecture summaries newest first, one page at a time.
+
+    Transcripts and notes are left out unless requested with ``fields``; fetch them
+    from /lectures/{id}/transcript and /lectures/{id}/notes instead. The cursor for
+    the next page is returned in the X-Next-Cursor header.
+    """
+    selected = [field.strip() for field in fields.split(",") if field.strip()] if fields else SUMMARY_FIELDS
+    # Notes are rendered from their sections, which needs the notes version
+    render = "notes" in selected and "notes_version" not in selected
+    try:
+        page, next_cursor = await lecture_repository.list(
+            user_id=user_id,
+            folder_id=folder_id,
+            status=status.value if status else None,
+            batch_id=batch_id,
+            limit=limit,
+            cursor=cursor,
+            fields=[*selected, "notes_version"] if render else selected,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if "notes" in selected:
+        for item in page:
+            version = item.pop("notes_version") if render else item.get("notes_version")
+            if item["notes"] is None and version:
+                item["notes"] = await _render_notes(item["id"], version)
+
+    model = LectureFields if fields else LectureSummary
+    content = jsonable_encoder([model(**item) for item in page], exclude_unset=bool(fields))
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return JSONResponse(content=content, headers=headers)
+
+def _not_modified(request: Request, etag: str) -> bool:
+    return etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]
+
+async def _large_field_response(lecture_id: str, field: str, media_type: str, request: Request) -> Response:
+    """Serve a large lecture field with an ETag so unchanged content is not resent"""
+    exists, value = await lecture_repository.get_field(lecture_id, field)
+    if not exists:
+        raise HTTPException(status_code=404, detail="Lecture not found")
+    if value is None:
+        raise HTTPException(status_code=404, detail=f"Lecture has no {field} yet")
+
+    etag = f'"{hashlib.sha1(value.encode("utf-8")).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=value, media_type=media_type, headers=headers)
+
+async def _render_notes(lecture_id: str, version: str, section: str = ALL_SECTIONS, fmt: str = "html") -> Optional[str]:
+    """Render stored notes sections through the render cache"""
+    cached = notes_render_cache.get((lecture_id, section, fmt, version))
+    if cached is not None:
+        return cached
+    _, sections = await lecture_repository.get_field(lecture_id, "sections")
+    if sections is None:
+        return None
+    sections = json.loads(sections)
+    value = render_notes(sections, section, fmt)
+    # Keyed by the version actually loaded, in case the notes changed in between
+    notes_render_cache.set((lecture_id, section, fmt, notes_version(sections)), value)
+    return value
+
+async def _notes_response(lecture_id: str, section: str, fmt: str, request: Request) -> Response:
+    exists, version = await lecture_repository.get_field(lecture_id, "notes_version")
+    if not exists:
+        raise HTTPException(status_code=404, detail="Lecture not found")
+    if version is None:
+        if section == ALL_SECTIONS and fmt == "html":
+            # Notes generated before sections were stored
+            return await _large_field_response(lecture_id, "notes", "text/html", request)
+        raise HTTPException(status_code=404, detail="Lecture has no notes sections yet")
+
+    # The version is a content hash, so it identifies the rendering without rendering it
+    etag = f'"{version}-{section}-{fmt}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    content = await _render_notes(lecture_id, version, section, fmt)
+    if content is None:
+        raise HTTPException(status_code=404, detail="Lecture has no notes sections yet")
+    return Response(content=content, media_type=FORMATS[fmt][2], headers=headers)
+
+@router.get("/lectures/{lecture_id}/transcript")
+async def get_lecture_transcript(lecture_id: str, request: Request):
+    """Get the lecture transcript as plain text"""
+    return await _large_field_response(lecture_id, "transcript", "text/plain", request)
+
+@router.get("/lectures/{lecture_id}/notes")
+async def get_lecture_notes(lecture_id: str, request: Request):
+    """Get the generated lecture notes as HTML"""
+    return await _notes_response(lecture_id, ALL_SECTIONS, "html", request)
+
+@router.get("/lectures/{lecture_id}/notes/{section}")
+async def get_lecture_notes_section(lecture_id: str, section: str, request: Request,
+                                    format: str = Query("html", description="html or markdown")):
+    """Render one notes section (or "all") in the requested format"""
+    if section != ALL_SECTIONS and section not in SECTION_KEYS:
+        raise HTTPException(status_code=404, detail=f"Unknown notes section: {section}")
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+    return await _notes_response(lecture_id, section, format, request)
 
 @router.delete("/lectures/{lecture_id}")
 async def delete_lecture(lecture_id: str):
     """Delete a lecture by ID"""
-    if lecture_id not in lectures:
+    lecture = await lecture_repository.get(lecture_id)
+    if lecture is None:
         raise HTTPException(status_code=404, detail="Lecture not found")
     
     try:
-        # Delete the audio file from storage
-        lecture = lectures[lecture_id]
-        await storage_service.delete_file(lecture.audio_url)
+        # Stop any processing that has not finished yet
+        await job_queue.cancel(lecture_id)
+
+        # Delete the audio file from storage unless another lecture shares it
+        if not await lecture_repository.audio_in_use(lecture.audio_url, lecture_id):
+            await storage_service.delete_file(lecture.audio_url)
+            entry = await audio_index.get(lecture.audio_digest) if lecture.audio_digest else None
+            if entry and entry.audio_path == lecture.audio_url:
+                await audio_index.remove(lecture.audio_digest)
+                await audio_preprocessor.remove(lecture.audio_digest)
         
-        # Remove from in-memory storage
-        del lectures[lecture_id]
+        # Remove from the lecture store
+        await lecture_repository.delete(lecture_id)
         
         return {"message": "Lecture deleted successfully"}
     except Exception as e:
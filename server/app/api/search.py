@@ -0,0 +1,29 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from ..models.lecture import LectureSearchResult
+from ..repositories.search import search_repository
+
+router = APIRouter()
+
+@router.get("/search", responses={200: {"model": List[LectureSearchResult]}})
+async def search_lectures(
+    q: str = Query(..., min_length=1, description="Words to find in titles, transcripts and notes"),
+    user_id: Optional[str] = None,
+    folder_id: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0)
+):
+    """Search lectures, best matches first.
+
+    Every word must match; the last one also matches as a prefix. The offset
+    of the next page is returned in the X-Next-Offset header.
+    """
+    results, more = await search_repository.search(q, user_id=user_id, folder_id=folder_id,
+                                                    limit=limit, offset=offset)
+    content = jsonable_encoder([LectureSearchResult(**result) for result in results])
+    headers = {"X-Next-Offset": str(offset + limit)} if more else None
+    return JSONResponse(content=content, headers=headers)
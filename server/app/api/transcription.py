@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+
+from ..repositories.transcription_runs import transcription_run_repository
+
+router = APIRouter()
+
+@router.get("/transcription/policies")
+async def get_policy_stats():
+    """Real-time factor of past transcriptions per policy, for tuning policy selection"""
+    return await transcription_run_repository.stats()
@@ -1,16 +1,58 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import JSONResponse, PlainTextResponse
 import uvicorn
-from .api.lectures import router as lectures_router
-from .api import folders
+from .api.lectures import router as lectures_router, sync_job_updates
+from .api import audio, batches, folders, jobs, search, transcription
+from .repositories.database import database
+from .services.audio_index import audio_index
+from .services.job_queue import job_queue
+from .services.llm_cache import section_cache
+from .services.llm_router import llm_router
+from .services.metrics import QUEUE_DEPTH, registry
+from .services.retention import retention_manager
+from .services.transcription import transcription_service
+from .worker import STAGES, Worker
+import asyncio
 import os
 
+# Lectures are processed by dedicated `python -m app.worker` processes, so API processes
+# load no models. Set JOB_EMBEDDED_WORKERS=1 to run a worker inside a single-process API instead.
+EMBEDDED_WORKERS = int(os.getenv("JOB_EMBEDDED_WORKERS", "0"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create shared clients and background tasks on startup and close them on shutdown"""
+    await llm_router.start()
+    await database.connection()
+    workers = [Worker(list(STAGES)) for _ in range(EMBEDDED_WORKERS)]
+    tasks = [asyncio.create_task(sync_job_updates())]
+    if workers:
+        # Warm the Whisper pool in the background so /ready can report progress meanwhile
+        tasks.append(asyncio.create_task(transcription_service.ensure_model_loaded()))
+    tasks += [asyncio.create_task(worker.run()) for worker in workers]
+    if retention_manager.enabled:
+        tasks.append(asyncio.create_task(retention_manager.run_forever()))
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await llm_router.close()
+        section_cache.close()
+        audio_index.close()
+        job_queue.close()
+        await database.close()
+
+
 app = FastAPI(
     title="LectureMate AI API",
     description="Backend API for LectureMate AI - Lecture transcription and notes generation",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware configuration
@@ -20,21 +62,41 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Next-Offset", "Content-Range", "Accept-Ranges", "ETag", "Retry-After"],
 )
 
 # Include routers
 app.include_router(lectures_router, prefix="/api", tags=["lectures"])
+app.include_router(batches.router, prefix="/api", tags=["batches"])
+app.include_router(audio.router, prefix="/api", tags=["audio"])
+app.include_router(audio.files_router, tags=["audio"])
 app.include_router(folders.router, prefix="/api")
-
-# Create uploads directory if it doesn't exist
-os.makedirs("local_uploads", exist_ok=True)
-
-# Mount static file handler for uploads
-app.mount("/files", StaticFiles(directory="local_uploads"), name="files")
+app.include_router(jobs.router, prefix="/api", tags=["jobs"])
+app.include_router(transcription.router, prefix="/api", tags=["transcription"])
+app.include_router(search.router, prefix="/api", tags=["search"])
 
 @app.get("/")
 async def root():
     return {"message": "Welcome to LectureMate AI API"}
 
+@app.get("/ready")
+async def ready():
+    """Readiness probe: 503 until the Whisper models used by embedded workers are loaded"""
+    models_ready = EMBEDDED_WORKERS == 0 or transcription_service.ready
+    body = {
+        "ready": models_ready,
+        "models": transcription_service.status() if EMBEDDED_WORKERS else {},
+        "llm_backends": llm_router.status(),
+    }
+    return JSONResponse(status_code=200 if models_ready else 503, content=body)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics of this process, plus the current job queue depth"""
+    for stage, entry in (await job_queue.stats()).items():
+        for status, count in entry["depth"].items():
+            QUEUE_DEPTH.set(count, stage=stage, status=status)
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
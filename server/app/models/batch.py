@@ -0,0 +1,35 @@
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+from datetime import datetime
+
+from .lecture import QualityTier
+
+class BatchImport(BaseModel):
+    """Import every audio file of a directory on the server"""
+    directory: str
+    folder_id: str
+    user_id: Optional[str] = None
+    quality: QualityTier = QualityTier.STANDARD
+    recursive: bool = False
+    use_cache: bool = True  # False generates notes again even for audio processed before
+
+class BatchRejection(BaseModel):
+    filename: str
+    error: str
+
+class BatchStatus(BaseModel):
+    id: str
+    source: str  # "upload" or "directory"
+    user_id: str
+    folder_id: str
+    created_at: datetime
+    total: int = 0
+    counts: Dict[str, int] = {}  # lectures per processing status
+    finished: int = 0  # completed or failed
+    progress: float = 0  # percent of audio transcribed, finished lectures count as done
+    audio_seconds: float = 0  # audio of completed lectures
+    elapsed_seconds: float = 0
+    lectures_per_hour: float = 0
+    audio_speedup: float = 0  # seconds of audio completed per second of wall time
+    eta_seconds: Optional[float] = None
+    rejected: List[BatchRejection] = []  # files skipped when the batch was created
@@ -10,23 +10,86 @@ class ProcessingStatus(str, Enum):
     COMPLETED = "completed"
     FAILED = "failed"
 
+class QualityTier(str, Enum):
+    DRAFT = "draft"
+    STANDARD = "standard"
+    HIGH = "high"
+
 class Lecture(BaseModel):
     id: str
     title: str
     description: Optional[str] = None
     audio_url: str
+    audio_digest: Optional[str] = None  # SHA-256 of the uploaded audio
     transcript: Optional[str] = None
     notes: Optional[str] = None
+    notes_version: Optional[str] = None  # hash of the stored notes sections
     status: ProcessingStatus = ProcessingStatus.PENDING
+    progress: float = 0  # percent of audio transcribed
+    quality: QualityTier = QualityTier.STANDARD
+    transcription_policy: Optional[str] = None  # policy that produced the transcript
+    transcribed_at: Optional[datetime] = None  # when the full transcript was stored; None while partial
+    batch_id: Optional[str] = None  # batch the lecture was imported with
+    timings: Optional[dict] = None  # seconds spent per stage, returned with ?timings=true
+    queue_position: Optional[int] = None  # jobs ahead while the lecture waits to be processed
+    estimated_start: Optional[datetime] = None  # when processing is expected to start
     created_at: datetime = Field(default_factory=datetime.now)
     updated_at: datetime = Field(default_factory=datetime.now)
-    duration: int = 0  # in seconds
+    duration: float = 0  # in seconds
     user_id: str
     folder_id: str  # Reference to the folder
 
     class Config:
         from_attributes = True
 
+class LectureSummary(BaseModel):
+    """Lecture without its large transcript and notes fields, for list views"""
+    id: str
+    title: str
+    description: Optional[str] = None
+    audio_url: str
+    status: ProcessingStatus
+    progress: float = 0
+    quality: QualityTier = QualityTier.STANDARD
+    created_at: datetime
+    updated_at: datetime
+    duration: float = 0
+    user_id: str
+    folder_id: str
+    has_transcript: bool = False
+    has_notes: bool = False
+
+class LectureFields(BaseModel):
+    """Arbitrary projection of a lecture selected with ``fields=``"""
+    id: Optional[str] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    audio_url: Optional[str] = None
+    audio_digest: Optional[str] = None
+    transcript: Optional[str] = None
+    notes: Optional[str] = None
+    notes_version: Optional[str] = None  # hash of the stored notes sections
+    status: Optional[ProcessingStatus] = None
+    progress: Optional[float] = None
+    quality: Optional[QualityTier] = None
+    transcription_policy: Optional[str] = None
+    batch_id: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    duration: Optional[float] = None
+    user_id: Optional[str] = None
+    folder_id: Optional[str] = None
+    has_transcript: Optional[bool] = None
+    has_notes: Optional[bool] = None
+
+class LectureStatus(BaseModel):
+    """Lightweight processing state for polling clients"""
+    id: str
+    status: ProcessingStatus
+    progress: float = 0
+    queue_position: Optional[int] = None
+    estimated_start: Optional[datetime] = None
+
 class LectureCreate(BaseModel):
     title: str
     description: Optional[str] = None
@@ -35,4 +98,18 @@ class LectureCreate(BaseModel):
 class LectureUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
-    folder_id: Optional[str] = None  # Allow moving lectures between folders 
\ No newline at end of file
+    folder_id: Optional[str] = None  # Allow moving lectures between folders 
+
+
+class TranscriptUpdate(BaseModel):
+    transcript: str
+
+class LectureSearchResult(BaseModel):
+    id: str
+    title: str
+    folder_id: str
+    user_id: str
+    status: ProcessingStatus
+    created_at: datetime
+    snippet: str  # HTML-escaped excerpt with matches wrapped in <mark>
+    score: float  # higher is more relevant
@@ -0,0 +1,81 @@
+from datetime import datetime
+from typing import Optional
+
+from ..models.batch import BatchStatus
+from .database import Database, database
+
+FINISHED = ("completed", "failed")
+
+
+class BatchRepository:
+    """Lectures imported together, with aggregate progress computed from their rows"""
+
+    def __init__(self, db: Database = database):
+        self.db = db
+
+    async def create(self, batch_id: str, source: str, user_id: str, folder_id: str) -> None:
+        conn = await self.db.connection()
+        await conn.execute(
+            "INSERT INTO batches (id, source, user_id, folder_id, created_at) VALUES (?, ?, ?, ?, ?)",
+            (batch_id, source, user_id, folder_id, datetime.now().isoformat()),
+        )
+        await conn.commit()
+
+    async def status(self, batch_id: str) -> Optional[BatchStatus]:
+        """Lecture counts per status, overall progress and throughput since the batch was created"""
+        conn = await self.db.connection()
+        async with conn.execute(
+            "SELECT id, source, user_id, folder_id, created_at FROM batches WHERE id = ?", (batch_id,)
+        ) as cursor:
+            row = await cursor.fetchone()
+        if row is None:
+            return None
+        batch = BatchStatus(id=row[0], source=row[1], user_id=row[2], folder_id=row[3],
+                            created_at=datetime.fromisoformat(row[4]))
+
+        async with conn.execute(
+            """SELECT status, COUNT(*), SUM(progress), SUM(duration), MAX(updated_at)
+               FROM lectures WHERE batch_id = ? GROUP BY status""",
+            (batch_id,),
+        ) as cursor:
+            rows = await cursor.fetchall()
+
+        progress = 0.0
+        last_finished = None
+        for status, count, progress_sum, duration_sum, updated_at in rows:
+            batch.counts[status] = count
+            batch.total += count
+            if status in FINISHED:
+                batch.finished += count
+                progress += 100 * count
+                last_finished = max(last_finished or updated_at, updated_at)
+            else:
+                progress += progress_sum
+            if status == "completed":
+                batch.audio_seconds = duration_sum
+        if not batch.total:
+            return batch
+
+        batch.progress = progress / batch.total
+        # A finished batch stops its clock at the last lecture that finished
+        end = datetime.fromisoformat(last_finished) if batch.finished == batch.total else datetime.now()
+        batch.elapsed_seconds = max((end - batch.created_at).total_seconds(), 1e-6)
+        rate = batch.finished / batch.elapsed_seconds
+        batch.lectures_per_hour = rate * 3600
+        batch.audio_speedup = batch.audio_seconds / batch.elapsed_seconds
+        if batch.finished < batch.total and rate > 0:
+            batch.eta_seconds = (batch.total - batch.finished) / rate
+        return batch
+
+    async def delete(self, batch_id: str) -> None:
+        """Remove a batch together with its lectures"""
+        conn = await self.db.connection()
+        await conn.execute(
+            "DELETE FROM note_chunks WHERE lecture_id IN (SELECT id FROM lectures WHERE batch_id = ?)", (batch_id,)
+        )
+        await conn.execute("DELETE FROM lectures WHERE batch_id = ?", (batch_id,))
+        await conn.execute("DELETE FROM batches WHERE id = ?", (batch_id,))
+        await conn.commit()
+
+
+batch_repository = BatchRepository()
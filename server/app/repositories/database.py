@@ -0,0 +1,190 @@
+import os
+import asyncio
+from typing import Optional
+
+import aiosqlite
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS folders (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS lectures (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    description TEXT,
+    audio_url TEXT NOT NULL,
+    audio_digest TEXT,
+    transcript TEXT,
+    notes TEXT,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    duration REAL NOT NULL DEFAULT 0,
+    user_id TEXT NOT NULL,
+    folder_id TEXT NOT NULL,
+    quality TEXT NOT NULL DEFAULT 'standard',
+    transcription_policy TEXT,
+    sections TEXT,
+    notes_version TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_lectures_created ON lectures(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_lectures_user ON lectures(user_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_lectures_folder ON lectures(folder_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_lectures_status ON lectures(status, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_lectures_audio ON lectures(audio_url);
+
+CREATE TABLE IF NOT EXISTS transcription_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    lecture_id TEXT NOT NULL,
+    policy TEXT NOT NULL,
+    audio_seconds REAL NOT NULL,
+    elapsed_seconds REAL NOT NULL,
+    backlog INTEGER NOT NULL,
+    created_at TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_transcription_runs_policy ON transcription_runs(policy);
+
+CREATE TABLE IF NOT EXISTS note_chunks (
+    lecture_id TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    outputs TEXT NOT NULL,
+    PRIMARY KEY (lecture_id, hash)
+);
+
+CREATE TABLE IF NOT EXISTS batches (
+    id TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    folder_id TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+"""
+
+# Full-text index over titles, transcripts and notes. FTS rows are addressed by a
+# stable integer docid per lecture, and kept current by triggers so that every
+# writer (API or worker process) updates the index in the same transaction.
+# Partial transcripts written while transcription runs are not indexed.
+_SEARCH_NOTES = "COALESCE((SELECT group_concat(value, ' ') FROM json_each(NEW.sections) WHERE key != 'title'), NEW.notes)"
+_SEARCH_DOCID = "(SELECT docid FROM lecture_search_docs WHERE lecture_id = NEW.id)"
+
+SEARCH_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS lecture_search_docs (
+    docid INTEGER PRIMARY KEY,
+    lecture_id TEXT NOT NULL UNIQUE
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS lecture_search USING fts5(
+    title, transcript, notes, tokenize = 'porter unicode61'
+);
+
+CREATE TRIGGER IF NOT EXISTS lectures_search_insert AFTER INSERT ON lectures BEGIN
+    INSERT INTO lecture_search_docs (lecture_id) VALUES (NEW.id);
+    INSERT INTO lecture_search (rowid, title, transcript, notes)
+    VALUES ({_SEARCH_DOCID}, NEW.title, NEW.transcript, {_SEARCH_NOTES});
+END;
+
+CREATE TRIGGER IF NOT EXISTS lectures_search_update AFTER UPDATE OF title, transcript, notes, sections, status ON lectures
+WHEN NEW.status != 'transcribing' AND (
+    OLD.status = 'transcribing' OR OLD.title IS NOT NEW.title OR OLD.transcript IS NOT NEW.transcript
+    OR OLD.sections IS NOT NEW.sections OR OLD.notes IS NOT NEW.notes
+) BEGIN
+    DELETE FROM lecture_search WHERE rowid = {_SEARCH_DOCID};
+    INSERT INTO lecture_search (rowid, title, transcript, notes)
+    VALUES ({_SEARCH_DOCID}, NEW.title, NEW.transcript, {_SEARCH_NOTES});
+END;
+
+CREATE TRIGGER IF NOT EXISTS lectures_search_delete AFTER DELETE ON lectures BEGIN
+    DELETE FROM lecture_search WHERE rowid = (SELECT docid FROM lecture_search_docs WHERE lecture_id = OLD.id);
+    DELETE FROM lecture_search_docs WHERE lecture_id = OLD.id;
+END;
+"""
+
+# Index lectures stored before the search index existed
+SEARCH_BACKFILL = f"""
+INSERT INTO lecture_search_docs (lecture_id)
+SELECT id FROM lectures WHERE id NOT IN (SELECT lecture_id FROM lecture_search_docs);
+
+INSERT INTO lecture_search (rowid, title, transcript, notes)
+SELECT d.docid, NEW.title, NEW.transcript, {_SEARCH_NOTES}
+FROM lecture_search_docs d JOIN lectures NEW ON NEW.id = d.lecture_id
+WHERE d.docid NOT IN (SELECT rowid FROM lecture_search);
+"""
+
+# Columns added after the first release: (table, column, definition)
+MIGRATIONS = [
+    ("lectures", "quality", "TEXT NOT NULL DEFAULT 'standard'"),
+    ("lectures", "transcription_policy", "TEXT"),
+    ("lectures", "sections", "TEXT"),
+    ("lectures", "notes_version", "TEXT"),
+    ("lectures", "batch_id", "TEXT"),
+    ("lectures", "timings", "TEXT"),
+    ("lectures", "transcribed_at", "TEXT"),
+]
+
+# Run once, when the column is added: (table, column) -> statement
+BACKFILLS = {
+    # Completed lectures can only hold a full transcript
+    ("lectures", "transcribed_at"): "UPDATE lectures SET transcribed_at = updated_at WHERE status = 'completed'",
+}
+
+# Indexes on migrated columns, created once the columns exist
+MIGRATED_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_lectures_batch ON lectures(batch_id, created_at, id);
+"""
+
+
+class Database:
+    """Shared aiosqlite connection, safe to use from several processes thanks to WAL"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[aiosqlite.Connection] = None
+        self._connecting = asyncio.Lock()
+
+    async def connection(self) -> aiosqlite.Connection:
+        """Open the connection and create the schema on first use"""
+        if self._conn is None:
+            async with self._connecting:
+                if self._conn is None:
+                    os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                    conn = await aiosqlite.connect(self.path, timeout=30)
+                    await conn.execute("PRAGMA journal_mode=WAL")
+                    await conn.execute("PRAGMA synchronous=NORMAL")
+                    await conn.executescript(SCHEMA)
+                    await self._migrate(conn)
+                    await conn.executescript(MIGRATED_INDEXES)
+                    await conn.executescript(SEARCH_SCHEMA)
+                    await conn.executescript(SEARCH_BACKFILL)
+                    await conn.commit()
+                    self._conn = conn
+        return self._conn
+
+    @staticmethod
+    async def _migrate(conn: aiosqlite.Connection) -> None:
+        """Add columns missing from databases created by older versions"""
+        for table, column, definition in MIGRATIONS:
+            async with conn.execute(f"PRAGMA table_info({table})") as cursor:
+                existing = {row[1] for row in await cursor.fetchall()}
+            if column not in existing:
+                await conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+                if (table, column) in BACKFILLS:
+                    await conn.execute(BACKFILLS[(table, column)])
+
+    async def close(self) -> None:
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+
+database = Database(os.getenv("DATABASE_PATH", "local_cache/lecturemate.db"))
@@ -0,0 +1,63 @@
+from datetime import datetime
+from typing import List, Optional
+
+from ..models.folder import Folder
+from .database import Database, database
+
+_SELECT = """SELECT f.id, f.name, f.description, f.created_at, f.updated_at,
+                    (SELECT COUNT(*) FROM lectures l WHERE l.folder_id = f.id) AS lecture_count
+             FROM folders f"""
+
+
+def _to_folder(row) -> Folder:
+    return Folder(
+        id=row[0],
+        name=row[1],
+        description=row[2],
+        created_at=datetime.fromisoformat(row[3]),
+        updated_at=datetime.fromisoformat(row[4]),
+        lecture_count=row[5],
+    )
+
+
+class FolderRepository:
+    def __init__(self, db: Database = database):
+        self.db = db
+
+    async def create(self, folder: Folder) -> Folder:
+        conn = await self.db.connection()
+        await conn.execute(
+            "INSERT INTO folders (id, name, description, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (folder.id, folder.name, folder.description, folder.created_at.isoformat(), folder.updated_at.isoformat()),
+        )
+        await conn.commit()
+        return folder
+
+    async def get(self, folder_id: str) -> Optional[Folder]:
+        conn = await self.db.connection()
+        async with conn.execute(f"{_SELECT} WHERE f.id = ?", (folder_id,)) as cursor:
+            row = await cursor.fetchone()
+        return _to_folder(row) if row else None
+
+    async def list(self) -> List[Folder]:
+        conn = await self.db.connection()
+        async with conn.execute(f"{_SELECT} ORDER BY f.created_at, f.id") as cursor:
+            return [_to_folder(row) for row in await cursor.fetchall()]
+
+    async def update(self, folder_id: str, **fields) -> Optional[Folder]:
+        """Update the given columns and bump updated_at"""
+        fields["updated_at"] = datetime.now().isoformat()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        conn = await self.db.connection()
+        await conn.execute(f"UPDATE folders SET {assignments} WHERE id = ?", (*fields.values(), folder_id))
+        await conn.commit()
+        return await self.get(folder_id)
+
+    async def delete(self, folder_id: str) -> bool:
+        conn = await self.db.connection()
+        cursor = await conn.execute("DELETE FROM folders WHERE id = ?", (folder_id,))
+        await conn.commit()
+        return cursor.rowcount > 0
+
+
+folder_repository = FolderRepository()
@@ -0,0 +1,197 @@
+import json
+import base64
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+
+from ..models.lecture import Lecture
+from .database import Database, database
+
+COLUMNS = (
+    "id", "title", "description", "audio_url", "audio_digest", "transcript", "notes",
+    "status", "progress", "created_at", "updated_at", "duration", "user_id", "folder_id",
+    "quality", "transcription_policy", "notes_version", "batch_id", "transcribed_at",
+)
+
+# Derived columns that let list views tell whether the large fields exist without loading them
+COMPUTED = {
+    "has_transcript": "transcript IS NOT NULL",
+    "has_notes": "(notes IS NOT NULL OR notes_version IS NOT NULL)",
+}
+
+SUMMARY_FIELDS = (
+    "id", "title", "description", "audio_url", "status", "progress", "created_at",
+    "updated_at", "duration", "user_id", "folder_id", "quality", "has_transcript", "has_notes",
+)
+
+SELECTABLE_FIELDS = COLUMNS + tuple(COMPUTED)
+
+# Notes generated before sections were stored only exist as rendered HTML in notes;
+# timings is the JSON processing time breakdown, only loaded on request
+LARGE_FIELDS = ("transcript", "notes", "sections", "timings")
+
+
+def _to_row(lecture: Lecture) -> tuple:
+    data = lecture.model_dump()
+    data["status"] = lecture.status.value
+    data["quality"] = lecture.quality.value
+    data["created_at"] = lecture.created_at.isoformat()
+    data["updated_at"] = lecture.updated_at.isoformat()
+    data["transcribed_at"] = lecture.transcribed_at.isoformat() if lecture.transcribed_at else None
+    return tuple(data[column] for column in COLUMNS)
+
+
+def _to_lecture(row) -> Lecture:
+    return Lecture(**dict(zip(COLUMNS, row)))
+
+
+def encode_cursor(created_at: str, lecture_id: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([created_at, lecture_id]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        created_at, lecture_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return created_at, lecture_id
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+class LectureRepository:
+    def __init__(self, db: Database = database):
+        self.db = db
+
+    async def create(self, lecture: Lecture) -> Lecture:
+        conn = await self.db.connection()
+        await conn.execute(
+            f"INSERT INTO lectures ({', '.join(COLUMNS)}) VALUES ({', '.join('?' for _ in COLUMNS)})",
+            _to_row(lecture),
+        )
+        await conn.commit()
+        return lecture
+
+    async def create_many(self, lectures: List[Lecture]) -> None:
+        """Insert lectures in a single transaction"""
+        conn = await self.db.connection()
+        await conn.executemany(
+            f"INSERT INTO lectures ({', '.join(COLUMNS)}) VALUES ({', '.join('?' for _ in COLUMNS)})",
+            [_to_row(lecture) for lecture in lectures],
+        )
+        await conn.commit()
+
+    async def get(self, lecture_id: str) -> Optional[Lecture]:
+        conn = await self.db.connection()
+        async with conn.execute(f"SELECT {', '.join(COLUMNS)} FROM lectures WHERE id = ?", (lecture_id,)) as cursor:
+            row = await cursor.fetchone()
+        return _to_lecture(row) if row else None
+
+    async def update(self, lecture_id: str, **fields) -> None:
+        """Update the given columns and bump updated_at"""
+        for name in ("status", "quality"):
+            if name in fields and hasattr(fields[name], "value"):
+                fields[name] = fields[name].value
+        fields["updated_at"] = datetime.now().isoformat()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        conn = await self.db.connection()
+        await conn.execute(f"UPDATE lectures SET {assignments} WHERE id = ?", (*fields.values(), lecture_id))
+        await conn.commit()
+
+    async def set_timings(self, lecture_id: str, stage: str, timings: dict) -> None:
+        """Record the time breakdown of one processing stage, keeping those of the other stages"""
+        conn = await self.db.connection()
+        await conn.execute(
+            "UPDATE lectures SET timings = json_set(COALESCE(timings, '{}'), ?, json(?)) WHERE id = ?",
+            (f"$.{stage}", json.dumps(timings), lecture_id),
+        )
+        await conn.commit()
+
+    async def delete(self, lecture_id: str) -> bool:
+        conn = await self.db.connection()
+        cursor = await conn.execute("DELETE FROM lectures WHERE id = ?", (lecture_id,))
+        await conn.execute("DELETE FROM note_chunks WHERE lecture_id = ?", (lecture_id,))
+        await conn.commit()
+        return cursor.rowcount > 0
+
+    async def replace_audio(self, old_url: str, new_url: str) -> None:
+        """Point every lecture using one stored file at another"""
+        conn = await self.db.connection()
+        await conn.execute("UPDATE lectures SET audio_url = ? WHERE audio_url = ?", (new_url, old_url))
+        await conn.commit()
+
+    async def processing_audio(self, audio_digest: str) -> bool:
+        """Whether a lecture of this audio is still waiting for or in processing"""
+        conn = await self.db.connection()
+        async with conn.execute(
+            "SELECT 1 FROM lectures WHERE audio_digest = ? AND status NOT IN ('completed', 'failed') LIMIT 1",
+            (audio_digest,),
+        ) as cursor:
+            return await cursor.fetchone() is not None
+
+    async def audio_in_use(self, audio_url: str, exclude_id: str) -> bool:
+        """Whether any other lecture references the same stored audio"""
+        conn = await self.db.connection()
+        async with conn.execute(
+            "SELECT 1 FROM lectures WHERE audio_url = ? AND id != ? LIMIT 1", (audio_url, exclude_id)
+        ) as cursor:
+            return await cursor.fetchone() is not None
+
+    async def get_field(self, lecture_id: str, field: str) -> Tuple[bool, Optional[str]]:
+        """Load a single column, typically a large one; returns (lecture exists, value)"""
+        if field not in COLUMNS and field not in LARGE_FIELDS:
+            raise ValueError(f"Unknown field: {field}")
+        conn = await self.db.connection()
+        async with conn.execute(f"SELECT {field} FROM lectures WHERE id = ?", (lecture_id,)) as cursor:
+            row = await cursor.fetchone()
+        return (True, row[0]) if row else (False, None)
+
+    async def list(self, user_id: Optional[str] = None, folder_id: Optional[str] = None,
+                   status: Optional[str] = None, limit: int = 50, cursor: Optional[str] = None,
+                   batch_id: Optional[str] = None,
+                   fields: Sequence[str] = SUMMARY_FIELDS) -> Tuple[List[dict], Optional[str]]:
+        """Newest-first page of lecture projections and the cursor for the next page (None on the last page).
+
+        Only the requested fields are read, so list views never load transcripts or notes
+        unless asked to.
+        """
+        unknown = [field for field in fields if field not in SELECTABLE_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+        clauses, params = [], []
+        for column, value in (("user_id", user_id), ("folder_id", folder_id), ("status", status),
+                              ("batch_id", batch_id)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if cursor:
+            created_at, lecture_id = decode_cursor(cursor)
+            clauses.append("(created_at < ? OR (created_at = ? AND id < ?))")
+            params.extend([created_at, created_at, lecture_id])
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        # id and created_at are always read to build the cursor
+        selected = ["id", "created_at"] + [field for field in fields if field not in ("id", "created_at")]
+        expressions = [f"{COMPUTED.get(field, field)} AS {field}" for field in selected]
+
+        conn = await self.db.connection()
+        async with conn.execute(
+            f"""SELECT {', '.join(expressions)} FROM lectures {where}
+                ORDER BY created_at DESC, id DESC LIMIT ?""",
+            (*params, limit + 1),
+        ) as result:
+            rows = await result.fetchall()
+
+        items = []
+        for row in rows[:limit]:
+            values = dict(zip(selected, row))
+            for field in COMPUTED:
+                if field in values:
+                    values[field] = bool(values[field])
+            items.append({field: values[field] for field in fields})
+
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = encode_cursor(last[1], last[0])
+        return items, next_cursor
+
+lecture_repository = LectureRepository()
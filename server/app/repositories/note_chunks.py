@@ -0,0 +1,39 @@
+import json
+from typing import Dict
+
+from .database import Database, database
+
+
+class NoteChunkRepository:
+    """Map-phase outputs of each transcript chunk, keyed by the chunk's content hash"""
+
+    def __init__(self, db: Database = database):
+        self.db = db
+
+    async def get(self, lecture_id: str) -> Dict[str, dict]:
+        conn = await self.db.connection()
+        async with conn.execute("SELECT hash, outputs FROM note_chunks WHERE lecture_id = ?", (lecture_id,)) as cursor:
+            rows = await cursor.fetchall()
+        return {chunk_hash: json.loads(outputs) for chunk_hash, outputs in rows}
+
+    async def add(self, lecture_id: str, chunk_hash: str, outputs: dict) -> None:
+        """Store the outputs of one chunk, such as one mapped before the notes stage ran"""
+        conn = await self.db.connection()
+        await conn.execute(
+            "INSERT OR REPLACE INTO note_chunks (lecture_id, hash, outputs) VALUES (?, ?, ?)",
+            (lecture_id, chunk_hash, json.dumps(outputs)),
+        )
+        await conn.commit()
+
+    async def replace(self, lecture_id: str, chunks: Dict[str, dict]) -> None:
+        """Keep exactly the given chunks for the lecture"""
+        conn = await self.db.connection()
+        await conn.execute("DELETE FROM note_chunks WHERE lecture_id = ?", (lecture_id,))
+        await conn.executemany(
+            "INSERT INTO note_chunks (lecture_id, hash, outputs) VALUES (?, ?, ?)",
+            [(lecture_id, chunk_hash, json.dumps(outputs)) for chunk_hash, outputs in chunks.items()],
+        )
+        await conn.commit()
+
+
+note_chunk_repository = NoteChunkRepository()
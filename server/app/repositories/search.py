@@ -0,0 +1,81 @@
+import re
+from html import escape
+from typing import List, Optional, Tuple
+
+from .database import Database, database
+
+# Match markers unlikely to occur in text, replaced by <mark> after escaping
+_OPEN, _CLOSE = "\x02", "\x03"
+TERM = re.compile(r"\w+", re.UNICODE)
+
+# bm25 weights for the title, transcript and notes columns
+RANK = "bm25(lecture_search, 10.0, 1.0, 3.0)"
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """Turn free text into an FTS5 query: every term must match, the last one as a prefix.
+
+    Terms are quoted, so user input can never be parsed as FTS5 syntax.
+    """
+    terms = TERM.findall(query)
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def _snippet_html(snippet: str) -> str:
+    return escape(snippet).replace(_OPEN, "<mark>").replace(_CLOSE, "</mark>")
+
+
+class SearchRepository:
+    """Ranked full-text search over lecture titles, transcripts and notes"""
+
+    def __init__(self, db: Database = database):
+        self.db = db
+
+    async def search(self, query: str, user_id: Optional[str] = None, folder_id: Optional[str] = None,
+                     limit: int = 20, offset: int = 0) -> Tuple[List[dict], bool]:
+        """Best matches first, with a highlighted snippet; also returns whether more results exist"""
+        match = build_match_query(query)
+        if match is None:
+            return [], False
+
+        clauses, params = ["lecture_search MATCH ?"], [match]
+        for column, value in (("l.user_id", user_id), ("l.folder_id", folder_id)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+
+        conn = await self.db.connection()
+        async with conn.execute(
+            f"""SELECT l.id, l.title, l.folder_id, l.user_id, l.status, l.created_at,
+                       snippet(lecture_search, -1, '{_OPEN}', '{_CLOSE}', '…', 24), {RANK} AS rank
+                FROM lecture_search
+                JOIN lecture_search_docs d ON d.docid = lecture_search.rowid
+                JOIN lectures l ON l.id = d.lecture_id
+                WHERE {' AND '.join(clauses)}
+                ORDER BY rank
+                LIMIT ? OFFSET ?""",
+            (*params, limit + 1, offset),
+        ) as cursor:
+            rows = await cursor.fetchall()
+
+        results = [
+            {
+                "id": lecture_id,
+                "title": title,
+                "folder_id": folder,
+                "user_id": user,
+                "status": status,
+                "created_at": created_at,
+                "snippet": _snippet_html(snippet or ""),
+                "score": -rank,
+            }
+            for lecture_id, title, folder, user, status, created_at, snippet, rank in rows[:limit]
+        ]
+        return results, len(rows) > limit
+
+
+search_repository = SearchRepository()
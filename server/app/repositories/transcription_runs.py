@@ -0,0 +1,44 @@
+from datetime import datetime
+from typing import Dict
+
+from .database import Database, database
+
+
+class TranscriptionRunRepository:
+    """Real-time factor of every transcription, grouped by the policy that produced it"""
+
+    def __init__(self, db: Database = database):
+        self.db = db
+
+    async def record(self, lecture_id: str, policy: str, audio_seconds: float,
+                     elapsed_seconds: float, backlog: int) -> None:
+        conn = await self.db.connection()
+        await conn.execute(
+            """INSERT INTO transcription_runs (lecture_id, policy, audio_seconds, elapsed_seconds, backlog, created_at)
+               VALUES (?, ?, ?, ?, ?, ?)""",
+            (lecture_id, policy, audio_seconds, elapsed_seconds, backlog, datetime.now().isoformat()),
+        )
+        await conn.commit()
+
+    async def stats(self) -> Dict[str, dict]:
+        """Run count, audio hours and real-time factor (elapsed / audio seconds) per policy"""
+        conn = await self.db.connection()
+        async with conn.execute(
+            """SELECT policy, COUNT(*), SUM(audio_seconds), SUM(elapsed_seconds),
+                      MIN(elapsed_seconds / audio_seconds), MAX(elapsed_seconds / audio_seconds)
+               FROM transcription_runs WHERE audio_seconds > 0 GROUP BY policy"""
+        ) as cursor:
+            rows = await cursor.fetchall()
+        return {
+            policy: {
+                "runs": runs,
+                "audio_hours": audio / 3600,
+                "rtf": elapsed / audio,
+                "rtf_min": rtf_min,
+                "rtf_max": rtf_max,
+            }
+            for policy, runs, audio, elapsed, rtf_min, rtf_max in rows
+        }
+
+
+transcription_run_repository = TranscriptionRunRepository()
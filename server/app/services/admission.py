@@ -0,0 +1,132 @@
+import os
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from .job_queue import BULK, INTERACTIVE, JobQueue, job_queue
+from .metrics import ADMISSIONS
+
+load_dotenv()
+
+CLASS_NAMES = {INTERACTIVE: "interactive", BULK: "bulk"}
+
+
+class AdmissionError(Exception):
+    """Raised when a lecture cannot be accepted for processing now"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+    def headers(self) -> Dict[str, str]:
+        return {"Retry-After": str(math.ceil(self.retry_after))} if self.retry_after is not None else {}
+
+
+@dataclass
+class TokenBucket:
+    capacity: float
+    rate: float  # tokens per second
+    tokens: float = field(default=None)
+    updated: float = field(default_factory=time.monotonic)
+
+    def __post_init__(self):
+        if self.tokens is None:
+            self.tokens = self.capacity
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, count: float) -> Optional[float]:
+        """Take count tokens; when there are not enough, take none and return the seconds to wait"""
+        self._refill(time.monotonic())
+        if self.tokens >= count:
+            self.tokens -= count
+            return None
+        return (count - self.tokens) / self.rate if self.rate > 0 else None
+
+    def give(self, count: float) -> None:
+        self._refill(time.monotonic())
+        self.tokens = min(self.capacity, self.tokens + count)
+
+
+class AdmissionController:
+    """Decides whether lectures may be queued for processing.
+
+    Each user has a token bucket per priority class: every lecture takes a token,
+    up to burst lectures can be queued at once and tokens come back at per_hour.
+    A class with a burst of 0 is not limited. Independently, nothing is accepted
+    while max_queued transcriptions are already waiting or running, so that overload turns
+    into a 429 with Retry-After rather than an ever-growing queue.
+
+    Buckets live in the memory of each API process. Once admitted, users share
+    the workers by the job queue's weighted fair queuing.
+    """
+
+    def __init__(self, quotas: Dict[int, Tuple[float, float]], max_queued: int = 0,
+                 queue: JobQueue = job_queue):
+        self.quotas = quotas  # priority class -> (burst, per hour)
+        self.max_queued = max_queued
+        self.queue = queue
+        self._buckets: Dict[Tuple[str, int], TokenBucket] = {}
+
+    def _bucket(self, user_id: str, priority: int) -> Optional[TokenBucket]:
+        burst, per_hour = self.quotas.get(priority, (0, 0))
+        if burst <= 0:
+            return None
+        key = (user_id, priority)
+        if key not in self._buckets:
+            self._buckets[key] = TokenBucket(capacity=burst, rate=per_hour / 3600)
+        return self._buckets[key]
+
+    async def _backlog_wait(self, count: int) -> Optional[float]:
+        """Seconds until the transcription backlog has room for count more, or None if it has room now"""
+        if not self.max_queued:
+            return None
+        # An indexed count on every upload; the throughput is only looked up when rejecting
+        excess = await self.queue.depth("transcribe") + count - self.max_queued
+        if excess <= 0:
+            return None
+        per_minute = await self.queue.throughput("transcribe")
+        return excess * 60 / per_minute if per_minute else 60.0
+
+    async def admit(self, user_id: str, priority: int = INTERACTIVE, count: int = 1) -> None:
+        """Take quota for count lectures of a user, or raise AdmissionError"""
+        name = CLASS_NAMES.get(priority, str(priority))
+        wait = await self._backlog_wait(count)
+        if wait is not None:
+            ADMISSIONS.inc(count, priority=name, outcome="queue_full")
+            raise AdmissionError("The processing queue is full, try again later", retry_after=wait)
+
+        bucket = self._bucket(user_id, priority)
+        if bucket is None:
+            ADMISSIONS.inc(count, priority=name, outcome="admitted")
+            return
+        if count > bucket.capacity:
+            ADMISSIONS.inc(count, priority=name, outcome="over_quota")
+            raise AdmissionError(f"At most {int(bucket.capacity)} {name} lectures can be queued at once")
+        wait = bucket.take(count)
+        if wait is not None:
+            ADMISSIONS.inc(count, priority=name, outcome="over_quota")
+            raise AdmissionError(f"Processing quota exceeded for user {user_id}", retry_after=wait)
+        ADMISSIONS.inc(count, priority=name, outcome="admitted")
+
+    def refund(self, user_id: str, priority: int = INTERACTIVE, count: int = 1) -> None:
+        """Return quota taken for lectures that did not need processing after all"""
+        bucket = self._bucket(user_id, priority)
+        if bucket is not None and count > 0:
+            bucket.give(count)
+
+
+admission_controller = AdmissionController(
+    quotas={
+        INTERACTIVE: (float(os.getenv("ADMISSION_INTERACTIVE_BURST", "10")),
+                      float(os.getenv("ADMISSION_INTERACTIVE_PER_HOUR", "30"))),
+        BULK: (float(os.getenv("ADMISSION_BULK_BURST", "500")),
+               float(os.getenv("ADMISSION_BULK_PER_HOUR", "500"))),
+    },
+    max_queued=int(os.getenv("ADMISSION_MAX_QUEUED", "2000")),
+)
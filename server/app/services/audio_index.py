@@ -0,0 +1,148 @@
+import os
+import json
+import time
+import sqlite3
+import asyncio
+import threading
+from dataclasses import dataclass
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Retention state of the stored original
+ORIGINAL = "original"
+COMPACTED = "compacted"  # re-encoded to a small lossy copy
+EVICTED = "evicted"  # deleted; only the Opus archive of the preprocessed audio remains
+
+_ENTRY_COLUMNS = "digest, audio_path, transcript, duration, sections, notes_title, size, stored_at, state"
+
+
+@dataclass
+class AudioIndexEntry:
+    digest: str
+    audio_path: str
+    transcript: Optional[str] = None
+    duration: float = 0
+    sections: Optional[dict] = None  # generated notes sections
+    notes_title: Optional[str] = None
+    size: int = 0  # bytes of the stored file, or of the archive once evicted
+    stored_at: float = 0
+    state: str = ORIGINAL
+
+
+class AudioIndex:
+    """Maps audio content digests to the stored file and its processing results"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS audio (
+                    digest TEXT PRIMARY KEY,
+                    audio_path TEXT NOT NULL,
+                    transcript TEXT,
+                    duration REAL NOT NULL DEFAULT 0,
+                    sections TEXT,
+                    notes_title TEXT,
+                    size INTEGER NOT NULL DEFAULT 0,
+                    stored_at REAL NOT NULL DEFAULT 0,
+                    state TEXT NOT NULL DEFAULT 'original'
+                )"""
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(audio)")}
+            # Indexes created before notes were stored as sections only held rendered HTML
+            for column, definition in (("sections", "TEXT"), ("size", "INTEGER NOT NULL DEFAULT 0"),
+                                       ("stored_at", "REAL NOT NULL DEFAULT 0"),
+                                       ("state", "TEXT NOT NULL DEFAULT 'original'")):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE audio ADD COLUMN {column} {definition}")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_audio_retention ON audio(state, stored_at)")
+            self._conn = conn
+        return self._conn
+
+    def _execute(self, sql: str, params: tuple = ()) -> list:
+        with self._lock:
+            conn = self._connect()
+            rows = conn.execute(sql, params).fetchall()
+            conn.commit()
+            return rows
+
+    @staticmethod
+    def _entry(row: tuple) -> AudioIndexEntry:
+        entry = AudioIndexEntry(*row)
+        if entry.sections is not None:
+            entry.sections = json.loads(entry.sections)
+        return entry
+
+    async def get(self, digest: str) -> Optional[AudioIndexEntry]:
+        """Return the entry for a digest; its stored file may have been evicted since"""
+        rows = await asyncio.to_thread(
+            self._execute, f"SELECT {_ENTRY_COLUMNS} FROM audio WHERE digest = ?", (digest,)
+        )
+        return self._entry(rows[0]) if rows else None
+
+    async def register(self, digest: str, audio_path: str, size: int = 0) -> None:
+        """Record the stored file for a digest, keeping the first copy"""
+        await asyncio.to_thread(
+            self._execute,
+            "INSERT OR IGNORE INTO audio (digest, audio_path, size, stored_at) VALUES (?, ?, ?, ?)",
+            (digest, audio_path, size, time.time()),
+        )
+
+    async def set_file(self, digest: str, audio_path: str, size: int, state: str = ORIGINAL) -> None:
+        """Point a digest at a different stored file, keeping its processing results"""
+        await asyncio.to_thread(
+            self._execute,
+            "UPDATE audio SET audio_path = ?, size = ?, state = ? WHERE digest = ?",
+            (audio_path, size, state, digest),
+        )
+
+    async def retention_candidates(self, limit: int = 100) -> List[AudioIndexEntry]:
+        """Processed originals, oldest first"""
+        rows = await asyncio.to_thread(
+            self._execute,
+            f"""SELECT {_ENTRY_COLUMNS} FROM audio
+                WHERE state = ? AND transcript IS NOT NULL ORDER BY stored_at LIMIT ?""",
+            (ORIGINAL, limit),
+        )
+        return [self._entry(row) for row in rows]
+
+    async def stored_bytes(self) -> int:
+        """Total size of the stored files and of the archives of evicted ones"""
+        rows = await asyncio.to_thread(self._execute, "SELECT COALESCE(SUM(size), 0) FROM audio")
+        return rows[0][0]
+
+    async def set_transcript(self, digest: str, transcript: str, duration: float) -> None:
+        await asyncio.to_thread(
+            self._execute,
+            "UPDATE audio SET transcript = ?, duration = ? WHERE digest = ?",
+            (transcript, duration, digest),
+        )
+
+    async def set_notes(self, digest: str, sections: dict, title: str) -> None:
+        await asyncio.to_thread(
+            self._execute,
+            "UPDATE audio SET sections = ?, notes_title = ? WHERE digest = ?",
+            (json.dumps(sections), title, digest),
+        )
+
+    async def remove(self, digest: str) -> None:
+        await asyncio.to_thread(self._execute, "DELETE FROM audio WHERE digest = ?", (digest,))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+audio_index = AudioIndex(db_path=os.getenv("AUDIO_INDEX_PATH", "local_cache/audio_index.db"))
@@ -0,0 +1,288 @@
+import os
+import glob
+import json
+import asyncio
+import hashlib
+import tempfile
+import subprocess
+from bisect import bisect_right
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import whisper
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SAMPLE_RATE = whisper.audio.SAMPLE_RATE
+
+
+def compact_silence(audio: np.ndarray, threshold_db: float, min_silence_seconds: float,
+                    keep_silence_seconds: float, frame_seconds: float = 0.03
+                    ) -> Tuple[np.ndarray, List[Tuple[int, int]]]:
+    """Shorten every silent stretch longer than min_silence_seconds to keep_silence_seconds.
+
+    Silence is any frame whose RMS level is below threshold_db (dBFS). Returns the
+    compacted audio and a time map of (compacted sample, original sample) pairs, one
+    per kept region, for translating timestamps back to the original audio.
+    """
+    frame = int(frame_seconds * SAMPLE_RATE)
+    frames = len(audio) // frame
+    if min_silence_seconds <= 0 or frames == 0:
+        return audio, [(0, 0)]
+
+    energy = np.square(audio[:frames * frame].reshape(frames, frame)).mean(axis=1)
+    silent = 10 * np.log10(energy + 1e-10) < threshold_db
+    # Run boundaries: starts at even positions, (exclusive) ends at odd positions
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], silent.astype(np.int8), [0]))))
+    min_frames = int(np.ceil(min_silence_seconds / frame_seconds))
+    pad = int(keep_silence_seconds / frame_seconds) // 2
+
+    regions = []
+    position = 0
+    for start, end in zip(edges[::2], edges[1::2]):
+        if end - start < min_frames:
+            continue
+        regions.append((position, int(start + pad) * frame))
+        position = int(end - pad) * frame
+    regions.append((position, len(audio)))
+    regions = [(lo, hi) for lo, hi in regions if hi > lo]
+    if len(regions) == 1:
+        return audio, [(0, 0)]
+
+    timemap = []
+    offset = 0
+    for lo, hi in regions:
+        timemap.append((offset, lo))
+        offset += hi - lo
+    return np.concatenate([audio[lo:hi] for lo, hi in regions]), timemap
+
+
+@dataclass
+class PreparedAudio:
+    pcm_path: str
+    duration: float  # seconds of original audio
+    kept_seconds: float  # seconds left after silence compaction
+    timemap: List[Tuple[int, int]]
+
+    def load(self) -> np.ndarray:
+        """Memory-map the PCM samples; copy-on-write so Whisper can wrap them without copying"""
+        return np.load(self.pcm_path, mmap_mode="c")
+
+    def to_original(self, seconds: float) -> float:
+        """Translate a timestamp in the compacted audio to the original audio"""
+        sample = seconds * SAMPLE_RATE
+        i = max(0, bisect_right([compacted for compacted, _ in self.timemap], sample) - 1)
+        compacted, original = self.timemap[i]
+        return (original + sample - compacted) / SAMPLE_RATE
+
+    def restore_timestamps(self, segments: List[dict]) -> List[dict]:
+        return [
+            {**seg, "start": self.to_original(seg["start"]), "end": self.to_original(seg["end"])}
+            for seg in segments
+        ]
+
+
+class AudioPreprocessor:
+    """Decodes uploads once to 16 kHz mono float32, compacts long silences and caches
+    the result as .npy files that transcription memory-maps instead of re-decoding.
+
+    Audio whose original is evicted keeps an Opus archive of the compacted audio
+    instead, from which the .npy is decoded again when it is needed.
+    """
+
+    def __init__(self, cache_dir: str, threshold_db: float = -40.0, min_silence_seconds: float = 2.0,
+                 keep_silence_seconds: float = 0.5):
+        self.cache_dir = cache_dir
+        self.threshold_db = threshold_db
+        self.min_silence_seconds = min_silence_seconds
+        self.keep_silence_seconds = keep_silence_seconds
+        # key -> [lock, callers holding or waiting for it]
+        self._locks: Dict[str, list] = {}
+
+    @property
+    def _settings_tag(self) -> str:
+        """Short hash of the settings, so changing them does not reuse stale PCM"""
+        settings = f"{SAMPLE_RATE}:{self.threshold_db}:{self.min_silence_seconds}:{self.keep_silence_seconds}"
+        return hashlib.sha1(settings.encode()).hexdigest()[:8]
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        base = os.path.join(self.cache_dir, f"{key}-{self._settings_tag}")
+        return f"{base}.npy", f"{base}.json"
+
+    def _archive_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}-{self._settings_tag}.ogg")
+
+    @asynccontextmanager
+    async def _locked(self, key: str):
+        """Serialize work on one audio file in this process; the lock is dropped with its last user"""
+        entry = self._locks.setdefault(key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[key]
+
+    def _write(self, path: str, write) -> None:
+        """Write a cache file through a unique temporary name, so concurrent writers,
+        even in other processes, never see or interleave partial files"""
+        fd, part_path = tempfile.mkstemp(suffix=".part", dir=self.cache_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(part_path, path)
+        finally:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+
+    @staticmethod
+    def _key(audio_path: str, digest: Optional[str]) -> str:
+        if digest:
+            return digest
+        stat = os.stat(audio_path)
+        return hashlib.sha256(f"{os.path.abspath(audio_path)}:{stat.st_size}:{stat.st_mtime}".encode()).hexdigest()
+
+    def _read(self, pcm_path: str, meta_path: str) -> Optional[PreparedAudio]:
+        # The .npy is written last, so its presence means both files are complete
+        if not os.path.exists(pcm_path):
+            return None
+        with open(meta_path) as f:
+            meta = json.load(f)
+        # Record the use, so cache trimming evicts the least recently used PCM first
+        os.utime(pcm_path)
+        return PreparedAudio(pcm_path, meta["duration"], meta["kept_seconds"],
+                             [tuple(pair) for pair in meta["timemap"]])
+
+    def _prepare(self, audio_path: str, pcm_path: str, meta_path: str) -> PreparedAudio:
+        audio = whisper.load_audio(audio_path)
+        compacted, timemap = compact_silence(
+            audio, self.threshold_db, self.min_silence_seconds, self.keep_silence_seconds
+        )
+        prepared = PreparedAudio(pcm_path, len(audio) / SAMPLE_RATE, len(compacted) / SAMPLE_RATE, timemap)
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        meta = {"duration": prepared.duration, "kept_seconds": prepared.kept_seconds, "timemap": timemap}
+        self._write(meta_path, lambda f: f.write(json.dumps(meta).encode()))
+        self._write(pcm_path, lambda f: np.save(f, np.ascontiguousarray(compacted, dtype=np.float32)))
+        return prepared
+
+    async def prepare(self, audio_path: str, digest: Optional[str] = None) -> PreparedAudio:
+        """Decoded and silence-compacted audio, from the cache when it was prepared before"""
+        key = self._key(audio_path, digest)
+        pcm_path, meta_path = self._paths(key)
+        async with self._locked(key):
+            prepared = await asyncio.to_thread(self._read, pcm_path, meta_path)
+            if prepared is None:
+                prepared = await asyncio.to_thread(self._prepare, audio_path, pcm_path, meta_path)
+                print(f"Preprocessed {audio_path}: {prepared.duration:.0f}s of audio, "
+                      f"{prepared.kept_seconds:.0f}s after silence compaction")
+        return prepared
+
+    async def get(self, digest: str) -> Optional[PreparedAudio]:
+        """Cached PCM of an audio file, without needing the original.
+
+        PCM trimmed from the cache is decoded again from the archive, if there is one.
+        """
+        pcm_path, meta_path = self._paths(digest)
+        prepared = await asyncio.to_thread(self._read, pcm_path, meta_path)
+        archive_path = self._archive_path(digest)
+        if prepared is not None or not await asyncio.to_thread(os.path.exists, archive_path):
+            return prepared
+        async with self._locked(digest):
+            prepared = await asyncio.to_thread(self._read, pcm_path, meta_path)
+            if prepared is None:
+                await asyncio.to_thread(self._restore, archive_path, pcm_path)
+                prepared = await asyncio.to_thread(self._read, pcm_path, meta_path)
+        return prepared
+
+    def _restore(self, archive_path: str, pcm_path: str) -> None:
+        audio = whisper.load_audio(archive_path)
+        self._write(pcm_path, lambda f: np.save(f, audio))
+
+    def _encode(self, pcm_path: str, archive_path: str, bitrate: str) -> None:
+        audio = np.load(pcm_path, mmap_mode="r")
+        fd, part_path = tempfile.mkstemp(suffix=".ogg", dir=self.cache_dir)
+        os.close(fd)
+        try:
+            process = subprocess.Popen(
+                ["ffmpeg", "-nostdin", "-y", "-loglevel", "error", "-f", "f32le", "-ar", str(SAMPLE_RATE),
+                 "-ac", "1", "-i", "pipe:0", "-c:a", "libopus", "-b:a", bitrate, "-f", "ogg", part_path],
+                stdin=subprocess.PIPE, stderr=subprocess.PIPE,
+            )
+            try:
+                # A minute at a time, so long lectures are never copied into memory at once
+                step = SAMPLE_RATE * 60
+                for start in range(0, len(audio), step):
+                    process.stdin.write(np.ascontiguousarray(audio[start:start + step], dtype="<f4").tobytes())
+            finally:
+                process.stdin.close()
+                stderr = process.stderr.read()
+                process.wait()
+            if process.returncode != 0:
+                raise Exception(f"Failed to archive {pcm_path}: {stderr.decode(errors='replace').strip()}")
+            os.replace(part_path, archive_path)
+        finally:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+
+    async def archive(self, digest: str, bitrate: str = "24k") -> int:
+        """Encode the cached PCM of an audio file to Opus, to keep once its original is
+        deleted; returns the size of the archive in bytes"""
+        pcm_path, _ = self._paths(digest)
+        archive_path = self._archive_path(digest)
+        await asyncio.to_thread(self._encode, pcm_path, archive_path, bitrate)
+        return await asyncio.to_thread(os.path.getsize, archive_path)
+
+    async def remove_archive(self, digest: str) -> None:
+        archive_path = self._archive_path(digest)
+        if await asyncio.to_thread(os.path.exists, archive_path):
+            await asyncio.to_thread(os.remove, archive_path)
+
+    async def exists(self, digest: str) -> bool:
+        pcm_path, _ = self._paths(digest)
+        return await asyncio.to_thread(os.path.exists, pcm_path)
+
+    async def entries(self) -> List[Tuple[str, int, float]]:
+        """(digest, bytes, last used) of every cached PCM, least recently used first.
+
+        PCM prepared with other settings is never used again, so it is listed first.
+        """
+        def entries():
+            result = []
+            for pcm_path in glob.glob(os.path.join(self.cache_dir, "*.npy")):
+                try:
+                    stat = os.stat(pcm_path)
+                except FileNotFoundError:
+                    continue
+                digest, tag = os.path.basename(pcm_path)[:-len(".npy")].rsplit("-", 1)
+                result.append((digest, stat.st_size, stat.st_mtime if tag == self._settings_tag else 0))
+            return sorted(result, key=lambda entry: entry[2])
+
+        return await asyncio.to_thread(entries)
+
+    async def remove(self, digest: str, keep_archive: bool = False) -> None:
+        """Delete the cached PCM of an audio file, for every settings version.
+
+        With keep_archive, audio that has an archive keeps it and its metadata, so the
+        PCM can be decoded again.
+        """
+        def remove():
+            archived = keep_archive and os.path.exists(self._archive_path(digest))
+            for path in glob.glob(os.path.join(self.cache_dir, f"{digest}-*")):
+                if not archived or path.endswith(".npy"):
+                    os.remove(path)
+
+        await asyncio.to_thread(remove)
+
+
+audio_preprocessor = AudioPreprocessor(
+    cache_dir=os.getenv("AUDIO_CACHE_DIR", "local_cache/pcm"),
+    threshold_db=float(os.getenv("VAD_THRESHOLD_DB", "-40")),
+    min_silence_seconds=float(os.getenv("VAD_MIN_SILENCE_SECONDS", "2")),
+    keep_silence_seconds=float(os.getenv("VAD_KEEP_SILENCE_SECONDS", "0.5")),
+)
@@ -0,0 +1,547 @@
+import os
+import json
+import time
+import sqlite3
+import asyncio
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+QUEUED = "queued"
+LEASED = "leased"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+# Priority classes: single uploads are interactive, batch imports are bulk
+INTERACTIVE = 0
+BULK = 1
+
+_COLUMNS = ("id, lecture_id, stage, status, attempts, payload, result, progress, error, updated_seq, "
+            "priority, available_at, user_id")
+# Just what progress relays need; payloads and results can hold whole transcripts
+_UPDATE_COLUMNS = ("id, lecture_id, stage, status, progress, updated_seq, attempts, "
+                   "(SELECT COUNT(*) FROM job_segments WHERE job_id = jobs.id)")
+# Claim order: each user's fair-queuing tag, with bulk jobs pushed back by bulk_delay
+_CLAIM_ORDER = "COALESCE(fair_at, available_at) + priority * ?"
+
+
+class LeaseLostError(Exception):
+    """Raised when a worker finishes a job it no longer holds the lease on"""
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """Parse "alice=2,bob=0.5" into fair-queuing weights by user"""
+    weights = {}
+    for item in spec.split(","):
+        if item.strip():
+            user_id, _, weight = item.partition("=")
+            weights[user_id.strip()] = float(weight)
+    return weights
+
+
+@dataclass
+class Job:
+    id: int
+    lecture_id: str
+    stage: str
+    status: str
+    attempts: int
+    payload: dict
+    result: Optional[dict]
+    progress: float
+    error: Optional[str]
+    updated_seq: int
+    priority: int = INTERACTIVE
+    available_at: float = 0  # when the job last became runnable
+    user_id: Optional[str] = None
+
+    @classmethod
+    def from_row(cls, row: tuple) -> "Job":
+        (job_id, lecture_id, stage, status, attempts, payload, result,
+         progress, error, updated_seq, priority, available_at, user_id) = row
+        return cls(
+            id=job_id,
+            lecture_id=lecture_id,
+            stage=stage,
+            status=status,
+            attempts=attempts,
+            payload=json.loads(payload),
+            result=json.loads(result) if result else None,
+            progress=progress,
+            error=error,
+            updated_seq=updated_seq,
+            priority=priority,
+            available_at=available_at,
+            user_id=user_id,
+        )
+
+
+@dataclass
+class JobUpdate:
+    """A job change as seen by progress relays"""
+    id: int
+    lecture_id: str
+    stage: str
+    status: str
+    progress: float
+    updated_seq: int
+    attempts: int  # a new attempt reports its segments from index 0 again
+    segment_count: int = 0  # partial transcript segments reported so far
+
+
+class JobQueue:
+    """SQLite-backed, multi-process job queue with leases and per-stage retries.
+
+    Every stage of a lecture is its own job, so a failed stage is retried on
+    its own without redoing the stages that already succeeded.
+
+    Bulk jobs are claimed as though they had been queued bulk_delay seconds
+    later, so interactive uploads overtake a large import without starving it.
+
+    Users share the workers by weighted fair queuing on a virtual clock: each
+    job of a stage is tagged with max(now, the user's previous tag) and moves
+    that user's clock on by fair_share / weight seconds. A user who queues
+    fifty lectures at once is interleaved with everyone else instead of
+    holding the workers until all fifty are done.
+
+    Finished jobs are deleted retention_seconds after they finish.
+    """
+
+    def __init__(self, db_path: str, lease_seconds: float = 300.0, max_attempts: int = 3,
+                 retry_backoff: float = 30.0, bulk_delay: float = 600.0, fair_share: float = 60.0,
+                 weights: Optional[Dict[str, float]] = None, retention_seconds: float = 7 * 86400,
+                 prune_interval: float = 3600.0):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.bulk_delay = bulk_delay
+        self.fair_share = fair_share
+        self.weights = weights or {}
+        self.retention_seconds = retention_seconds
+        self.prune_interval = prune_interval
+        self._pruned_at = 0.0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._read_lock = threading.Lock()
+        self._read_conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    lecture_id TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    payload TEXT NOT NULL,
+                    result TEXT,
+                    progress REAL NOT NULL DEFAULT 0,
+                    error TEXT,
+                    worker_id TEXT,
+                    lease_expires_at REAL,
+                    available_at REAL NOT NULL,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    updated_seq INTEGER NOT NULL DEFAULT 0,
+                    priority INTEGER NOT NULL DEFAULT 0
+                )"""
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "priority" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN priority INTEGER NOT NULL DEFAULT 0")
+            if "user_id" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN user_id TEXT")
+            if "fair_at" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN fair_at REAL")
+            # Partial transcript of running jobs, appended by heartbeats so each segment is written once
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS job_segments (
+                    job_id INTEGER NOT NULL,
+                    idx INTEGER NOT NULL,
+                    segment TEXT NOT NULL,
+                    PRIMARY KEY (job_id, idx)
+                )"""
+            )
+            # Virtual clock of each user per stage and priority class for fair queuing
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS fair_clocks (
+                    user_id TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    priority INTEGER NOT NULL,
+                    clock REAL NOT NULL,
+                    PRIMARY KEY (user_id, stage, priority)
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs(status, stage, available_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_lecture ON jobs(lecture_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_updated ON jobs(updated_seq)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_finished ON jobs(status, stage, finished_at)")
+            self._conn = conn
+        return self._conn
+
+    def _transaction(self, func):
+        """Run func(conn) inside an immediate (write-locked) transaction"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = func(conn)
+                conn.execute("COMMIT")
+                return result
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _read(self, func):
+        """Run func(conn) on a snapshot through a separate connection.
+
+        Reads take no write lock, so polling them does not hold up claims and
+        heartbeats of any process; WAL keeps the snapshot consistent.
+        """
+        with self._read_lock:
+            if self._read_conn is None:
+                with self._lock:
+                    self._connect()  # creates the schema
+                self._read_conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None,
+                                                  timeout=30)
+            conn = self._read_conn
+            conn.execute("BEGIN")
+            try:
+                return func(conn)
+            finally:
+                conn.execute("COMMIT")
+
+    @staticmethod
+    def _next_seq(conn: sqlite3.Connection) -> int:
+        return conn.execute("SELECT COALESCE(MAX(updated_seq), 0) + 1 FROM jobs").fetchone()[0]
+
+    def _prune(self, conn: sqlite3.Connection, now: float) -> None:
+        """Delete jobs that finished more than retention_seconds ago, at most every prune_interval"""
+        if self.retention_seconds <= 0 or now - self._pruned_at < self.prune_interval:
+            return
+        self._pruned_at = now
+        # The most recent change is kept so that sequence numbers never go back
+        cursor = conn.execute(
+            """DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?
+                 AND updated_seq < (SELECT MAX(updated_seq) FROM jobs)""",
+            (SUCCEEDED, FAILED, now - self.retention_seconds),
+        )
+        if cursor.rowcount:
+            print(f"Pruned {cursor.rowcount} finished jobs")
+        conn.execute(
+            "DELETE FROM job_segments WHERE job_id NOT IN (SELECT id FROM jobs WHERE status = ?)", (LEASED,)
+        )
+
+    def _fair_tag(self, conn: sqlite3.Connection, user_id: Optional[str], stage: str, priority: int,
+                  now: float) -> float:
+        """Start tag of a new job of a user, advancing the user's virtual clock.
+
+        Classes keep separate clocks, so a user's own bulk import does not delay
+        their interactive uploads.
+        """
+        user_id = user_id or ""
+        row = conn.execute(
+            "SELECT clock FROM fair_clocks WHERE user_id = ? AND stage = ? AND priority = ?",
+            (user_id, stage, priority),
+        ).fetchone()
+        tag = max(now, row[0]) if row else now
+        conn.execute(
+            "INSERT OR REPLACE INTO fair_clocks (user_id, stage, priority, clock) VALUES (?, ?, ?, ?)",
+            (user_id, stage, priority, tag + self.fair_share / self.weights.get(user_id, 1.0)),
+        )
+        return tag
+
+    def _insert(self, conn: sqlite3.Connection, lecture_id: str, stage: str, payload: dict,
+                priority: int = INTERACTIVE, user_id: Optional[str] = None) -> int:
+        now = time.time()
+        cursor = conn.execute(
+            """INSERT INTO jobs (lecture_id, stage, status, payload, available_at, created_at, updated_seq,
+                                 priority, user_id, fair_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (lecture_id, stage, QUEUED, json.dumps(payload), now, now, self._next_seq(conn), priority,
+             user_id, self._fair_tag(conn, user_id, stage, priority, now)),
+        )
+        return cursor.lastrowid
+
+    async def enqueue(self, lecture_id: str, stage: str, payload: dict, priority: int = INTERACTIVE,
+                      user_id: Optional[str] = None) -> int:
+        """Queue a stage of a lecture and return the job id"""
+        return await asyncio.to_thread(
+            self._transaction, lambda conn: self._insert(conn, lecture_id, stage, payload, priority, user_id)
+        )
+
+    async def enqueue_many(self, jobs: List[Tuple[str, str, dict]], priority: int = BULK,
+                           user_id: Optional[str] = None) -> List[int]:
+        """Queue (lecture id, stage, payload) jobs of one user in a single transaction"""
+        return await asyncio.to_thread(self._transaction, lambda conn: [
+            self._insert(conn, lecture_id, stage, payload, priority, user_id) for lecture_id, stage, payload in jobs
+        ])
+
+    async def claim(self, stages: List[str], worker_id: str, abandoned: Optional[List[str]] = None) -> Optional[Job]:
+        """Lease the runnable job of the given stages with the earliest fair-queuing tag,
+        including jobs whose lease expired.
+
+        Tags are pushed back by bulk_delay for bulk jobs. An expired lease counts as
+        an attempt, so a job that keeps crashing its worker is failed after
+        max_attempts instead of being reclaimed forever; the lecture ids of such
+        jobs are appended to abandoned.
+        """
+        def claim(conn: sqlite3.Connection) -> Optional[Job]:
+            now = time.time()
+            self._prune(conn, now)
+            placeholders = ",".join("?" for _ in stages)
+            exhausted = conn.execute(
+                f"""SELECT id, lecture_id FROM jobs
+                    WHERE stage IN ({placeholders}) AND status = ? AND lease_expires_at < ? AND attempts >= ?""",
+                (*stages, LEASED, now, self.max_attempts),
+            ).fetchall()
+            for job_id, lecture_id in exhausted:
+                conn.execute(
+                    """UPDATE jobs SET status = ?, error = ?, finished_at = ?, updated_seq = ? WHERE id = ?""",
+                    (FAILED, f"lease expired after {self.max_attempts} attempts", now, self._next_seq(conn), job_id),
+                )
+                conn.execute("DELETE FROM job_segments WHERE job_id = ?", (job_id,))
+                if abandoned is not None:
+                    abandoned.append(lecture_id)
+            row = conn.execute(
+                f"""SELECT id FROM jobs
+                    WHERE stage IN ({placeholders})
+                      AND ((status = ? AND available_at <= ?) OR (status = ? AND lease_expires_at < ?))
+                    ORDER BY {_CLAIM_ORDER}, id
+                    LIMIT 1""",
+                (*stages, QUEUED, now, LEASED, now, self.bulk_delay),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                """UPDATE jobs
+                   SET status = ?, worker_id = ?, lease_expires_at = ?, attempts = attempts + 1,
+                       started_at = ?, updated_seq = ?
+                   WHERE id = ?""",
+                (LEASED, worker_id, now + self.lease_seconds, now, self._next_seq(conn), row[0]),
+            )
+            # A new attempt reports its transcript from the start again
+            conn.execute("DELETE FROM job_segments WHERE job_id = ?", (row[0],))
+            return Job.from_row(conn.execute(f"SELECT {_COLUMNS} FROM jobs WHERE id = ?", (row[0],)).fetchone())
+
+        return await asyncio.to_thread(self._transaction, claim)
+
+    async def heartbeat(self, job_id: int, worker_id: str, progress: Optional[float] = None,
+                        segments: Optional[List[dict]] = None, first_index: int = 0) -> bool:
+        """Extend a lease and optionally record progress and the transcript segments
+        reported since the last heartbeat, the first of which is segment first_index;
+        False if the lease was lost"""
+        def heartbeat(conn: sqlite3.Connection) -> bool:
+            cursor = conn.execute(
+                """UPDATE jobs
+                   SET lease_expires_at = ?,
+                       progress = COALESCE(?, progress),
+                       updated_seq = ?
+                   WHERE id = ? AND worker_id = ? AND status = ?""",
+                (time.time() + self.lease_seconds, progress, self._next_seq(conn), job_id, worker_id, LEASED),
+            )
+            if cursor.rowcount != 1:
+                return False
+            if segments:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO job_segments (job_id, idx, segment) VALUES (?, ?, ?)",
+                    [(job_id, first_index + i, json.dumps(segment)) for i, segment in enumerate(segments)],
+                )
+            return True
+
+        return await asyncio.to_thread(self._transaction, heartbeat)
+
+    async def complete(self, job_id: int, worker_id: str, result: dict,
+                       next_stage: Optional[Tuple[str, dict]] = None) -> None:
+        """Mark a job succeeded and atomically queue the following stage.
+
+        Raises LeaseLostError when the job was cancelled or its lease expired.
+        """
+        def complete(conn: sqlite3.Connection) -> None:
+            cursor = conn.execute(
+                """UPDATE jobs
+                   SET status = ?, result = ?, progress = 100, finished_at = ?, updated_seq = ?
+                   WHERE id = ? AND worker_id = ? AND status = ?""",
+                (SUCCEEDED, json.dumps(result), time.time(), self._next_seq(conn), job_id, worker_id, LEASED),
+            )
+            if cursor.rowcount != 1:
+                raise LeaseLostError(f"Lease on job {job_id} was lost")
+            conn.execute("DELETE FROM job_segments WHERE job_id = ?", (job_id,))
+            if next_stage is not None:
+                lecture_id, priority, user_id = conn.execute(
+                    "SELECT lecture_id, priority, user_id FROM jobs WHERE id = ?", (job_id,)
+                ).fetchone()
+                self._insert(conn, lecture_id, next_stage[0], next_stage[1], priority, user_id)
+
+        await asyncio.to_thread(self._transaction, complete)
+
+    async def fail(self, job_id: int, worker_id: str, error: str) -> bool:
+        """Requeue a failed job with backoff, or fail it for good; True if it will be retried.
+
+        Raises LeaseLostError when the job was cancelled or its lease expired.
+        """
+        def fail(conn: sqlite3.Connection) -> bool:
+            row = conn.execute(
+                "SELECT attempts FROM jobs WHERE id = ? AND worker_id = ? AND status = ?",
+                (job_id, worker_id, LEASED),
+            ).fetchone()
+            if row is None:
+                raise LeaseLostError(f"Lease on job {job_id} was lost")
+            retry = row[0] < self.max_attempts
+            now = time.time()
+            conn.execute(
+                """UPDATE jobs
+                   SET status = ?, error = ?, available_at = ?, finished_at = ?, updated_seq = ?
+                   WHERE id = ?""",
+                (QUEUED if retry else FAILED, error,
+                 now + self.retry_backoff * (2 ** (row[0] - 1)),
+                 None if retry else now, self._next_seq(conn), job_id),
+            )
+            conn.execute("DELETE FROM job_segments WHERE job_id = ?", (job_id,))
+            return retry
+
+        return await asyncio.to_thread(self._transaction, fail)
+
+    async def cancel(self, lecture_id: str) -> None:
+        """Fail every job of a lecture that has not finished yet"""
+        def cancel(conn: sqlite3.Connection) -> None:
+            conn.execute(
+                "DELETE FROM job_segments WHERE job_id IN (SELECT id FROM jobs WHERE lecture_id = ? AND status = ?)",
+                (lecture_id, LEASED),
+            )
+            conn.execute(
+                """UPDATE jobs SET status = ?, error = 'cancelled', finished_at = ?, updated_seq = ?
+                   WHERE lecture_id = ? AND status IN (?, ?)""",
+                (FAILED, time.time(), self._next_seq(conn), lecture_id, QUEUED, LEASED),
+            )
+
+        await asyncio.to_thread(self._transaction, cancel)
+
+    async def latest_seq(self) -> int:
+        """Sequence number of the most recent job change"""
+        return await asyncio.to_thread(self._read, self._next_seq) - 1
+
+    async def changes_since(self, seq: int, limit: int = 500) -> List[JobUpdate]:
+        """Jobs modified after the given sequence number, oldest change first.
+
+        Only status and progress are returned; fetch new transcript segments with segments().
+        """
+        def changes(conn: sqlite3.Connection) -> List[JobUpdate]:
+            rows = conn.execute(
+                f"SELECT {_UPDATE_COLUMNS} FROM jobs WHERE updated_seq > ? ORDER BY updated_seq LIMIT ?",
+                (seq, limit),
+            ).fetchall()
+            return [JobUpdate(*row) for row in rows]
+
+        return await asyncio.to_thread(self._read, changes)
+
+    async def segments(self, job_id: int, start: int = 0) -> List[dict]:
+        """Partial transcript segments a running job reported, from index start on"""
+        def segments(conn: sqlite3.Connection) -> List[dict]:
+            rows = conn.execute(
+                "SELECT segment FROM job_segments WHERE job_id = ? AND idx >= ? ORDER BY idx", (job_id, start)
+            ).fetchall()
+            return [json.loads(segment) for segment, in rows]
+
+        return await asyncio.to_thread(self._read, segments)
+
+    async def depth(self, stage: str) -> int:
+        """Jobs of a stage that are waiting or running"""
+        def depth(conn: sqlite3.Connection) -> int:
+            return conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE stage = ? AND status IN (?, ?)", (stage, QUEUED, LEASED)
+            ).fetchone()[0]
+
+        return await asyncio.to_thread(self._read, depth)
+
+    async def throughput(self, stage: str, window_seconds: float = 300.0) -> float:
+        """Jobs of a stage that succeeded per minute over the recent window"""
+        def throughput(conn: sqlite3.Connection) -> float:
+            done = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ? AND stage = ? AND finished_at >= ?",
+                (SUCCEEDED, stage, time.time() - window_seconds),
+            ).fetchone()[0]
+            return done * 60.0 / window_seconds
+
+        return await asyncio.to_thread(self._read, throughput)
+
+    async def position(self, lecture_id: str, window_seconds: float = 900.0) -> Optional[Tuple[int, Optional[float]]]:
+        """Where a lecture's queued job stands: the jobs of its stage that will be claimed
+        before it, and the estimated seconds until it starts from the stage's recent
+        throughput (None when nothing finished recently). None when nothing is queued."""
+        def position(conn: sqlite3.Connection) -> Optional[Tuple[int, Optional[float]]]:
+            row = conn.execute(
+                f"""SELECT stage, {_CLAIM_ORDER}, id FROM jobs WHERE lecture_id = ? AND status = ?
+                    ORDER BY id DESC LIMIT 1""",
+                (self.bulk_delay, lecture_id, QUEUED),
+            ).fetchone()
+            if row is None:
+                return None
+            stage, key, job_id = row
+            ahead = conn.execute(
+                f"""SELECT COUNT(*) FROM jobs WHERE stage = ? AND status = ?
+                      AND ({_CLAIM_ORDER} < ? OR ({_CLAIM_ORDER} = ? AND id < ?))""",
+                (stage, QUEUED, self.bulk_delay, key, self.bulk_delay, key, job_id),
+            ).fetchone()[0]
+            if ahead == 0:
+                return 0, 0.0
+            done = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE stage = ? AND status = ? AND finished_at >= ?",
+                (stage, SUCCEEDED, time.time() - window_seconds),
+            ).fetchone()[0]
+            return ahead, ahead * window_seconds / done if done else None
+
+        return await asyncio.to_thread(self._read, position)
+
+    async def stats(self, window_seconds: float = 300.0) -> Dict[str, dict]:
+        """Queue depth per stage and status, plus recent per-stage throughput"""
+        def stats(conn: sqlite3.Connection) -> Dict[str, dict]:
+            since = time.time() - window_seconds
+            result: Dict[str, dict] = {}
+            for stage, status, count in conn.execute(
+                "SELECT stage, status, COUNT(*) FROM jobs GROUP BY stage, status"
+            ):
+                result.setdefault(stage, {"depth": {}})["depth"][status] = count
+            for stage, done, avg_seconds in conn.execute(
+                """SELECT stage, COUNT(*), AVG(finished_at - started_at) FROM jobs
+                   WHERE status = ? AND finished_at >= ? GROUP BY stage""",
+                (SUCCEEDED, since),
+            ):
+                entry = result.setdefault(stage, {"depth": {}})
+                entry["completed_per_minute"] = done * 60.0 / window_seconds
+                entry["avg_seconds"] = avg_seconds
+            return result
+
+        return await asyncio.to_thread(self._read, stats)
+
+    def close(self) -> None:
+        with self._read_lock:
+            if self._read_conn is not None:
+                self._read_conn.close()
+                self._read_conn = None
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+job_queue = JobQueue(
+    db_path=os.getenv("JOB_QUEUE_PATH", "local_cache/jobs.db"),
+    lease_seconds=float(os.getenv("JOB_LEASE_SECONDS", "300")),
+    max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", "3")),
+    retry_backoff=float(os.getenv("JOB_RETRY_BACKOFF_SECONDS", "30")),
+    bulk_delay=float(os.getenv("JOB_BULK_DELAY_SECONDS", "600")),
+    fair_share=float(os.getenv("JOB_FAIR_SHARE_SECONDS", "60")),
+    weights=parse_weights(os.getenv("JOB_USER_WEIGHTS", "")),
+    retention_seconds=float(os.getenv("JOB_RETENTION_SECONDS", str(7 * 86400))),
+)
@@ -0,0 +1,183 @@
+import os
+import json
+import time
+import sqlite3
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def section_cache_key(model: str, instruction: str, text: str, options: dict) -> str:
+    """Content address for a section output"""
+    material = json.dumps(
+        {"model": model, "instruction": instruction, "text": text, "options": options},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class SectionCache:
+    """Two-tier (memory LRU + SQLite) cache for generated note sections.
+
+    The disk tier's size is tracked in memory, and recounted only when it looks
+    over budget, since other processes share the file. Reads record their access
+    time in memory and write it back in batches of touch_batch, or after
+    touch_interval seconds, instead of committing on every hit.
+    """
+
+    def __init__(self, db_path: str, memory_entries: int = 1024, max_disk_bytes: int = 256 * 1024 * 1024,
+                 touch_batch: int = 64, touch_interval: float = 60.0, evict_batch: int = 64):
+        self.db_path = db_path
+        self.memory_entries = memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.touch_batch = touch_batch
+        self.touch_interval = touch_interval
+        self.evict_batch = evict_batch
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+        self._memory: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._disk_bytes = 0
+        self._touched: Dict[str, float] = {}
+        self._touched_at = time.monotonic()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS sections (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    accessed_at REAL NOT NULL
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sections_accessed ON sections(accessed_at)")
+            self._disk_bytes = self._count_bytes(conn)
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _count_bytes(conn: sqlite3.Connection) -> int:
+        return conn.execute("SELECT COALESCE(SUM(size), 0) FROM sections").fetchone()[0]
+
+    def _remember(self, key: str, value: str) -> None:
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _flush_touches(self, conn: sqlite3.Connection) -> None:
+        """Write recorded access times; the caller commits"""
+        if self._touched:
+            conn.executemany(
+                "UPDATE sections SET accessed_at = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in self._touched.items()],
+            )
+            self._touched.clear()
+        self._touched_at = time.monotonic()
+
+    def _disk_get(self, key: str) -> Optional[str]:
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT value FROM sections WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._touched[key] = time.time()
+            if len(self._touched) >= self.touch_batch or time.monotonic() - self._touched_at >= self.touch_interval:
+                self._flush_touches(conn)
+                conn.commit()
+            return row[0]
+
+    def _disk_set(self, key: str, value: str) -> None:
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            conn = self._connect()
+            previous = conn.execute("SELECT size FROM sections WHERE key = ?", (key,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO sections (key, value, size, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, size, time.time()),
+            )
+            self._touched.pop(key, None)
+            self._disk_bytes += size - (previous[0] if previous else 0)
+            if self._disk_bytes > self.max_disk_bytes:
+                self._flush_touches(conn)
+                self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Drop least recently used rows until the disk tier fits its byte budget"""
+        # Other processes write to the same file, so recount before deleting anything
+        self._disk_bytes = self._count_bytes(conn)
+        while self._disk_bytes > self.max_disk_bytes:
+            rows = conn.execute(
+                "SELECT key, size FROM sections ORDER BY accessed_at LIMIT ?", (self.evict_batch,)
+            ).fetchall()
+            if not rows:
+                break
+            stale = []
+            for key, size in rows:
+                if self._disk_bytes <= self.max_disk_bytes:
+                    break
+                stale.append((key,))
+                self._disk_bytes -= size
+            conn.executemany("DELETE FROM sections WHERE key = ?", stale)
+
+    async def get(self, key: str) -> Optional[str]:
+        """Look up a section, promoting disk hits into memory"""
+        value = self._memory.get(key)
+        if value is not None:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            self.memory_hits += 1
+            return value
+
+        value = await asyncio.to_thread(self._disk_get, key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._remember(key, value)
+        return value
+
+    async def set(self, key: str, value: str) -> None:
+        """Store a section in both tiers"""
+        self._remember(key, value)
+        await asyncio.to_thread(self._disk_set, key, value)
+
+    def stats(self) -> dict:
+        """Hit/miss counters for both tiers"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._flush_touches(self._conn)
+                self._conn.commit()
+                self._conn.close()
+                self._conn = None
+
+
+section_cache = SectionCache(
+    db_path=os.getenv("LLM_CACHE_PATH", "local_cache/llm_sections.db"),
+    memory_entries=int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "1024")),
+    max_disk_bytes=int(os.getenv("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+)
@@ -0,0 +1,188 @@
+import os
+import json
+import asyncio
+from typing import AsyncIterator, List, Optional
+
+import aiohttp
+from dotenv import load_dotenv
+
+load_dotenv()
+
+RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+# Generate options that OpenAI-compatible completions endpoints accept under the same name
+COMPLETION_OPTIONS = ("temperature", "top_p", "top_k", "max_tokens")
+
+
+class OllamaError(Exception):
+    """Raised when the Ollama backend returns an unusable response"""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class OllamaClient:
+    """Long-lived, pooled HTTP client for an Ollama-compatible /api/generate endpoint"""
+
+    def __init__(
+        self,
+        api_url: str,
+        pool_size: int = 16,
+        keepalive_timeout: float = 60.0,
+        request_timeout: float = 300.0,
+        connect_timeout: float = 10.0,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+    ):
+        self.api_url = api_url
+        self.pool_size = pool_size
+        self.keepalive_timeout = keepalive_timeout
+        self.request_timeout = request_timeout
+        self.connect_timeout = connect_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def start(self) -> None:
+        """Open the shared session; safe to call more than once"""
+        if self._session is not None and not self._session.closed:
+            return
+        connector = aiohttp.TCPConnector(
+            limit=self.pool_size,
+            limit_per_host=self.pool_size,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+        timeout = aiohttp.ClientTimeout(total=self.request_timeout, connect=self.connect_timeout)
+        self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+    async def close(self) -> None:
+        """Close the shared session and its pooled connections"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            await self.start()
+        return self._session
+
+    async def generate(self, payload: dict, timeout: Optional[float] = None) -> str:
+        """Send a generate request and return the full response text.
+
+        When ``payload["stream"]`` is true the NDJSON token stream is consumed
+        incrementally as it arrives.
+        """
+        if payload.get("stream"):
+            parts = []
+            async for token in self.stream(payload, timeout=timeout):
+                parts.append(token)
+            return "".join(parts).strip()
+        return (await self._with_retries(self._generate_once, payload, timeout)).strip()
+
+    async def stream(self, payload: dict, timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """Yield response tokens as the backend produces them.
+
+        Only the connection attempt is retried: once tokens have been yielded
+        the caller has consumed them, so a mid-stream failure is raised.
+        """
+        payload = {**payload, "stream": True}
+        response = await self._with_retries(self._open_stream, payload, timeout)
+        try:
+            async for line in response.content:
+                line = line.strip()
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise OllamaError(chunk["error"])
+                token = chunk.get("response", "")
+                if token:
+                    yield token
+                if chunk.get("done"):
+                    break
+        finally:
+            response.release()
+
+    async def _generate_once(self, payload: dict, timeout: Optional[float]) -> str:
+        session = await self._get_session()
+        async with session.post(self.api_url, json=payload, timeout=self._timeout(timeout)) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise OllamaError(f"API request failed with status {response.status}: {error_text}", response.status)
+            result = await response.json(content_type=None)
+            return result.get("response", "")
+
+    async def _open_stream(self, payload: dict, timeout: Optional[float]) -> aiohttp.ClientResponse:
+        session = await self._get_session()
+        response = await session.post(self.api_url, json=payload, timeout=self._timeout(timeout))
+        if response.status != 200:
+            error_text = await response.text()
+            response.release()
+            raise OllamaError(f"API request failed with status {response.status}: {error_text}", response.status)
+        return response
+
+    def _timeout(self, timeout: Optional[float]) -> Optional[aiohttp.ClientTimeout]:
+        if timeout is None:
+            return None
+        return aiohttp.ClientTimeout(total=timeout, connect=self.connect_timeout)
+
+    async def _with_retries(self, func, payload: dict, timeout: Optional[float]):
+        attempt = 0
+        while True:
+            try:
+                return await func(payload, timeout)
+            except (aiohttp.ClientError, asyncio.TimeoutError, OllamaError) as e:
+                retryable = not isinstance(e, OllamaError) or e.status in RETRYABLE_STATUSES
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                delay = self.backoff_base * (2 ** attempt)
+                attempt += 1
+                print(f"Ollama request failed ({str(e)}), retrying in {delay:.1f}s (attempt {attempt}/{self.max_retries})")
+                await asyncio.sleep(delay)
+
+
+class CompletionsClient(OllamaClient):
+    """Client for an OpenAI-compatible /v1/completions endpoint, such as a vLLM or
+    llama.cpp server, which takes several prompts in one request and batches them
+    on the GPU. Accepts the same generate payloads as OllamaClient."""
+
+    async def complete(self, payloads: List[dict], timeout: Optional[float] = None) -> List[str]:
+        """Response texts for generate payloads that share a model and options, in one request"""
+        options = payloads[0].get("options", {})
+        body = {
+            "model": payloads[0]["model"],
+            "prompt": [payload["prompt"] for payload in payloads],
+            "stream": False,
+            **{name: options[name] for name in COMPLETION_OPTIONS if name in options},
+        }
+        return await self._with_retries(self._complete_once, body, timeout)
+
+    async def _complete_once(self, body: dict, timeout: Optional[float]) -> List[str]:
+        session = await self._get_session()
+        async with session.post(self.api_url, json=body, timeout=self._timeout(timeout)) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise OllamaError(f"API request failed with status {response.status}: {error_text}", response.status)
+            result = await response.json(content_type=None)
+        texts = [""] * len(body["prompt"])
+        for choice in result.get("choices", []):
+            texts[choice["index"]] = choice.get("text", "")
+        return texts
+
+    async def generate(self, payload: dict, timeout: Optional[float] = None) -> str:
+        return (await self.complete([payload], timeout))[0].strip()
+
+    async def stream(self, payload: dict, timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """The whole response as a single token: batched completions are not streamed"""
+        text = (await self.complete([payload], timeout))[0]
+        if text:
+            yield text
+
+
+ollama_client = OllamaClient(
+    api_url=os.getenv("OLLAMA_API_URL", "https://ollama.snagaquadart.com/api/generate"),
+    pool_size=int(os.getenv("OLLAMA_POOL_SIZE", "16")),
+    keepalive_timeout=float(os.getenv("OLLAMA_KEEPALIVE_TIMEOUT", "60")),
+    request_timeout=float(os.getenv("OLLAMA_REQUEST_TIMEOUT", "300")),
+    max_retries=int(os.getenv("OLLAMA_MAX_RETRIES", "3")),
+)
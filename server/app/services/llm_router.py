@@ -0,0 +1,290 @@
+import os
+import json
+import time
+import asyncio
+from typing import AsyncIterator, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+import aiohttp
+from dotenv import load_dotenv
+
+from .llm_client import CompletionsClient, OllamaClient, OllamaError, ollama_client
+from .metrics import LLM_BACKEND_IN_FLIGHT, LLM_BACKEND_REQUESTS
+
+load_dotenv()
+
+FAILURES = (aiohttp.ClientError, asyncio.TimeoutError, OllamaError)
+
+
+def parse_backends(spec: str) -> List[dict]:
+    """Parse "url;model=name;max_in_flight=4;api=openai;batch=8,url2" into backend settings"""
+    backends = []
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        url, *options = [part.strip() for part in item.split(";")]
+        settings = {"url": url}
+        for option in options:
+            name, _, value = option.partition("=")
+            settings[name.strip()] = value.strip()
+        backends.append(settings)
+    return backends
+
+
+class LLMBackend:
+    """One inference host, with the load and health the router balances on"""
+
+    def __init__(self, client: OllamaClient, name: str, model: Optional[str] = None,
+                 max_in_flight: int = 8, batch_size: int = 1):
+        self.client = client
+        self.name = name
+        self.model = model  # overrides the payload's model, for hosts that name the same model differently
+        self.max_in_flight = max_in_flight
+        self.batch_size = batch_size if isinstance(client, CompletionsClient) else 1
+        self.in_flight = 0
+        self.latency: Optional[float] = None  # moving average of seconds per request
+        self.failures = 0  # consecutive
+        self.down_until = 0.0
+        self.pending: List[Tuple[dict, asyncio.Future]] = []
+        self.flush_task: Optional[asyncio.Task] = None
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self.down_until
+
+
+class LLMRouter:
+    """Spreads LLM requests over several Ollama-compatible backends.
+
+    Each request goes to the backend with the least expected delay, (requests in
+    flight + 1) x its average latency, among those below max_in_flight. A request
+    fails over to the next backend when one errors or gives no first token within
+    first_token_timeout; a backend with failure_threshold consecutive failures is
+    left out for cooldown seconds. Backends that take several prompts per request
+    (batch_size > 1) receive the short prompts that arrive within batch_window
+    seconds of each other as one request.
+    """
+
+    def __init__(self, backends: List[LLMBackend], first_token_timeout: float = 120.0,
+                 failure_threshold: int = 3, cooldown: float = 30.0, latency_alpha: float = 0.3,
+                 batch_window: float = 0.02, batch_max_prompt_chars: int = 8000):
+        if not backends:
+            raise Exception("The LLM router needs at least one backend")
+        self.backends = backends
+        self.first_token_timeout = first_token_timeout
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.latency_alpha = latency_alpha
+        self.batch_window = batch_window
+        self.batch_max_prompt_chars = batch_max_prompt_chars
+        self._released = asyncio.Event()
+        # The event loop only keeps weak references to tasks
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        for backend in self.backends:
+            await backend.client.start()
+
+    async def close(self) -> None:
+        for backend in self.backends:
+            await backend.client.close()
+
+    def _expected_delay(self, backend: LLMBackend) -> float:
+        known = [b.latency for b in self.backends if b.latency is not None]
+        # A backend without measurements is assumed to be as fast as the fastest, so it gets tried
+        latency = backend.latency if backend.latency is not None else min(known, default=1.0)
+        return (backend.in_flight + 1) * latency
+
+    async def _acquire(self, tried: List[LLMBackend]) -> LLMBackend:
+        """Reserve a slot on the best backend not tried yet, waiting while all are busy"""
+        while True:
+            remaining = [b for b in self.backends if b not in tried]
+            # When every backend is down, the one that comes back first is probed anyway
+            healthy = [b for b in remaining if b.available] or sorted(remaining, key=lambda b: b.down_until)[:1]
+            ready = [b for b in healthy if b.in_flight < b.max_in_flight]
+            if ready:
+                backend = min(ready, key=self._expected_delay)
+                backend.in_flight += 1
+                LLM_BACKEND_IN_FLIGHT.set(backend.in_flight, backend=backend.name)
+                return backend
+            self._released.clear()
+            await self._released.wait()
+
+    def _release(self, backend: LLMBackend, seconds: float, outcome: str) -> None:
+        backend.in_flight -= 1
+        LLM_BACKEND_IN_FLIGHT.set(backend.in_flight, backend=backend.name)
+        LLM_BACKEND_REQUESTS.inc(backend=backend.name, outcome=outcome)
+        if outcome != "cancelled":
+            # Timeouts count at the time they took, so a slow host also loses traffic
+            backend.latency = seconds if backend.latency is None else \
+                self.latency_alpha * seconds + (1 - self.latency_alpha) * backend.latency
+        if outcome == "ok":
+            backend.failures = 0
+        elif outcome in ("error", "timeout"):
+            backend.failures += 1
+            if backend.failures >= self.failure_threshold:
+                backend.down_until = time.monotonic() + self.cooldown
+                print(f"LLM backend {backend.name} failed {backend.failures} times, "
+                      f"leaving it out for {self.cooldown:.0f}s")
+        self._released.set()
+
+    def _release_later(self, backend: LLMBackend, start: float, outcome: str,
+                       batch_future: Optional[asyncio.Future]) -> None:
+        """Release a request's slot, or, when it is part of a batch the backend is still
+        working on, once that batch ends, so the backend's load is not under-counted"""
+        if batch_future is None or batch_future.done():
+            self._release(backend, time.perf_counter() - start, outcome)
+            return
+
+        def done(future: asyncio.Future) -> None:
+            if not future.cancelled():
+                future.exception()  # nobody awaits it any more
+            self._release(backend, time.perf_counter() - start, outcome)
+
+        batch_future.add_done_callback(done)
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def _open(self, backend: LLMBackend, payload: dict,
+              timeout: Optional[float]) -> Tuple[AsyncIterator[str], Optional[asyncio.Future]]:
+        """The token stream of a request, and the future of its batch if it was batched"""
+        if backend.model:
+            payload = {**payload, "model": backend.model}
+        if backend.batch_size > 1 and len(payload["prompt"]) <= self.batch_max_prompt_chars:
+            future = asyncio.get_running_loop().create_future()
+            return self._batched(backend, payload, future), future
+        return backend.client.stream(payload, timeout=timeout), None
+
+    async def _batched(self, backend: LLMBackend, payload: dict, future: asyncio.Future) -> AsyncIterator[str]:
+        backend.pending.append((payload, future))
+        if len(backend.pending) >= backend.batch_size:
+            self._flush(backend)
+        elif backend.flush_task is None:
+            backend.flush_task = self._spawn(self._flush_later(backend))
+        # Shielded so that a timeout of this request does not fail the rest of the batch
+        text = await asyncio.shield(future)
+        if text:
+            yield text
+
+    async def _flush_later(self, backend: LLMBackend) -> None:
+        await asyncio.sleep(self.batch_window)
+        backend.flush_task = None
+        while backend.pending:
+            self._flush(backend)
+
+    def _flush(self, backend: LLMBackend) -> None:
+        """Send the oldest pending prompts that share a model and options as one request"""
+        def key(payload: dict) -> str:
+            return json.dumps([payload["model"], payload.get("options")], sort_keys=True)
+
+        first = key(backend.pending[0][0])
+        batch = [item for item in backend.pending if key(item[0]) == first][:backend.batch_size]
+        backend.pending = [item for item in backend.pending if item not in batch]
+        self._spawn(self._send(backend, batch))
+
+    @staticmethod
+    async def _send(backend: LLMBackend, batch: List[Tuple[dict, asyncio.Future]]) -> None:
+        try:
+            texts = await backend.client.complete([payload for payload, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), text in zip(batch, texts):
+            if not future.done():
+                future.set_result(text)
+
+    async def stream(self, payload: dict, timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """Yield response tokens from the best available backend, failing over until one
+        produces a first token; a failure after that is raised, like OllamaClient.stream"""
+        tried: List[LLMBackend] = []
+        while True:
+            backend = await self._acquire(tried)
+            tried.append(backend)
+            # The last backend left is given as long as it needs
+            first_token_timeout = self.first_token_timeout if len(tried) < len(self.backends) else None
+            start = time.perf_counter()
+            tokens, batch_future = self._open(backend, payload, timeout)
+            try:
+                first = await asyncio.wait_for(anext(tokens, None), first_token_timeout)
+                break
+            except FAILURES as e:
+                timed_out = isinstance(e, asyncio.TimeoutError)
+                self._release_later(backend, start, "timeout" if timed_out else "error", batch_future)
+                await tokens.aclose()
+                if len(tried) == len(self.backends):
+                    raise
+                reason = "no first token in time" if timed_out else str(e)
+                print(f"LLM backend {backend.name} failed ({reason}), failing over")
+            except BaseException:
+                self._release_later(backend, start, "cancelled", batch_future)
+                await tokens.aclose()
+                raise
+
+        outcome = "cancelled"
+        try:
+            if first is not None:
+                yield first
+                async for token in tokens:
+                    yield token
+            outcome = "ok"
+        except FAILURES:
+            outcome = "error"
+            raise
+        finally:
+            self._release(backend, time.perf_counter() - start, outcome)
+            await tokens.aclose()
+
+    async def generate(self, payload: dict, timeout: Optional[float] = None) -> str:
+        parts = []
+        async for token in self.stream(payload, timeout=timeout):
+            parts.append(token)
+        return "".join(parts).strip()
+
+    def status(self) -> List[dict]:
+        return [
+            {"name": b.name, "in_flight": b.in_flight, "latency": b.latency, "available": b.available,
+             "failures": b.failures, "batch_size": b.batch_size}
+            for b in self.backends
+        ]
+
+
+def _create_router() -> LLMRouter:
+    specs = parse_backends(os.getenv("LLM_BACKENDS", ""))
+    pool_size = int(os.getenv("OLLAMA_POOL_SIZE", "16"))
+    if not specs:
+        # A single backend keeps the client's own retries with backoff
+        backends = [LLMBackend(ollama_client, name=urlparse(ollama_client.api_url).netloc, max_in_flight=pool_size)]
+    else:
+        backends = []
+        for spec in specs:
+            client_class = CompletionsClient if spec.get("api") == "openai" else OllamaClient
+            # Errors fail over to another backend straight away instead of retrying here
+            client = client_class(
+                api_url=spec["url"],
+                pool_size=pool_size,
+                request_timeout=float(os.getenv("OLLAMA_REQUEST_TIMEOUT", "300")),
+                max_retries=0,
+            )
+            backends.append(LLMBackend(
+                client,
+                name=urlparse(spec["url"]).netloc or spec["url"],
+                model=spec.get("model"),
+                max_in_flight=int(spec.get("max_in_flight", pool_size)),
+                batch_size=int(spec.get("batch", 1)),
+            ))
+    return LLMRouter(
+        backends,
+        first_token_timeout=float(os.getenv("LLM_FIRST_TOKEN_TIMEOUT", "120")),
+        failure_threshold=int(os.getenv("LLM_FAILURE_THRESHOLD", "3")),
+        cooldown=float(os.getenv("LLM_BACKEND_COOLDOWN_SECONDS", "30")),
+        batch_window=float(os.getenv("LLM_BATCH_WINDOW_SECONDS", "0.02")),
+    )
+
+
+llm_router = _create_router()
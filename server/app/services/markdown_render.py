@@ -0,0 +1,156 @@
+"""Single-pass renderer for the markdown subset produced by the notes model.
+
+Supports headings, paragraphs, nested bullet and numbered lists, bold, italic and
+inline code. All text is HTML-escaped; unmatched emphasis markers stay literal.
+"""
+import re
+from html import escape
+from typing import List
+
+HEADING = re.compile(r'(#{1,6})\s+(.*?)\s*#*$')
+LIST_ITEM = re.compile(r'( *)(?:([-*+])|(\d{1,9})[.)])\s+(.*)$')
+# Marker runs and code spans; code spans are matched whole so their contents are never
+# treated as emphasis. The leading character class lets the regex engine skip plain text fast.
+INLINE_TOKEN = re.compile(r'([*_`](?:(?<=`)[^`\n]+`|(?<=\*)\**|(?<=_)_*))')
+
+
+def render_inline(text: str) -> str:
+    """Render emphasis and code spans in one line of text.
+
+    Marker runs are paired innermost first, two markers for <strong> and one
+    for <em>, so nested and combined emphasis such as ***both*** works.
+    """
+    # Escaping never touches the marker characters, so the whole line is escaped once
+    tokens = INLINE_TOKEN.split(escape(text, quote=False))
+    if len(tokens) == 1:
+        return tokens[0]
+
+    last = len(tokens) - 1
+    # Open marker runs as [char, unmatched count, opening tags, index in tokens, closing tags]
+    openers: List[list] = []
+    runs: List[list] = []
+    for i in range(1, last, 2):
+        token = tokens[i]
+        char = token[0]
+        if char == '`':
+            tokens[i] = f'<code>{token[1:-1]}</code>'
+            continue
+
+        # Neighbouring text, or the neighbouring marker when two runs touch
+        before = tokens[i - 1][-1:] or (tokens[i - 2][-1:] if i > 1 else ' ')
+        after = tokens[i + 1][:1] or (tokens[i + 2][:1] if i + 2 <= last else ' ')
+        can_open = not after.isspace()
+        can_close = not before.isspace()
+        if char == '_' and before.isalnum() and after.isalnum():
+            # snake_case identifiers are not emphasis
+            can_open = can_close = False
+
+        count = len(token)
+        closing = ''
+        while can_close and count and openers:
+            # Openers of the other marker inside this span can no longer match
+            while openers and openers[-1][0] != char:
+                openers.pop()
+            if not openers:
+                break
+            opener = openers[-1]
+            used = 2 if count >= 2 and opener[1] >= 2 else 1
+            tag = 'strong' if used == 2 else 'em'
+            opener[1] -= used
+            count -= used
+            opener[2] = f'<{tag}>' + opener[2]
+            closing += f'</{tag}>'
+            if opener[1] == 0:
+                openers.pop()
+
+        tokens[i] = closing + char * count
+        if count and can_open:
+            run = [char, count, '', i, closing]
+            openers.append(run)
+            runs.append(run)
+
+    for char, count, tags, i, closing in runs:
+        if tags:
+            # Markers left unmatched stay literal, outside the tags they opened
+            tokens[i] = closing + char * count + tags
+    return ''.join(tokens)
+
+
+class _Renderer:
+    """Block-level state for one pass over the lines of a markdown text"""
+
+    def __init__(self, out: List[str]):
+        self.out = out
+        self.paragraph: List[str] = []
+        # Open lists as (indent, tag)
+        self.lists: List[tuple] = []
+        self.after_blank = False
+
+    def flush_paragraph(self) -> None:
+        if self.paragraph:
+            self.out.append(f"<p>{render_inline(' '.join(self.paragraph))}</p>")
+            self.paragraph = []
+
+    def close_lists(self, indent: int = -1) -> None:
+        """Close every list nested deeper than indent"""
+        while self.lists and self.lists[-1][0] > indent:
+            self.out.append(f'</li></{self.lists.pop()[1]}>')
+
+    def list_item(self, indent: int, tag: str, text: str) -> None:
+        self.flush_paragraph()
+        self.close_lists(indent)
+        if self.lists and self.lists[-1][0] == indent and self.lists[-1][1] != tag:
+            self.close_lists(indent - 1)
+        if self.lists and self.lists[-1][0] == indent:
+            self.out.append('</li>')
+        else:
+            self.out.append(f'<{tag}>')
+            self.lists.append((indent, tag))
+        self.out.append(f'<li>{render_inline(text)}')
+
+    def line(self, line: str) -> None:
+        stripped = line.strip()
+        after_blank, self.after_blank = self.after_blank, not stripped
+        if not stripped:
+            self.flush_paragraph()
+            return
+
+        item = LIST_ITEM.match(line.expandtabs(4))
+        if item:
+            indent, bullet, _, text = item.groups()
+            self.list_item(len(indent), 'ul' if bullet else 'ol', text)
+            return
+
+        heading = HEADING.match(stripped)
+        if heading:
+            self.flush_paragraph()
+            self.close_lists()
+            level = len(heading.group(1))
+            self.out.append(f'<h{level}>{render_inline(heading.group(2))}</h{level}>')
+            return
+
+        if self.lists and not self.paragraph and not after_blank:
+            # Continuation line of the current list item
+            self.out.append(f' {render_inline(stripped)}')
+            return
+        self.close_lists()
+        self.paragraph.append(stripped)
+
+    def finish(self) -> None:
+        self.flush_paragraph()
+        self.close_lists()
+
+
+def render_markdown_into(text: str, out: List[str]) -> None:
+    """Append the HTML pieces of text to out, so a whole document is joined only once"""
+    renderer = _Renderer(out)
+    for line in text.splitlines():
+        renderer.line(line)
+    renderer.finish()
+
+
+def render_markdown(text: str) -> str:
+    """Render markdown to HTML"""
+    out: List[str] = []
+    render_markdown_into(text, out)
+    return ''.join(out)
@@ -0,0 +1,187 @@
+"""In-process counters and histograms exposed in the Prometheus text format.
+
+Each process (API server or worker) keeps its own registry and serves it on
+/metrics; Prometheus aggregates across processes when it scrapes them.
+"""
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Seconds, from fast LLM cache lookups to hour-long transcriptions
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+# Real-time factors: elapsed seconds per second of audio
+RTF_BUCKETS = (0.01, 0.02, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2, 5)
+
+# Timing record of the LLM call made by the current task, filled in by the notes service
+llm_call: ContextVar[Optional[dict]] = ContextVar("llm_call", default=None)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> Tuple[str, ...]:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {', '.join(self.label_names)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}" for key, value in values
+        ]
+
+
+class Gauge(Counter):
+    """A value set when it is read, such as a queue depth"""
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (non-cumulative, last is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, (list(counts), total)) for key, (counts, total) in self._series.items())
+        lines = self.header()
+        for key, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self, prefix: str = "lecturemate_"):
+        self.prefix = prefix
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(self.prefix + name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(self.prefix + name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(self.prefix + name, help, labels, buckets))
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+SPAN_SECONDS = registry.histogram("span_seconds", "Duration of timed pipeline spans", ["span"])
+JOB_SECONDS = registry.histogram("job_seconds", "Duration of processing jobs", ["stage", "outcome"])
+JOB_QUEUE_WAIT = registry.histogram("job_queue_wait_seconds", "Time jobs waited to be claimed", ["stage"])
+JOBS = registry.counter("jobs_total", "Processing jobs run", ["stage", "outcome"])
+QUEUE_DEPTH = registry.gauge("jobs", "Jobs in the queue", ["stage", "status"])
+TRANSCRIPTION_RTF = registry.histogram(
+    "transcription_rtf", "Transcription real-time factor (elapsed / audio seconds)", ["policy"], RTF_BUCKETS
+)
+TRANSCRIBED_AUDIO = registry.counter("transcribed_audio_seconds_total", "Seconds of audio transcribed", ["policy"])
+LLM_SECONDS = registry.histogram("llm_request_seconds", "Total latency of LLM section requests", ["section"])
+LLM_TTFT = registry.histogram("llm_ttft_seconds", "Time to first token of LLM section requests", ["section"])
+LLM_TOKENS = registry.counter("llm_tokens_total", "Tokens streamed by the LLM backend", ["section"])
+LLM_REQUESTS = registry.counter("llm_requests_total", "LLM section requests", ["section", "outcome"])
+LLM_CACHE = registry.counter("llm_cache_total", "Section cache lookups", ["result"])
+LLM_BACKEND_REQUESTS = registry.counter(
+    "llm_backend_requests_total", "LLM requests per backend of the router", ["backend", "outcome"]
+)
+LLM_BACKEND_IN_FLIGHT = registry.gauge("llm_backend_in_flight", "LLM requests in flight per backend", ["backend"])
+UPLOAD_BYTES = registry.counter("upload_bytes_total", "Bytes of audio received")
+ADMISSIONS = registry.counter("admissions_total", "Admission decisions for lecture processing", ["priority", "outcome"])
+
+
+@contextmanager
+def span(name: str, timings: Optional[dict] = None) -> Iterator[None]:
+    """Time a block into the span histogram and, when given, a per-lecture timings dict.
+
+    Time is added to timings[name], so a span entered more than once accumulates.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        SPAN_SECONDS.observe(elapsed, span=name)
+        if timings is not None:
+            timings[name] = timings.get(name, 0) + elapsed
@@ -1,53 +1,166 @@
 import os
 from dotenv import load_dotenv
 import re
-import aiohttp
 import json
+import time
+import asyncio
+import hashlib
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .llm_cache import SectionCache, section_cache, section_cache_key
+from .llm_router import LLMRouter, llm_router
+from .metrics import LLM_CACHE, LLM_REQUESTS, LLM_SECONDS, LLM_TOKENS, LLM_TTFT, llm_call, span
+from .scheduler import section_scheduler
 
 load_dotenv()
 
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+
+# Tokens taken by the prompt template around the transcript text
+PROMPT_OVERHEAD_TOKENS = 300
+
+OVERVIEW_INSTRUCTION = "create a comprehensive overview that captures the main themes, objectives, and scope of the lecture"
+KEY_CONCEPTS_INSTRUCTION = "identify and explain the key concepts, terms, definitions, and theoretical frameworks. Format as clear, complete statements"
+MAIN_POINTS_INSTRUCTION = "extract and explain the main arguments, theories, methodologies, and important points discussed. Include any significant debates or controversies"
+EXAMPLES_INSTRUCTION = "identify and explain any examples, case studies, practical applications, or real-world connections mentioned"
+SUMMARY_INSTRUCTION = "create a comprehensive summary that synthesizes the key takeaways, main conclusions, and broader implications of the lecture content"
+CHUNK_SUMMARY_INSTRUCTION = "summarize this part of the lecture, keeping every concept, definition, argument and example it covers"
+# Per-chunk outputs of the map phase, stored so unchanged chunks are not sent to the model again
+CHUNK_INSTRUCTIONS = {
+    'main_points': MAIN_POINTS_INSTRUCTION,
+    'examples': EXAMPLES_INSTRUCTION,
+    'chunk_summary': CHUNK_SUMMARY_INSTRUCTION,
+}
+REDUCE_INSTRUCTION = "the text below consists of consecutive partial summaries of one lecture. Merge them into a single summary that keeps every concept, definition, argument and example, in lecture order"
+# Section label of each prompt in the LLM metrics
+INSTRUCTION_SECTIONS = {
+    OVERVIEW_INSTRUCTION: 'overview',
+    KEY_CONCEPTS_INSTRUCTION: 'key_concepts',
+    MAIN_POINTS_INSTRUCTION: 'main_points',
+    EXAMPLES_INSTRUCTION: 'examples',
+    SUMMARY_INSTRUCTION: 'summary',
+    CHUNK_SUMMARY_INSTRUCTION: 'chunk_summary',
+    REDUCE_INSTRUCTION: 'reduce',
+}
+
 class NotesService:
-    def __init__(self):
-        print("Initializing Ollama client...")
-        self.api_url = "https://ollama.snagaquadart.com/api/generate"
-        print("Ollama client initialized successfully")
-
-    def _chunk_text(self, text: str, max_length: int = 100000) -> list[str]:
-        """Split text into chunks that the model can process."""
-        paragraphs = text.split('\n\n')
+    def __init__(self, client: LLMRouter = llm_router, cache: SectionCache = section_cache):
+        self.client = client
+        self.cache = cache
+        self.model = os.getenv("LLM_MODEL", "gemma3:4b")
+        self.options = {
+            "temperature": 0.7,
+            "top_p": 0.95,
+            "top_k": 40,
+            "num_ctx": 32768,
+            "max_tokens": 4000
+        }
+        # The prompt must fit in num_ctx together with the template and the generated output
+        self.max_input_tokens = self.options["num_ctx"] - self.options["max_tokens"] - PROMPT_OVERHEAD_TOKENS
+        self.chunk_tokens = min(int(os.getenv("NOTES_CHUNK_TOKENS", "3000")), self.max_input_tokens)
+        self.chunk_overlap_tokens = int(os.getenv("NOTES_CHUNK_OVERLAP_TOKENS", "150"))
+
+    @staticmethod
+    def _estimate_tokens(text: str) -> int:
+        """Conservative token estimate (no tokenizer is available for the remote model)"""
+        return max(len(text) // 4, int(len(text.split()) * 1.4)) + 1
+
+    @staticmethod
+    def _is_anchor(unit: str, unit_tokens: int, max_tokens: int) -> bool:
+        """Whether a chunk may end after this sentence, decided by the sentence content alone.
+
+        The probability grows with sentence length so that, past the minimum size,
+        a boundary is expected within about a quarter of max_tokens.
+        """
+        value = int.from_bytes(hashlib.blake2b(unit.encode(), digest_size=8).digest(), 'big') / 2 ** 64
+        return value < unit_tokens / (max_tokens / 4)
+
+    def _chunk_hash(self, chunk: str) -> str:
+        return hashlib.sha256(json.dumps([self.model, self.options, chunk], sort_keys=True).encode()).hexdigest()
+
+    def _chunk_text(self, text: str, max_tokens: int = None, overlap_tokens: int = None,
+                    content_defined: bool = True) -> list[str]:
+        """Split text into chunks of at most max_tokens, repeating up to overlap_tokens
+        of trailing sentences at the start of the next chunk for context.
+
+        Chunks are content-defined: past half of max_tokens, a chunk ends at the
+        first anchor sentence, so an edit moves at most the boundaries next to it
+        and every other chunk keeps its exact text.
+        """
+        max_tokens = min(max_tokens or self.chunk_tokens, self.max_input_tokens)
+        overlap_tokens = self.chunk_overlap_tokens if overlap_tokens is None else overlap_tokens
+
+        # Break into sentence-sized units, splitting any oversized sentence by words
+        units = []
+        for paragraph in text.split('\n\n'):
+            for sentence in SENTENCE_BOUNDARY.split(paragraph.strip()):
+                if not sentence:
+                    continue
+                if self._estimate_tokens(sentence) <= max_tokens:
+                    units.append(sentence)
+                    continue
+                # Pack words while the estimate of the piece stays within max_tokens
+                piece, piece_chars = [], 0
+                for word in sentence.split():
+                    chars = piece_chars + len(word) + (1 if piece else 0)
+                    if piece and max(chars // 4, int((len(piece) + 1) * 1.4)) + 1 > max_tokens:
+                        units.append(' '.join(piece))
+                        piece, chars = [], len(word)
+                    piece.append(word)
+                    piece_chars = chars
+                if piece:
+                    units.append(' '.join(piece))
+
         chunks = []
-        current_chunk = []
-        current_length = 0
-        
-        for paragraph in paragraphs:
-            if len(paragraph) > max_length:
-                # If a single paragraph is too long, split by sentences
-                sentences = re.split('(?<=[.!?]) +', paragraph)
-                for sentence in sentences:
-                    if current_length + len(sentence) > max_length:
-                        if current_chunk:
-                            chunks.append('\n\n'.join(current_chunk))
-                        current_chunk = [sentence]
-                        current_length = len(sentence)
-                    else:
-                        current_chunk.append(sentence)
-                        current_length += len(sentence)
-            else:
-                if current_length + len(paragraph) > max_length:
-                    chunks.append('\n\n'.join(current_chunk))
-                    current_chunk = [paragraph]
-                    current_length = len(paragraph)
-                else:
-                    current_chunk.append(paragraph)
-                    current_length += len(paragraph)
-        
-        if current_chunk:
-            chunks.append('\n\n'.join(current_chunk))
-        
-        return chunks
+        # own_tokens excludes the overlap carried from the previous chunk
+        current, current_tokens, own_tokens = [], 0, 0
+        cut = False
+        for unit in units:
+            unit_tokens = self._estimate_tokens(unit)
+            if current and (cut or current_tokens + unit_tokens > max_tokens):
+                chunks.append(' '.join(current))
+                # Carry trailing sentences over as overlap
+                carried, carried_tokens = [], 0
+                for previous in reversed(current):
+                    previous_tokens = self._estimate_tokens(previous)
+                    if carried_tokens + previous_tokens > overlap_tokens or \
+                            carried_tokens + previous_tokens + unit_tokens > max_tokens:
+                        break
+                    carried.insert(0, previous)
+                    carried_tokens += previous_tokens
+                current, current_tokens, own_tokens = carried, carried_tokens, 0
+            current.append(unit)
+            current_tokens += unit_tokens
+            own_tokens += unit_tokens
+            cut = content_defined and own_tokens >= max_tokens // 2 and \
+                self._is_anchor(unit, unit_tokens, max_tokens)
+
+        if current:
+            chunks.append(' '.join(current))
+
+        return chunks or ['']
 
-    async def _generate_section(self, text: str, instruction: str) -> str:
+    def stable_chunks(self, partial: str) -> list[str]:
+        """The chunks of a transcript that is still growing that can no longer change.
+
+        A chunk is final once a later sentence has been seen, so all but the last
+        chunk of the complete sentences so far equal the chunks of the full text.
+        """
+        boundaries = list(SENTENCE_BOUNDARY.finditer(partial))
+        if not boundaries:
+            return []
+        # The text after the last boundary may be a sentence that is not finished yet
+        return self._chunk_text(partial[:boundaries[-1].start()])[:-1]
+
+    async def _generate_section(self, text: str, instruction: str, use_cache: bool = True) -> str:
         """Generate a specific section of notes using Ollama Gemma API"""
+        cache_key = section_cache_key(self.model, instruction, text, self.options)
+        if use_cache:
+            cached = await self.cache.get(cache_key)
+            LLM_CACHE.inc(result='miss' if cached is None else 'hit')
+            if cached is not None:
+                return cached
+
         prompt = f"""You are an AI assistant generating academic lecture notes.
 
 INSTRUCTION: {instruction}
@@ -66,145 +179,101 @@ GUIDELINES:
 - Include relevant examples and applications
 - Maintain logical flow and connections between ideas"""
         
+        section = INSTRUCTION_SECTIONS.get(instruction, 'other')
+        start = time.perf_counter()
         try:
-            async with aiohttp.ClientSession() as session:
-                payload = {
-                    "model": "gemma3:4b",
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": {
-                        "temperature": 0.7,
-                        "top_p": 0.95,
-                        "top_k": 40,
-                        "num_ctx": 32768,
-                        "max_tokens": 4000
-                    }
-                }
-                
-                async with session.post(self.api_url, json=payload) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        raise Exception(f"API request failed with status {response.status}: {error_text}")
-                    
-                    result = await response.json()
-                    return result.get("response", "").strip()
-                    
+            payload = {
+                "model": self.model,
+                "prompt": prompt,
+                "stream": True,
+                "options": self.options
+            }
+            # Consume the stream here rather than through generate() to time the first token
+            parts = []
+            async for token in self.client.stream(payload):
+                if not parts:
+                    ttft = time.perf_counter() - start
+                    LLM_TTFT.observe(ttft, section=section)
+                    call = llm_call.get()
+                    if call is not None:
+                        call["ttft"] = ttft
+                parts.append(token)
+            result = "".join(parts).strip()
+            LLM_TOKENS.inc(len(parts), section=section)
+            LLM_SECONDS.observe(time.perf_counter() - start, section=section)
+            LLM_REQUESTS.inc(section=section, outcome='ok')
+            if result:
+                await self.cache.set(cache_key, result)
+            return result
+
         except Exception as e:
+            LLM_REQUESTS.inc(section=section, outcome='error')
             print(f"Ollama API error: {str(e)}")
             raise Exception(f"Error generating notes: {str(e)}")
 
-    def _format_notes(self, sections: dict) -> str:
-        """Format the various sections into structured HTML notes with proper styling"""
-        notes = f"""
-        <div class="lecture-notes">
-            <h1 class="title">{sections['title']}</h1>
-            
-            <section class="overview">
-                <h2>Overview</h2>
-                <div class="content">
-                    {self._format_paragraphs(sections['overview'])}
-                </div>
-            </section>
-            
-            <section class="key-concepts">
-                <h2>Key Concepts</h2>
-                <div class="content">
-                    {self._format_bullet_points(sections['key_concepts'])}
-                </div>
-            </section>
-            
-            <section class="main-points">
-                <h2>Main Points</h2>
-                <div class="content">
-                    {self._format_bullet_points(sections['main_points'])}
-                </div>
-            </section>
-            
-            {self._format_examples_section(sections.get('examples', ''))}
-            
-            <section class="summary">
-                <h2>Summary & Key Takeaways</h2>
-                <div class="content">
-                    {self._format_paragraphs(sections['summary'])}
-                </div>
-            </section>
-        </div>
-        """
-        return notes
+    async def _reduce(self, summaries: list[str], job, lecture_id: str = None, level: int = 0) -> str:
+        """Recursively merge partial summaries until they fit in a single chunk"""
+        combined = '\n\n'.join(summaries)
+        if len(summaries) == 1 or self._estimate_tokens(combined) <= self.chunk_tokens:
+            if len(summaries) == 1:
+                return summaries[0]
+            results = await section_scheduler.run(
+                [(f'reduce[{level}]', job(combined, REDUCE_INSTRUCTION))], lecture_id=lecture_id
+            )
+            return results[0]
 
-    def _format_paragraphs(self, text: str) -> str:
-        """Format text into paragraphs, preserving markdown-style formatting"""
-        # Split by double newlines to separate paragraphs
-        paragraphs = text.strip().split('\n\n')
-        formatted = []
-        
-        for para in paragraphs:
-            # Convert markdown-style bold
-            para = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', para)
-            # Convert markdown-style italic
-            para = re.sub(r'\*(.*?)\*', r'<em>\1</em>', para)
-            # Convert markdown-style headers
-            para = re.sub(r'^##\s+(.*?)$', r'<h2>\1</h2>', para, flags=re.MULTILINE)
-            para = re.sub(r'^###\s+(.*?)$', r'<h3>\1</h3>', para, flags=re.MULTILINE)
-            
-            if para.strip():
-                formatted.append(f"<p>{para}</p>")
-        
-        return '\n'.join(formatted)
+        # Pack consecutive summaries into groups that fit the chunk budget
+        groups, current, current_tokens = [], [], 0
+        for summary in summaries:
+            tokens = self._estimate_tokens(summary)
+            if current and current_tokens + tokens > self.chunk_tokens:
+                groups.append(current)
+                current, current_tokens = [], 0
+            current.append(summary)
+            current_tokens += tokens
+        groups.append(current)
 
-    def _format_bullet_points(self, text: str) -> str:
-        """Format text into bullet points, preserving markdown-style formatting"""
-        lines = text.strip().split('\n')
-        formatted = []
-        current_list = []
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
+        if len(groups) == len(summaries):
+            # Every summary fills a chunk on its own; merge pairs (re-chunking if still too long)
+            groups = [summaries[i:i + 2] for i in range(0, len(summaries), 2)]
+
+        jobs = []
+        for i, group in enumerate(groups):
+            text = '\n\n'.join(group)
+            if self._estimate_tokens(text) <= self.max_input_tokens:
+                jobs.append((f'reduce[{level}][{i}]', job(text, REDUCE_INSTRUCTION)))
                 continue
-                
-            # Convert markdown-style bold
-            line = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', line)
-            # Convert markdown-style italic
-            line = re.sub(r'\*(.*?)\*', r'<em>\1</em>', line)
-            
-            if line.startswith('- ') or line.startswith('* '):
-                current_list.append(f"<li>{line[2:]}</li>")
-            elif line.startswith('#'):
-                if current_list:
-                    formatted.append(f"<ul>{''.join(current_list)}</ul>")
-                    current_list = []
-                # Convert markdown headers
-                line = re.sub(r'^##\s+(.*?)$', r'<h2>\1</h2>', line)
-                line = re.sub(r'^###\s+(.*?)$', r'<h3>\1</h3>', line)
-                formatted.append(line)
-            else:
-                if current_list:
-                    formatted.append(f"<ul>{''.join(current_list)}</ul>")
-                    current_list = []
-                formatted.append(f"<p>{line}</p>")
-        
-        if current_list:
-            formatted.append(f"<ul>{''.join(current_list)}</ul>")
-            
-        return '\n'.join(formatted)
-
-    def _format_examples_section(self, examples: str) -> str:
-        """Format the examples section if it exists"""
-        if not examples or 'no examples' in examples.lower():
-            return ''
-            
-        return f"""
-        <section class="examples">
-            <h2>Examples & Applications</h2>
-            <div class="content">
-                {self._format_bullet_points(examples)}
-            </div>
-        </section>
-        """
+            # Too long for one prompt: reduce each piece on its own so that none of it is lost
+            pieces = self._chunk_text(text, max_tokens=self.max_input_tokens, overlap_tokens=0,
+                                      content_defined=False)
+            for j, piece in enumerate(pieces):
+                jobs.append((f'reduce[{level}][{i}.{j}]', job(piece, REDUCE_INSTRUCTION)))
+        merged = await section_scheduler.run(jobs, lecture_id=lecture_id)
+        return await self._reduce(merged, job, lecture_id, level + 1)
+
+    async def generate_notes(self, transcript: str, title: str = None, lecture_id: str = None,
+                             use_cache: bool = True) -> dict:
+        """Generate structured notes sections (markdown) from a lecture transcript"""
+        sections, _ = await self.generate_notes_incremental(transcript, title, lecture_id, use_cache=use_cache)
+        return sections
 
-    async def generate_notes(self, transcript: str, title: str = None) -> str:
-        """Generate structured notes from a lecture transcript"""
+    async def generate_notes_incremental(self, transcript: str, title: str = None, lecture_id: str = None,
+                                         previous: Optional[Dict[str, dict]] = None,
+                                         use_cache: bool = True,
+                                         timings: Optional[dict] = None) -> Tuple[dict, Dict[str, dict]]:
+        """Generate structured notes sections, reusing the map outputs of unchanged chunks.
+
+        Each token-bounded chunk is mapped to main points, examples and a partial
+        summary; the partial summaries are reduced into one digest that covers the
+        whole lecture, from which the overview, key concepts and summary are written.
+
+        previous maps chunk hashes to the outputs of an earlier run; chunks whose
+        hash is found there cost no model calls. Returns the sections and the
+        outputs of the current chunks, to pass as previous next time.
+
+        When timings is given, the time spent in each phase and in each section
+        request is added to it.
+        """
         try:
             chunks = self._chunk_text(transcript)
             sections = {
@@ -215,45 +284,146 @@ GUIDELINES:
                 'examples': '',
                 'summary': ''
             }
-            
-            # Process each chunk for different aspects
-            for i, chunk in enumerate(chunks):
-                if i == 0:  # First chunk gets overview and key concepts
-                    sections['overview'] = await self._generate_section(
-                        chunk,
-                        "create a comprehensive overview that captures the main themes, objectives, and scope of the lecture"
-                    )
-                    sections['key_concepts'] = await self._generate_section(
-                        chunk,
-                        "identify and explain the key concepts, terms, definitions, and theoretical frameworks. Format as clear, complete statements"
-                    )
-                
-                # Get main points from each chunk
-                main_points = await self._generate_section(
-                    chunk,
-                    "extract and explain the main arguments, theories, methodologies, and important points discussed. Include any significant debates or controversies"
-                )
-                sections['main_points'] += main_points + " "
-                
-                # Look for examples
-                examples = await self._generate_section(
-                    chunk,
-                    "identify and explain any examples, case studies, practical applications, or real-world connections mentioned"
-                )
-                if examples and 'no examples' not in examples.lower():
-                    sections['examples'] += examples + " "
-            
-            # Generate final summary
-            sections['summary'] = await self._generate_section(
-                ' '.join(chunks[:2]),  # Use first two chunks for summary
-                "create a comprehensive summary that synthesizes the key takeaways, main conclusions, and broader implications of the lecture content"
-            )
-            
-            # Format everything into structured notes
-            return self._format_notes(sections)
-            
+
+            def job(text: str, instruction: str):
+                return lambda: self._generate_section(text, instruction, use_cache=use_cache)
+
+            # Map: every chunk prompt is independent, so they are all dispatched together
+            # and collected back in submission order.
+            single = len(chunks) == 1
+            needed = ('main_points', 'examples') if single else tuple(CHUNK_INSTRUCTIONS)
+            hashes = [self._chunk_hash(chunk) for chunk in chunks]
+            outputs: Dict[str, dict] = {}
+            jobs, slots = [], []
+            for i, (chunk, chunk_hash) in enumerate(zip(chunks, hashes)):
+                known = outputs.setdefault(chunk_hash, dict((previous or {}).get(chunk_hash, {})))
+                for name in needed:
+                    if name not in known and (chunk_hash, name) not in slots:
+                        jobs.append((f'{name}[{i}]', job(chunk, CHUNK_INSTRUCTIONS[name])))
+                        slots.append((chunk_hash, name))
+            with span('notes_map', timings):
+                results = await section_scheduler.run(jobs, lecture_id=lecture_id)
+            for (chunk_hash, name), result in zip(slots, results):
+                outputs[chunk_hash][name] = result
+            if previous:
+                changed = len({chunk_hash for chunk_hash, _ in slots})
+                print(f"Regenerating {changed} of {len(chunks)} chunks for lecture {lecture_id}")
+
+            main_points, examples, chunk_summaries = [], [], []
+            for chunk_hash in hashes:
+                main_points.append(outputs[chunk_hash]['main_points'])
+                chunk_examples = outputs[chunk_hash]['examples']
+                if chunk_examples and 'no examples' not in chunk_examples.lower():
+                    examples.append(chunk_examples)
+                if not single:
+                    chunk_summaries.append(outputs[chunk_hash]['chunk_summary'])
+            # Blank lines keep the markdown blocks of consecutive chunks apart
+            sections['main_points'] = '\n\n'.join(main_points)
+            sections['examples'] = '\n\n'.join(examples)
+
+            # Reduce: a short transcript is its own digest
+            with span('notes_reduce', timings):
+                digest = chunks[0] if single else await self._reduce(chunk_summaries, job, lecture_id)
+
+            with span('notes_final', timings):
+                overview, key_concepts, summary = await section_scheduler.run([
+                    ('overview', job(digest, OVERVIEW_INSTRUCTION)),
+                    ('key_concepts', job(digest, KEY_CONCEPTS_INSTRUCTION)),
+                    ('summary', job(digest, SUMMARY_INSTRUCTION)),
+                ], lecture_id=lecture_id)
+            sections['overview'] = overview
+            sections['key_concepts'] = key_concepts
+            sections['summary'] = summary
+
+            if lecture_id:
+                for name, seconds, ttft in section_scheduler.pop_latencies(lecture_id):
+                    print(f"Section {name} for lecture {lecture_id} took {seconds:.2f}s")
+                    if timings is not None:
+                        timings.setdefault('sections', {})[name] = {'seconds': seconds, 'ttft': ttft}
+
+            # Stored as markdown sections and rendered to each format on demand
+            return sections, outputs
+
         except Exception as e:
             print(f"Error generating notes: {str(e)}")
             raise Exception(f"Error generating notes: {str(e)}")
+        finally:
+            # A failed or cancelled run must not leave its section timings behind
+            if lecture_id:
+                section_scheduler.pop_latencies(lecture_id)
+
+class NotesPrefetch:
+    """Runs the map phase of the notes while the transcript is still being written.
+
+    Fed transcript segments as transcription produces them; each chunk that can
+    no longer change is mapped in the background, so that once transcription
+    ends the notes stage finds those outputs in its previous chunks and only
+    maps the last chunk before the reduce and final sections.
+
+    Chunks go through the section scheduler under the lecture id, so however many
+    are mapped at once they share the lecture's limit with the notes stage.
+    """
+
+    def __init__(self, service: NotesService, lecture_id: str,
+                 store: Optional[Callable[[str, str, dict], Awaitable[None]]] = None,
+                 use_cache: bool = True):
+        self.service = service
+        self.lecture_id = lecture_id
+        self.store = store
+        self.use_cache = use_cache
+        self.outputs: Dict[str, dict] = {}
+        self._texts: List[str] = []
+        self._tokens = 0
+        self._mapped = set()
+        self._tasks: List[asyncio.Task] = []
+
+    def add(self, segments: List[dict]) -> None:
+        """Take newly transcribed segments, mapping any chunk they complete"""
+        self._texts.extend(seg["text"] for seg in segments)
+        self._tokens += sum(self.service._estimate_tokens(seg["text"]) for seg in segments)
+        # Chunking again is only worth it once a good part of a chunk has arrived
+        if self._tokens >= self.service.chunk_tokens // 4:
+            self._map_stable()
+
+    def _map_stable(self) -> None:
+        """Start mapping every chunk that can no longer change and is not mapped yet"""
+        self._tokens = 0
+        for chunk in self.service.stable_chunks(" ".join(self._texts)):
+            chunk_hash = self.service._chunk_hash(chunk)
+            if chunk_hash not in self._mapped:
+                self._mapped.add(chunk_hash)
+                self._tasks.append(asyncio.create_task(self._map(len(self._mapped) - 1, chunk, chunk_hash)))
+
+    async def _map(self, index: int, chunk: str, chunk_hash: str) -> None:
+        results = await section_scheduler.run([
+            (f'{name}[{index}]', lambda instruction=instruction: self.service._generate_section(
+                chunk, instruction, use_cache=self.use_cache))
+            for name, instruction in CHUNK_INSTRUCTIONS.items()
+        ], lecture_id=self.lecture_id)
+        self.outputs[chunk_hash] = dict(zip(CHUNK_INSTRUCTIONS, results))
+        if self.store is not None:
+            await self.store(self.lecture_id, chunk_hash, self.outputs[chunk_hash])
+
+    async def finish(self, timings: Optional[dict] = None) -> Dict[str, dict]:
+        """Map the chunks completed by the last segments, wait for the chunks still
+        being mapped and return the outputs by chunk hash.
+
+        A chunk that failed is left for the notes stage to map again.
+        """
+        if self._tokens:
+            self._map_stable()
+        for result in await asyncio.gather(*self._tasks, return_exceptions=True):
+            if isinstance(result, Exception):
+                print(f"Error mapping chunk ahead of notes for lecture {self.lecture_id}: {str(result)}")
+        for name, seconds, ttft in section_scheduler.pop_latencies(self.lecture_id):
+            if timings is not None:
+                timings.setdefault('notes_prefetch', {})[name] = {'seconds': seconds, 'ttft': ttft}
+        return self.outputs
+
+    def cancel(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        section_scheduler.pop_latencies(self.lecture_id)
+
 
 notes_service = NotesService() 
\ No newline at end of file
@@ -0,0 +1,103 @@
+import os
+import json
+import hashlib
+from html import escape
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from .markdown_render import render_markdown, render_markdown_into
+
+load_dotenv()
+
+# Rendered note sections in display order: (section key, CSS class, heading)
+NOTE_SECTIONS = (
+    ('overview', 'overview', 'Overview'),
+    ('key_concepts', 'key-concepts', 'Key Concepts'),
+    ('main_points', 'main-points', 'Main Points'),
+    ('examples', 'examples', 'Examples & Applications'),
+    ('summary', 'summary', 'Summary & Key Takeaways'),
+)
+SECTION_KEYS = tuple(key for key, _, _ in NOTE_SECTIONS)
+# Pseudo-section for the whole document
+ALL_SECTIONS = 'all'
+
+
+def notes_version(sections: dict) -> str:
+    """Content hash identifying one generation of a lecture's notes"""
+    return hashlib.sha1(json.dumps(sections, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def _shown(sections: dict):
+    """Sections that appear in the rendered document, with their CSS class and heading"""
+    for key, css_class, heading in NOTE_SECTIONS:
+        content = sections.get(key, '')
+        if key == 'examples' and (not content or 'no examples' in content.lower()):
+            continue
+        yield key, css_class, heading, content
+
+
+def notes_to_html(sections: dict) -> str:
+    """Render the sections into structured HTML notes with proper styling"""
+    out = ['<div class="lecture-notes">', f'<h1 class="title">{escape(sections["title"])}</h1>']
+    for _, css_class, heading, content in _shown(sections):
+        out.append(f'<section class="{css_class}"><h2>{escape(heading)}</h2><div class="content">')
+        render_markdown_into(content, out)
+        out.append('</div></section>')
+    out.append('</div>')
+    return ''.join(out)
+
+
+def notes_to_markdown(sections: dict) -> str:
+    parts = [f"# {sections['title']}"]
+    for _, _, heading, content in _shown(sections):
+        parts.append(f"## {heading}\n\n{content.strip()}")
+    return '\n\n'.join(parts) + '\n'
+
+
+# Output formats: (whole document renderer, single section renderer, media type)
+FORMATS: Dict[str, Tuple[Callable[[dict], str], Callable[[str], str], str]] = {
+    'html': (notes_to_html, render_markdown, 'text/html'),
+    'markdown': (notes_to_markdown, lambda content: content.strip() + '\n', 'text/markdown'),
+}
+
+
+def render_notes(sections: dict, section: str = ALL_SECTIONS, fmt: str = 'html') -> str:
+    """Render one section, or the whole document, in the given format"""
+    document, single, _ = FORMATS[fmt]
+    if section == ALL_SECTIONS:
+        return document(sections)
+    return single(sections.get(section, ''))
+
+
+class NotesRenderCache:
+    """LRU of rendered notes keyed by (lecture, section, format, notes version).
+
+    Notes are stored only as their markdown sections, so every format is
+    rendered on demand; a new version of the notes simply misses the cache.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> Optional[str]:
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: tuple, value: str) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+notes_render_cache = NotesRenderCache(max_entries=int(os.getenv("NOTES_RENDER_CACHE_ENTRIES", "256")))
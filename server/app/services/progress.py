@@ -0,0 +1,95 @@
+import asyncio
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+TERMINAL_STATUSES = {"completed", "failed"}
+
+
+class LectureProgress:
+    """Live processing state for one lecture"""
+
+    def __init__(self):
+        self.status: Optional[str] = None
+        self.percent = 0.0
+        self.segments: List[dict] = []
+        # Job attempt the segments come from; bumping generation tells subscribers to start over
+        self.attempt: Optional[Tuple[int, int]] = None
+        self.generation = 0
+        self.changed = asyncio.Event()
+
+    def snapshot(self, since: int = 0, reset: bool = False) -> dict:
+        snapshot = {
+            "status": self.status,
+            "percent": round(self.percent, 1),
+            "segment_count": len(self.segments),
+            "segments": self.segments[since:],
+        }
+        if reset:
+            # The transcript restarted: segments replace everything sent before
+            snapshot["reset"] = True
+        return snapshot
+
+
+class ProgressHub:
+    """Fan-out of transcription progress to SSE subscribers"""
+
+    def __init__(self, retention_seconds: float = 300.0):
+        self.retention_seconds = retention_seconds
+        self._lectures: Dict[str, LectureProgress] = {}
+
+    def get(self, lecture_id: str) -> Optional[LectureProgress]:
+        return self._lectures.get(lecture_id)
+
+    def update(self, lecture_id: str, status: Optional[str] = None, percent: Optional[float] = None,
+               segments: Optional[List[dict]] = None, attempt: Optional[Tuple[int, int]] = None) -> None:
+        """Record new state and wake every subscriber of the lecture.
+
+        attempt is the (job id, attempt number) the segments belong to; segments of
+        an earlier attempt are dropped when it changes.
+        """
+        progress = self._lectures.setdefault(lecture_id, LectureProgress())
+        if attempt is not None and attempt != progress.attempt:
+            if progress.attempt is not None:
+                progress.segments = []
+                progress.generation += 1
+            progress.attempt = attempt
+        if status is not None:
+            progress.status = status
+        if percent is not None:
+            progress.percent = percent
+        if segments:
+            progress.segments.extend(segments)
+
+        changed, progress.changed = progress.changed, asyncio.Event()
+        changed.set()
+
+        if status in TERMINAL_STATUSES:
+            # Keep the final state around briefly for late subscribers
+            asyncio.get_running_loop().call_later(self.retention_seconds, self._lectures.pop, lecture_id, None)
+
+    async def subscribe(self, lecture_id: str, keepalive: float = 15.0) -> AsyncIterator[Optional[dict]]:
+        """Yield state deltas until the lecture reaches a terminal status.
+
+        ``None`` is yielded when nothing changed within ``keepalive`` seconds.
+        """
+        sent = 0
+        progress = self._lectures.setdefault(lecture_id, LectureProgress())
+        generation = progress.generation
+        while True:
+            waiter = progress.changed
+            reset = progress.generation != generation
+            if reset:
+                sent, generation = 0, progress.generation
+            snapshot = progress.snapshot(sent, reset)
+            sent = snapshot["segment_count"]
+            yield snapshot
+            if progress.status in TERMINAL_STATUSES:
+                return
+            while True:
+                try:
+                    await asyncio.wait_for(waiter.wait(), timeout=keepalive)
+                    break
+                except asyncio.TimeoutError:
+                    yield None
+
+
+progress_hub = ProgressHub()
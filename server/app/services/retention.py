@@ -0,0 +1,162 @@
+import os
+import time
+import asyncio
+import tempfile
+import subprocess
+from typing import Dict
+
+from dotenv import load_dotenv
+
+from ..repositories.lectures import LectureRepository, lecture_repository
+from .audio_index import COMPACTED, EVICTED, ORIGINAL, AudioIndex, AudioIndexEntry, audio_index
+from .audio_preprocessing import AudioPreprocessor, audio_preprocessor
+from .storage import StorageService, storage_service
+
+load_dotenv()
+
+KEEP = "keep"
+COMPACT = "compact"
+EVICT = "evict"
+
+
+class RetentionManager:
+    """Keeps stored audio and the PCM cache within their disk budgets.
+
+    Once an original has been transcribed and its preprocessed PCM is cached it is
+    no longer needed for processing. After retention_days, or sooner while stored
+    audio plus archives exceed max_bytes, it is compacted (re-encoded to low-bitrate
+    Opus, still playable) or evicted (deleted, leaving a low-bitrate Opus archive of
+    the preprocessed audio as the only copy, for transcribing it again).
+
+    Cached PCM can be decoded again from a stored original or an archive, so it is
+    trimmed least recently used first to pcm_max_bytes. In evict mode the PCM of
+    originals that are due to be evicted is kept, since the archive is made from it.
+    """
+
+    def __init__(self, mode: str = KEEP, retention_days: float = 30, max_bytes: int = 0,
+                 pcm_max_bytes: int = 0, compact_bitrate: str = "24k", interval: float = 3600,
+                 storage: StorageService = storage_service, index: AudioIndex = audio_index,
+                 preprocessor: AudioPreprocessor = audio_preprocessor,
+                 lectures: LectureRepository = lecture_repository):
+        if mode not in (KEEP, COMPACT, EVICT):
+            raise Exception(f"Unknown retention mode: {mode}")
+        self.mode = mode
+        self.retention_days = retention_days
+        self.max_bytes = max_bytes
+        self.pcm_max_bytes = pcm_max_bytes
+        self.compact_bitrate = compact_bitrate
+        self.interval = interval
+        self.storage = storage
+        self.index = index
+        self.preprocessor = preprocessor
+        self.lectures = lectures
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0 and (self.mode != KEEP or self.pcm_max_bytes > 0)
+
+    async def run_forever(self) -> None:
+        while True:
+            try:
+                result = await self.run_once()
+                if any(result.values()):
+                    print(f"Retention: {result}")
+            except Exception as e:
+                print(f"Error enforcing retention: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    async def run_once(self) -> Dict[str, int]:
+        result = {"compacted": 0, "evicted": 0, "freed_bytes": 0, "pcm_removed": 0}
+        if self.mode != KEEP:
+            await self._retain_originals(result)
+        if self.pcm_max_bytes:
+            await self._trim_pcm(result)
+        return result
+
+    async def _retain_originals(self, result: Dict[str, int]) -> None:
+        cutoff = time.time() - self.retention_days * 86400 if self.retention_days > 0 else float("-inf")
+        total = await self.index.stored_bytes()
+        for entry in await self.index.retention_candidates():
+            over_budget = self.max_bytes and total > self.max_bytes
+            if entry.stored_at > cutoff and not over_budget:
+                break  # candidates are oldest first
+            if not await self.preprocessor.exists(entry.digest) or await self.lectures.processing_audio(entry.digest):
+                continue
+            if self.mode == COMPACT:
+                freed = await self._compact(entry)
+                result["compacted"] += 1
+            else:
+                freed = await self._evict(entry)
+                result["evicted"] += 1 if freed else 0
+            result["freed_bytes"] += freed
+            total -= freed
+
+    def _encode(self, source_path: str, target_path: str) -> None:
+        subprocess.run(
+            ["ffmpeg", "-nostdin", "-y", "-loglevel", "error", "-i", source_path, "-vn", "-ac", "1",
+             "-c:a", "libopus", "-b:a", self.compact_bitrate, target_path],
+            check=True, capture_output=True,
+        )
+
+    async def _compact(self, entry: AudioIndexEntry) -> int:
+        """Replace an original with an Opus copy; returns the bytes saved"""
+        stem = os.path.splitext(os.path.basename(entry.audio_path))[0]
+        key = f"{stem}-{self.compact_bitrate}.ogg"
+        fd, target_path = tempfile.mkstemp(suffix=".ogg", dir=self.storage.staging_dir)
+        os.close(fd)
+        try:
+            async with self.storage.local_file(entry.audio_path) as source_path:
+                await asyncio.to_thread(self._encode, source_path, target_path)
+            size = await asyncio.to_thread(os.path.getsize, target_path)
+            if size >= entry.size:
+                # Already compressed better than the compact copy would be
+                await self.index.set_file(entry.digest, entry.audio_path, entry.size, COMPACTED)
+                return 0
+            await self.storage.put_local(target_path, key)
+        finally:
+            if os.path.exists(target_path):
+                os.remove(target_path)
+
+        # New uploads of this audio reuse the compact copy from here on
+        await self.index.set_file(entry.digest, key, size, COMPACTED)
+        await self.lectures.replace_audio(entry.audio_path, key)
+        await self.storage.delete_file(entry.audio_path)
+        return entry.size - size
+
+    async def _evict(self, entry: AudioIndexEntry) -> int:
+        """Replace an original with an archive of its preprocessed audio; returns the bytes saved"""
+        size = await self.preprocessor.archive(entry.digest, self.compact_bitrate)
+        if size >= entry.size:
+            # Already smaller than the archive would be, so the original stays
+            await self.preprocessor.remove_archive(entry.digest)
+            await self.index.set_file(entry.digest, entry.audio_path, entry.size, COMPACTED)
+            return 0
+        await self.storage.delete_file(entry.audio_path)
+        await self.index.set_file(entry.digest, entry.audio_path, size, EVICTED)
+        return entry.size - size
+
+    async def _trim_pcm(self, result: Dict[str, int]) -> None:
+        entries = await self.preprocessor.entries()
+        total = sum(size for _, size, _ in entries)
+        for digest, size, _ in entries:
+            if total <= self.pcm_max_bytes:
+                break
+            entry = await self.index.get(digest)
+            if entry is not None and self.mode == EVICT and entry.state == ORIGINAL:
+                continue
+            if await self.lectures.processing_audio(digest):
+                continue
+            await self.preprocessor.remove(digest, keep_archive=True)
+            total -= size
+            result["pcm_removed"] += 1
+
+
+retention_manager = RetentionManager(
+    mode=os.getenv("STORAGE_RETENTION_MODE", KEEP),
+    retention_days=float(os.getenv("STORAGE_RETENTION_DAYS", "30")),
+    max_bytes=int(os.getenv("STORAGE_MAX_BYTES", "0")),
+    # 0 leaves the PCM cache unbounded
+    pcm_max_bytes=int(os.getenv("AUDIO_CACHE_MAX_BYTES", str(20 * 1024 ** 3))),
+    compact_bitrate=os.getenv("STORAGE_COMPACT_BITRATE", "24k"),
+    interval=float(os.getenv("STORAGE_RETENTION_INTERVAL_SECONDS", "3600")),
+)
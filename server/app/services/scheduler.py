@@ -0,0 +1,79 @@
+import os
+import time
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from .metrics import llm_call
+
+load_dotenv()
+
+SectionJob = Tuple[str, Callable[[], Awaitable[str]]]
+# (section, seconds, time to first token or None when no request was made)
+SectionTiming = Tuple[str, float, Optional[float]]
+
+
+class SectionScheduler:
+    """Bounded fan-out for independent LLM section prompts.
+
+    A global semaphore caps the number of in-flight requests across every
+    lecture, while a semaphore shared by all concurrent runs of the same lecture
+    stops a single long lecture from taking all of the global slots.
+    """
+
+    def __init__(self, max_concurrency: int = 8, per_lecture_concurrency: int = 4):
+        self.max_concurrency = max_concurrency
+        self.per_lecture_concurrency = per_lecture_concurrency
+        self._global_limit = asyncio.Semaphore(max_concurrency)
+        self._latencies: Dict[str, List[SectionTiming]] = {}
+        # lecture id -> [semaphore, runs using it]
+        self._lecture_limits: Dict[str, list] = {}
+
+    def _acquire_lecture_limit(self, lecture_id: Optional[str]) -> asyncio.Semaphore:
+        if not lecture_id:
+            return asyncio.Semaphore(self.per_lecture_concurrency)
+        entry = self._lecture_limits.setdefault(lecture_id, [asyncio.Semaphore(self.per_lecture_concurrency), 0])
+        entry[1] += 1
+        return entry[0]
+
+    def _release_lecture_limit(self, lecture_id: Optional[str]) -> None:
+        entry = self._lecture_limits.get(lecture_id) if lecture_id else None
+        if entry is not None:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._lecture_limits[lecture_id]
+
+    async def run(self, jobs: List[SectionJob], lecture_id: Optional[str] = None) -> List[str]:
+        """Run section jobs concurrently and return results in submission order"""
+        lecture_limit = self._acquire_lecture_limit(lecture_id)
+        timings: List[SectionTiming] = []
+
+        async def run_one(name: str, factory: Callable[[], Awaitable[str]]) -> str:
+            async with lecture_limit:
+                async with self._global_limit:
+                    # Each job runs in its own task, so the record is private to this call
+                    call = {}
+                    llm_call.set(call)
+                    start = time.perf_counter()
+                    try:
+                        return await factory()
+                    finally:
+                        timings.append((name, time.perf_counter() - start, call.get("ttft")))
+
+        try:
+            return await asyncio.gather(*(run_one(name, factory) for name, factory in jobs))
+        finally:
+            self._release_lecture_limit(lecture_id)
+            if lecture_id:
+                self._latencies.setdefault(lecture_id, []).extend(timings)
+
+    def pop_latencies(self, lecture_id: str) -> List[SectionTiming]:
+        """Return and forget the recorded (section, seconds, time to first token) of a lecture"""
+        return self._latencies.pop(lecture_id, [])
+
+
+section_scheduler = SectionScheduler(
+    max_concurrency=int(os.getenv("NOTES_MAX_CONCURRENCY", "8")),
+    per_lecture_concurrency=int(os.getenv("NOTES_PER_LECTURE_CONCURRENCY", "4")),
+)
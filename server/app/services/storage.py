@@ -1,37 +1,160 @@
 import os
+import re
+import asyncio
 from fastapi import UploadFile
 from datetime import datetime
 import uuid
-import shutil
+import hashlib
+from typing import AsyncIterator, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from .metrics import UPLOAD_BYTES
+from .storage_backends import LocalDiskBackend, ObjectInfo, S3Backend, StorageBackend
+
+load_dotenv()
+
+UNSAFE_KEY_CHARS = re.compile(r'[^A-Za-z0-9_.-]')
+
+# (storage key, SHA-256 digest, size in bytes)
+StoredFile = Tuple[str, str, int]
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds the configured maximum size"""
+
+
+def _write_chunk(buffer, digest, chunk: bytes) -> None:
+    # hashlib and file writes release the GIL, so this runs truly off the event loop
+    digest.update(chunk)
+    buffer.write(chunk)
+
 
 class StorageService:
-    def __init__(self, upload_dir: str = "local_uploads"):
-        self.upload_dir = upload_dir
-        os.makedirs(self.upload_dir, exist_ok=True)
+    """Receives uploads into a local staging directory, hashing them on the way, and
+    hands complete files to the storage backend under a unique key"""
+
+    def __init__(self, backend: StorageBackend, staging_dir: str, chunk_size: int = 1024 * 1024,
+                 max_upload_bytes: Optional[int] = None):
+        self.backend = backend
+        self.staging_dir = staging_dir
+        self.chunk_size = chunk_size
+        self.max_upload_bytes = max_upload_bytes
+        os.makedirs(self.staging_dir, exist_ok=True)
 
-    async def upload_file(self, file: UploadFile, user_id: str) -> str:
-        """Save uploaded file locally and return the file path"""
+    @staticmethod
+    def _new_key(user_id: str, filename: str) -> str:
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        file_extension = os.path.splitext(file.filename)[1]
-        unique_filename = f"{user_id}_{timestamp}_{uuid.uuid4()}{file_extension}"
-        file_path = os.path.join(self.upload_dir, unique_filename)
+        file_extension = UNSAFE_KEY_CHARS.sub('', os.path.splitext(filename)[1])
+        return f"{UNSAFE_KEY_CHARS.sub('_', user_id)}_{timestamp}_{uuid.uuid4()}{file_extension}"
+
+    async def upload_file(self, file: UploadFile, user_id: str) -> StoredFile:
+        """Stream an upload to storage and return its key, SHA-256 digest and size.
+
+        Data is written in fixed-size chunks to a staging file that is handed to
+        the backend only once the whole upload has been received.
+        """
+        key = self._new_key(user_id, file.filename)
+        temp_path = os.path.join(self.staging_dir, f"{key}.part")
+
+        try:
+            digest = hashlib.sha256()
+            size = 0
+            buffer = await asyncio.to_thread(open, temp_path, "wb")
+            try:
+                while chunk := await file.read(self.chunk_size):
+                    size += len(chunk)
+                    if self.max_upload_bytes is not None and size > self.max_upload_bytes:
+                        raise UploadTooLargeError(f"Upload exceeds the {self.max_upload_bytes} byte limit")
+                    await asyncio.to_thread(_write_chunk, buffer, digest, chunk)
+            finally:
+                await asyncio.to_thread(buffer.close)
+
+            await self.backend.put(temp_path, key)
+            UPLOAD_BYTES.inc(size)
+            return key, digest.hexdigest(), size
+        except UploadTooLargeError:
+            await asyncio.to_thread(self._remove_quietly, temp_path)
+            raise
+        except Exception as e:
+            await asyncio.to_thread(self._remove_quietly, temp_path)
+            raise Exception(f"Error saving file: {str(e)}")
+
+    def _copy(self, source_path: str, temp_path: str) -> str:
+        digest = hashlib.sha256()
+        with open(source_path, "rb") as source, open(temp_path, "wb") as buffer:
+            while chunk := source.read(self.chunk_size):
+                _write_chunk(buffer, digest, chunk)
+        return digest.hexdigest()
 
+    async def import_file(self, source_path: str, user_id: str) -> StoredFile:
+        """Copy a file already on the server into storage; returns its key, SHA-256 digest and size"""
+        size = await asyncio.to_thread(os.path.getsize, source_path)
+        if self.max_upload_bytes is not None and size > self.max_upload_bytes:
+            raise UploadTooLargeError(f"File exceeds the {self.max_upload_bytes} byte limit")
+        key = self._new_key(user_id, source_path)
+        temp_path = os.path.join(self.staging_dir, f"{key}.part")
         try:
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-            
-            # Return the actual file path instead of URL
-            return file_path
+            digest = await asyncio.to_thread(self._copy, source_path, temp_path)
+            await self.backend.put(temp_path, key)
+            return key, digest, size
         except Exception as e:
-            raise Exception(f"Error saving file locally: {str(e)}")
-            
-    async def delete_file(self, file_path: str) -> None:
+            await asyncio.to_thread(self._remove_quietly, temp_path)
+            raise Exception(f"Error importing file: {str(e)}")
+
+    async def put_local(self, source_path: str, key: str) -> None:
+        """Move a file produced on this server, such as a re-encoded copy, into storage under key"""
+        await self.backend.put(source_path, key)
+
+    @staticmethod
+    def _remove_quietly(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    async def stat(self, key: str) -> Optional[ObjectInfo]:
+        return await self.backend.stat(key)
+
+    def read(self, key: str, start: int, end: int) -> AsyncIterator[bytes]:
+        """Stream the bytes from start to end (inclusive) of a stored file"""
+        return self.backend.read(key, start, end, self.chunk_size)
+
+    def local_file(self, key: str):
+        """Async context manager yielding a local path to a stored file, downloading it if needed"""
+        return self.backend.local_file(key)
+
+    async def delete_file(self, key: str) -> None:
         """Delete a file from storage"""
         try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
+            await self.backend.delete(key)
         except Exception as e:
             raise Exception(f"Error deleting file: {str(e)}")
 
+
+def _create_backend() -> StorageBackend:
+    kind = os.getenv("STORAGE_BACKEND", "local")
+    if kind == "local":
+        return LocalDiskBackend(
+            root=os.getenv("STORAGE_DIR", "local_uploads"),
+            shard_depth=int(os.getenv("STORAGE_SHARD_DEPTH", "2")),
+        )
+    if kind == "s3":
+        return S3Backend(
+            bucket=os.getenv("S3_BUCKET", "lecturemate"),
+            prefix=os.getenv("S3_PREFIX", ""),
+            endpoint_url=os.getenv("S3_ENDPOINT_URL"),  # e.g. http://localhost:9000 for MinIO
+            region=os.getenv("S3_REGION"),
+            download_dir=os.getenv("S3_DOWNLOAD_DIR", "local_cache/downloads"),
+        )
+    raise Exception(f"Unknown storage backend: {kind}")
+
+
 # Initialize the storage service
-storage_service = StorageService()
+storage_service = StorageService(
+    backend=_create_backend(),
+    # Inside the local root by default, so finished uploads are moved into place by a rename
+    staging_dir=os.getenv("STORAGE_STAGING_DIR", os.path.join(os.getenv("STORAGE_DIR", "local_uploads"), ".staging")),
+    chunk_size=int(os.getenv("UPLOAD_CHUNK_BYTES", str(1024 * 1024))),
+    max_upload_bytes=int(os.getenv("MAX_UPLOAD_BYTES", str(2 * 1024 * 1024 * 1024))),
+)
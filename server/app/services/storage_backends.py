@@ -0,0 +1,177 @@
+import os
+import shutil
+import asyncio
+import hashlib
+import tempfile
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+try:
+    import boto3
+    from botocore.config import Config as BotoConfig
+    from botocore.exceptions import ClientError
+except ImportError:  # only needed for the S3 backend
+    boto3 = None
+
+
+@dataclass
+class ObjectInfo:
+    size: int
+    modified: float  # unix time
+
+
+class StorageBackend(ABC):
+    """Where stored audio files live, addressed by key"""
+
+    @abstractmethod
+    async def put(self, source_path: str, key: str) -> None:
+        """Store a complete local file under key; the local file is consumed"""
+
+    @abstractmethod
+    async def stat(self, key: str) -> Optional[ObjectInfo]:
+        """Size and modification time, or None when the key does not exist"""
+
+    @abstractmethod
+    def read(self, key: str, start: int, end: int, chunk_size: int) -> AsyncIterator[bytes]:
+        """Yield the bytes from start to end (inclusive)"""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Delete a key; deleting a missing key is not an error"""
+
+    @abstractmethod
+    def local_file(self, key: str):
+        """Async context manager yielding a local path with the file's contents"""
+
+
+class LocalDiskBackend(StorageBackend):
+    """Files on local disk, sharded into nested directories by a hash of the key
+    so that no single directory grows to hundreds of thousands of entries"""
+
+    def __init__(self, root: str, shard_depth: int = 2):
+        self.root = root
+        self.shard_depth = shard_depth
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        if os.sep in key or "/" in key:
+            # Lectures stored before sharding reference their file by its relative path
+            return key
+        digest = hashlib.sha1(key.encode()).hexdigest()
+        shards = [digest[2 * i:2 * i + 2] for i in range(self.shard_depth)]
+        path = os.path.join(self.root, *shards, key)
+        flat = os.path.join(self.root, key)
+        if not os.path.exists(path) and os.path.exists(flat):
+            return flat
+        return path
+
+    def _put(self, source_path: str, key: str) -> None:
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # A rename when staging is on the same filesystem, a copy otherwise
+        shutil.move(source_path, path)
+
+    async def put(self, source_path: str, key: str) -> None:
+        await asyncio.to_thread(self._put, source_path, key)
+
+    async def stat(self, key: str) -> Optional[ObjectInfo]:
+        try:
+            result = await asyncio.to_thread(os.stat, self.path(key))
+        except FileNotFoundError:
+            return None
+        return ObjectInfo(size=result.st_size, modified=result.st_mtime)
+
+    async def read(self, key: str, start: int, end: int, chunk_size: int) -> AsyncIterator[bytes]:
+        f = await asyncio.to_thread(open, self.path(key), "rb")
+        try:
+            await asyncio.to_thread(f.seek, start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = await asyncio.to_thread(f.read, min(chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+        finally:
+            await asyncio.to_thread(f.close)
+
+    async def delete(self, key: str) -> None:
+        try:
+            await asyncio.to_thread(os.remove, self.path(key))
+        except FileNotFoundError:
+            pass
+
+    @asynccontextmanager
+    async def local_file(self, key: str):
+        yield self.path(key)
+
+
+class S3Backend(StorageBackend):
+    """An S3-compatible bucket, such as AWS S3 or a local MinIO server"""
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: Optional[str] = None,
+                 region: Optional[str] = None, download_dir: Optional[str] = None):
+        if boto3 is None:
+            raise Exception("The S3 storage backend requires boto3")
+        self.bucket = bucket
+        self.prefix = prefix
+        self.download_dir = download_dir
+        # boto3 clients are thread-safe, so one is shared by every to_thread call
+        self.client = boto3.client(
+            "s3", endpoint_url=endpoint_url, region_name=region,
+            config=BotoConfig(retries={"max_attempts": 5, "mode": "standard"}),
+        )
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    def _put(self, source_path: str, key: str) -> None:
+        try:
+            # Multipart and concurrent for large files
+            self.client.upload_file(source_path, self.bucket, self._key(key))
+        finally:
+            os.remove(source_path)
+
+    async def put(self, source_path: str, key: str) -> None:
+        await asyncio.to_thread(self._put, source_path, key)
+
+    async def stat(self, key: str) -> Optional[ObjectInfo]:
+        try:
+            head = await asyncio.to_thread(self.client.head_object, Bucket=self.bucket, Key=self._key(key))
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return ObjectInfo(size=head["ContentLength"], modified=head["LastModified"].timestamp())
+
+    async def read(self, key: str, start: int, end: int, chunk_size: int) -> AsyncIterator[bytes]:
+        response = await asyncio.to_thread(
+            self.client.get_object, Bucket=self.bucket, Key=self._key(key), Range=f"bytes={start}-{end}"
+        )
+        body = response["Body"]
+        try:
+            while chunk := await asyncio.to_thread(body.read, chunk_size):
+                yield chunk
+        finally:
+            body.close()
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self.client.delete_object, Bucket=self.bucket, Key=self._key(key))
+
+    @asynccontextmanager
+    async def local_file(self, key: str):
+        """Download to a temporary file that is removed afterwards"""
+        if self.download_dir:
+            os.makedirs(self.download_dir, exist_ok=True)
+        fd, path = tempfile.mkstemp(suffix=os.path.splitext(key)[1], dir=self.download_dir)
+        os.close(fd)
+        try:
+            await asyncio.to_thread(self.client.download_file, self.bucket, self._key(key), path)
+            yield path
+        finally:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
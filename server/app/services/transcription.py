@@ -1,38 +1,373 @@
 import whisper
 import os
-from typing import Tuple
+from typing import Callable, Dict, List, Optional, Tuple
+import time
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import multiprocessing
+from functools import partial
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import numpy as np
+from dotenv import load_dotenv
+
+from ..models.lecture import QualityTier
+from .audio_preprocessing import PreparedAudio
+from .transcription_policy import TranscriptionPolicy, policy_engine
+
+load_dotenv()
+
+SAMPLE_RATE = whisper.audio.SAMPLE_RATE
+
+# Receives newly finalized segments and the percent of audio transcribed
+ProgressCallback = Callable[[List[dict], float], None]
+
+# Model held by each worker process of the chunked transcription pool
+_worker_model = None
+
+
+def _init_worker(model_name: str, torch_threads: int) -> None:
+    """Preload a Whisper model once per worker process"""
+    global _worker_model
+    import torch
+    torch.set_num_threads(torch_threads)
+    _worker_model = whisper.load_model(model_name)
+
+
+def _worker_ready() -> bool:
+    """Runs in a worker to confirm its model finished loading"""
+    time.sleep(0.1)
+    return _worker_model is not None
+
+
+def _segments_from(model, audio: np.ndarray, offset: float, options: dict) -> List[dict]:
+    """Transcribe one audio segment and shift its timestamps by the segment offset"""
+    result = model.transcribe(audio, **options)
+    return [
+        {"start": seg["start"] + offset, "end": seg["end"] + offset, "text": seg["text"].strip()}
+        for seg in result["segments"]
+    ]
+
+
+def _transcribe_segment(audio: np.ndarray, offset: float, options: dict) -> List[dict]:
+    """Transcribe one audio segment with the worker's preloaded model"""
+    return _segments_from(_worker_model, audio, offset, options)
+
+
+def _transcribe_pcm_segment(pcm_path: str, lo: int, hi: int, options: dict) -> List[dict]:
+    """Transcribe samples lo:hi of a cached PCM file, memory-mapped instead of pickled over"""
+    return _segments_from(_worker_model, np.load(pcm_path, mmap_mode="c")[lo:hi], lo / SAMPLE_RATE, options)
+
+
+def find_split_points(audio: np.ndarray, segment_seconds: float, search_seconds: float = 10.0,
+                      frame_seconds: float = 0.03) -> List[int]:
+    """Pick cut positions (in samples) near every segment_seconds at the quietest frame.
+
+    Returns the boundaries including 0 and len(audio).
+    """
+    frame = int(frame_seconds * SAMPLE_RATE)
+    target = int(segment_seconds * SAMPLE_RATE)
+    search = int(search_seconds * SAMPLE_RATE)
+    cuts = [0]
+    while len(audio) - cuts[-1] > target + search:
+        lo = cuts[-1] + target - search
+        hi = cuts[-1] + target + search
+        window = audio[lo:hi]
+        frames = len(window) // frame
+        energy = np.square(window[:frames * frame].reshape(frames, frame)).mean(axis=1)
+        cuts.append(lo + int(np.argmin(energy)) * frame + frame // 2)
+    cuts.append(len(audio))
+    return cuts
+
+
+def _merge_overlap_text(previous: List[str], current: List[str], max_words: int = 20) -> List[str]:
+    """Drop the leading words of current that repeat the tail of previous"""
+    for size in range(min(max_words, len(previous), len(current)), 0, -1):
+        if [w.lower() for w in previous[-size:]] == [w.lower() for w in current[:size]]:
+            return current[size:]
+    return current
+
+
+class SegmentStitcher:
+    """Merges per-chunk segments in chunk order, keeping each segment only in the
+    chunk that owns its midpoint and dropping words repeated across the overlap"""
+
+    def __init__(self, cuts: List[int]):
+        self.cuts = cuts
+        self.segments: List[dict] = []
+        self._words: List[str] = []
+        self._next = 0
+
+    def add(self, segments: List[dict]) -> List[dict]:
+        """Stitch the next chunk's segments and return the ones that were kept"""
+        i = self._next
+        self._next += 1
+        last = len(self.cuts) - 2
+        owned_start = self.cuts[i] / SAMPLE_RATE
+        owned_end = self.cuts[i + 1] / SAMPLE_RATE
+        kept = []
+        for seg in segments:
+            midpoint = (seg["start"] + seg["end"]) / 2
+            if i > 0 and midpoint < owned_start:
+                continue
+            if i < last and midpoint >= owned_end:
+                continue
+            seg_words = seg["text"].split()
+            if self._words and i > 0 and seg["start"] < owned_start + 1.0:
+                seg_words = _merge_overlap_text(self._words, seg_words)
+            if not seg_words:
+                continue
+            kept.append({**seg, "text": " ".join(seg_words)})
+            self._words.extend(seg_words)
+        self.segments.extend(kept)
+        return kept
+
+
+def stitch_segments(results: List[List[dict]], cuts: List[int]) -> List[dict]:
+    """Merge the segments of every chunk into one timeline"""
+    stitcher = SegmentStitcher(cuts)
+    for segments in results:
+        stitcher.add(segments)
+    return stitcher.segments
+
+
+def parse_pool_spec(spec: str) -> List[str]:
+    """Expand a pool spec such as "base:2,tiny" into one model size per instance"""
+    sizes = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, count = part.partition(":")
+        sizes.extend([name.strip()] * int(count or 1))
+    return sizes
+
+
+class WhisperModelPool:
+    """Fixed set of preloaded Whisper models, possibly of different sizes, leased to one job at a time"""
+
+    def __init__(self, sizes: List[str]):
+        if not sizes:
+            raise ValueError("Whisper model pool needs at least one model")
+        self.sizes = sizes
+        self.ready = False
+        self._available: Dict[str, asyncio.Queue] = {}
+        self._warming: Optional[asyncio.Task] = None
+
+    @property
+    def default_size(self) -> str:
+        return self.sizes[0]
+
+    async def warm_up(self, executor: ThreadPoolExecutor) -> None:
+        """Load every model instance; concurrent callers wait for the same load"""
+        if self._warming is None:
+            self._warming = asyncio.ensure_future(self._load(executor))
+        try:
+            await asyncio.shield(self._warming)
+        except Exception:
+            # Let the next caller retry instead of re-raising a stale failure forever
+            if self._warming.done():
+                self._warming = None
+            raise
+
+    async def _load(self, executor: ThreadPoolExecutor) -> None:
+        loop = asyncio.get_event_loop()
+        print(f"Loading Whisper model pool: {', '.join(self.sizes)}")
+        models = await asyncio.gather(*(
+            loop.run_in_executor(executor, whisper.load_model, size) for size in self.sizes
+        ))
+        for size, model in zip(self.sizes, models):
+            self._available.setdefault(size, asyncio.Queue()).put_nowait(model)
+        self.ready = True
+        print("Whisper model pool loaded successfully")
+
+    def _resolve(self, size: Optional[str]) -> str:
+        return size if size in self._available else self.default_size
+
+    @asynccontextmanager
+    async def lease(self, size: Optional[str] = None):
+        """Borrow a model of the requested size (or the default size) until the block exits"""
+        queue = self._available[self._resolve(size)]
+        model = await queue.get()
+        try:
+            yield model
+        finally:
+            queue.put_nowait(model)
+
+    def status(self) -> Dict[str, dict]:
+        """Total and currently idle instances per model size"""
+        return {
+            size: {
+                "total": self.sizes.count(size),
+                "available": self._available[size].qsize() if size in self._available else 0,
+            }
+            for size in dict.fromkeys(self.sizes)
+        }
+
 
 class TranscriptionService:
-    def __init__(self):
-        self.model = None
-        self.executor = ThreadPoolExecutor(max_workers=1)
+    def __init__(self, model_name: str = "base", parallel_workers: int = 1,
+                 segment_seconds: float = 300.0, overlap_seconds: float = 2.0,
+                 pool_sizes: Optional[List[str]] = None):
+        self.model_name = model_name
+        self.pool = WhisperModelPool(pool_sizes or [model_name])
+        # One thread per pooled model plus one for audio decoding
+        self.executor = ThreadPoolExecutor(max_workers=len(self.pool.sizes) + 1)
+        self.parallel_workers = parallel_workers
+        self.segment_seconds = segment_seconds
+        self.overlap_seconds = overlap_seconds
+        self.process_pool = None
+        self.processes_ready = False
+        self.policy_engine = policy_engine
+
+    @property
+    def ready(self) -> bool:
+        return self.processes_ready if self.parallel_workers > 1 else self.pool.ready
 
     async def ensure_model_loaded(self):
-        """Ensure the model is loaded"""
-        if self.model is None:
-            print("Loading Whisper model...")
-            loop = asyncio.get_event_loop()
-            self.model = await loop.run_in_executor(self.executor, whisper.load_model, "base")
-            print("Whisper model loaded successfully")
+        """Ensure the models are loaded: the worker processes in parallel mode, the model pool otherwise.
 
-    async def transcribe(self, audio_path: str) -> Tuple[str, float]:
-        """Transcribe audio file and return transcript and duration"""
+        In parallel mode every segment goes to the worker processes, so no model
+        is loaded in this process.
+        """
+        if self.parallel_workers <= 1:
+            await self.pool.warm_up(self.executor)
+            return
+        if self.processes_ready:
+            return
+        pool = self._get_process_pool()
+        loop = asyncio.get_event_loop()
+        # Spawning happens on demand; overlapping tasks force every worker to start and load
+        await asyncio.gather(*(
+            loop.run_in_executor(pool, _worker_ready) for _ in range(self.parallel_workers)
+        ))
+        self.processes_ready = True
+
+    def status(self) -> Dict[str, dict]:
+        """Models per size: pooled instances, or worker processes in parallel mode"""
+        if self.parallel_workers > 1:
+            return {self.model_name: {"total": self.parallel_workers,
+                                      "processes": self.parallel_workers if self.processes_ready else 0}}
+        return self.pool.status()
+
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        """Start the worker pool, each worker holding its own preloaded model"""
+        if self.process_pool is None:
+            torch_threads = max(1, (os.cpu_count() or 1) // self.parallel_workers)
+            self.process_pool = ProcessPoolExecutor(
+                max_workers=self.parallel_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_name, torch_threads),
+            )
+        return self.process_pool
+
+    @property
+    def available_sizes(self) -> List[str]:
+        """Model sizes a policy can pick; worker processes all hold the configured model"""
+        if self.parallel_workers > 1:
+            return [self.model_name]
+        return list(dict.fromkeys(self.pool.sizes))
+
+    async def transcribe(self, audio_path: str, on_progress: Optional[ProgressCallback] = None) -> Tuple[str, float]:
+        """Transcribe audio file and return transcript and duration.
+
+        When on_progress is given, it is called with each batch of newly
+        finalized segments and the percent of audio transcribed so far.
+        """
+        transcript, duration, _ = await self.transcribe_with_policy(audio_path, on_progress=on_progress)
+        return transcript, duration
+
+    async def transcribe_with_policy(self, audio_path: str, tier: QualityTier = QualityTier.STANDARD,
+                                     backlog: int = 0, on_progress: Optional[ProgressCallback] = None,
+                                     prepared: Optional[PreparedAudio] = None
+                                     ) -> Tuple[str, float, TranscriptionPolicy]:
+        """Transcribe with the model and decoding options chosen for the audio length,
+        the transcription backlog and the requested quality tier.
+
+        With prepared audio, the cached PCM is memory-mapped instead of decoding
+        audio_path, and segment timestamps are mapped back to the original audio.
+        """
         try:
             await self.ensure_model_loaded()
-            print(f"Starting transcription of {audio_path}")
-            
             loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(self.executor, self.model.transcribe, audio_path)
-            
-            transcript = result["text"]
-            duration = result.get("duration", 0)
-            
+            if prepared is not None:
+                audio = prepared.load()
+                duration = prepared.duration
+            else:
+                audio = await loop.run_in_executor(self.executor, whisper.load_audio, audio_path)
+                duration = len(audio) / SAMPLE_RATE
+            policy = self.policy_engine.select(duration, backlog, tier, self.available_sizes)
+            print(f"Starting transcription of {audio_path} ({duration:.0f}s, backlog {backlog}) with policy {policy.name}")
+
+            if self.parallel_workers > 1:
+                transcript = await self._transcribe_segments(audio, None, policy, on_progress, prepared)
+            else:
+                async with self.pool.lease(policy.model_size) as model:
+                    if on_progress is None:
+                        result = await loop.run_in_executor(
+                            self.executor, partial(model.transcribe, audio, **policy.decode_options())
+                        )
+                        transcript = result["text"].strip()
+                    else:
+                        transcript = await self._transcribe_segments(audio, model, policy, on_progress, prepared)
+
             print(f"Transcription completed. Duration: {duration}s")
-            return transcript, duration
+            return transcript, duration, policy
         except Exception as e:
             print(f"Error during transcription: {str(e)}")
             raise Exception(f"Error transcribing audio: {str(e)}")
 
-transcription_service = TranscriptionService() 
\ No newline at end of file
+    async def _transcribe_segments(self, audio: np.ndarray, model, policy: TranscriptionPolicy,
+                                   on_progress: Optional[ProgressCallback],
+                                   prepared: Optional[PreparedAudio] = None) -> str:
+        """Transcribe quiet-point segments with the process pool, or one at a time with a leased model"""
+        loop = asyncio.get_event_loop()
+        cuts = find_split_points(audio, self.segment_seconds)
+        print(f"Chunked transcription: {len(cuts) - 1} segments, {self.parallel_workers} workers")
+
+        options = policy.decode_options()
+        overlap = int(self.overlap_seconds * SAMPLE_RATE)
+        bounds = [
+            (max(0, start - overlap), min(len(audio), end + overlap))
+            for start, end in zip(cuts[:-1], cuts[1:])
+        ]
+
+        if model is None:
+            pool = self._get_process_pool()
+            if prepared is not None:
+                # Workers map the cached PCM themselves rather than receiving pickled samples
+                pending = [
+                    loop.run_in_executor(pool, _transcribe_pcm_segment, prepared.pcm_path, lo, hi, options)
+                    for lo, hi in bounds
+                ]
+            else:
+                pending = [
+                    loop.run_in_executor(pool, _transcribe_segment, audio[lo:hi], lo / SAMPLE_RATE, options)
+                    for lo, hi in bounds
+                ]
+        else:
+            # A leased model is not thread-safe, so segments are submitted lazily, one at a time
+            pending = (
+                loop.run_in_executor(self.executor, _segments_from, model, audio[lo:hi], lo / SAMPLE_RATE, options)
+                for lo, hi in bounds
+            )
+
+        # Chunks may finish out of order; stitch and report them strictly in order
+        stitcher = SegmentStitcher(cuts)
+        for i, future in enumerate(pending):
+            kept = stitcher.add(await future)
+            if on_progress is not None:
+                if prepared is not None:
+                    kept = prepared.restore_timestamps(kept)
+                on_progress(kept, 100.0 * cuts[i + 1] / max(len(audio), 1))
+
+        return " ".join(seg["text"] for seg in stitcher.segments)
+
+transcription_service = TranscriptionService(
+    model_name=os.getenv("WHISPER_MODEL", "base"),
+    parallel_workers=int(os.getenv("WHISPER_PARALLEL_WORKERS", "1")),
+    segment_seconds=float(os.getenv("WHISPER_SEGMENT_SECONDS", "300")),
+    overlap_seconds=float(os.getenv("WHISPER_SEGMENT_OVERLAP_SECONDS", "2")),
+    pool_sizes=parse_pool_spec(os.getenv("WHISPER_MODEL_POOL", "")) or None,
+)
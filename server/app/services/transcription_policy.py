@@ -0,0 +1,84 @@
+import os
+from dataclasses import dataclass
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+from ..models.lecture import QualityTier
+
+load_dotenv()
+
+# Whisper model sizes from fastest to most accurate
+MODEL_LADDER = ["tiny", "base", "small", "medium", "large"]
+
+
+@dataclass(frozen=True)
+class TranscriptionPolicy:
+    tier: QualityTier
+    model_size: str
+    beam_size: Optional[int] = None  # None means greedy decoding
+    language: Optional[str] = None  # None lets Whisper detect the language
+
+    @property
+    def name(self) -> str:
+        decoding = f"beam{self.beam_size}" if self.beam_size else "greedy"
+        return f"{self.tier.value}:{self.model_size}:{decoding}"
+
+    def decode_options(self) -> dict:
+        """Keyword arguments for whisper's transcribe()"""
+        # fp16 is unsupported on CPU and only produces a warning and a fallback
+        options = {"fp16": False}
+        if self.beam_size:
+            options["beam_size"] = self.beam_size
+        if self.language:
+            options["language"] = self.language
+        return options
+
+
+class PolicyEngine:
+    """Chooses model size and decoding options from audio length, backlog and quality tier"""
+
+    def __init__(self, long_audio_seconds: float = 3600.0, backlog_threshold: int = 4,
+                 language: Optional[str] = None):
+        self.long_audio_seconds = long_audio_seconds
+        self.backlog_threshold = backlog_threshold
+        self.language = language
+
+    @staticmethod
+    def _nearest_available(size: str, available: List[str]) -> str:
+        """The requested size if loaded, else the largest smaller one, else the smallest loaded"""
+        if size in available:
+            return size
+        rank = MODEL_LADDER.index(size)
+        smaller = [s for s in available if s in MODEL_LADDER and MODEL_LADDER.index(s) < rank]
+        if smaller:
+            return max(smaller, key=MODEL_LADDER.index)
+        return min(available, key=lambda s: MODEL_LADDER.index(s) if s in MODEL_LADDER else len(MODEL_LADDER))
+
+    def select(self, duration: float, backlog: int, tier: QualityTier, available: List[str]) -> TranscriptionPolicy:
+        if tier == QualityTier.DRAFT:
+            size, beam_size = "tiny", None
+        elif tier == QualityTier.HIGH:
+            size, beam_size = "small", 5
+        else:
+            size, beam_size = "base", None
+
+        if tier != QualityTier.HIGH and backlog >= self.backlog_threshold:
+            # Under load, trade accuracy for throughput one model size down
+            size = MODEL_LADDER[max(0, MODEL_LADDER.index(size) - 1)]
+        if tier == QualityTier.HIGH and duration > self.long_audio_seconds:
+            beam_size = 2
+
+        return TranscriptionPolicy(
+            tier=tier,
+            model_size=self._nearest_available(size, available),
+            beam_size=beam_size,
+            language=self.language,
+        )
+
+
+policy_engine = PolicyEngine(
+    long_audio_seconds=float(os.getenv("WHISPER_LONG_AUDIO_SECONDS", "3600")),
+    backlog_threshold=int(os.getenv("WHISPER_BACKLOG_THRESHOLD", "4")),
+    language=os.getenv("WHISPER_LANGUAGE") or None,
+)
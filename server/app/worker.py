@@ -0,0 +1,334 @@
+"""Worker process that claims lecture processing stages from the job queue.
+
+Run one or more with ``python -m app.worker --stage transcribe --stage notes``;
+transcription and notes workers can be scaled independently. With
+``--metrics-port`` a worker serves its own /metrics for Prometheus to scrape.
+"""
+import os
+import json
+import time
+import uuid
+import socket
+import asyncio
+import argparse
+from datetime import datetime
+from typing import List, Optional
+
+from .models.lecture import ProcessingStatus, QualityTier
+from .repositories.database import database
+from .repositories.lectures import lecture_repository
+from .repositories.note_chunks import note_chunk_repository
+from .repositories.transcription_runs import transcription_run_repository
+from .services.audio_index import audio_index
+from .services.audio_preprocessing import audio_preprocessor
+from .services.job_queue import Job, JobQueue, LeaseLostError, job_queue
+from .services.llm_router import llm_router
+from .services.metrics import (
+    JOB_QUEUE_WAIT, JOB_SECONDS, JOBS, TRANSCRIBED_AUDIO, TRANSCRIPTION_RTF, registry, span,
+)
+from .services.notes import NotesPrefetch, notes_service
+from .services.notes_render import notes_version
+from .services.storage import storage_service
+from .services.transcription import transcription_service
+
+STAGES = ("transcribe", "notes")
+
+# Map transcript chunks into notes while transcription is still running (0 to disable)
+NOTES_OVERLAP = int(os.getenv("NOTES_OVERLAP", "1"))
+
+# Lecture status while each stage runs
+STAGE_STATUS = {
+    "transcribe": ProcessingStatus.TRANSCRIBING,
+    "notes": ProcessingStatus.GENERATING_NOTES,
+}
+
+
+class JobContext:
+    """Progress reported by a running stage, flushed to the queue by the heartbeat"""
+
+    def __init__(self):
+        self.progress: Optional[float] = None
+        self.partial: List[dict] = []
+        self.flushed = 0  # segments already sent to the queue
+        self.changed = asyncio.Event()
+        # Seconds per span, stored with the lecture when the stage succeeds
+        self.timings: dict = {}
+        # Set by the heartbeat when the job was cancelled or taken over by another worker
+        self.lease_lost = False
+
+    def report(self, segments: List[dict], percent: float) -> None:
+        self.partial.extend(segments)
+        self.progress = percent
+        self.changed.set()
+
+
+async def run_transcribe(job: Job, context: JobContext) -> dict:
+    """Transcribe the lecture audio, reusing a stored transcript of identical audio"""
+    digest = job.payload.get("audio_digest")
+    tier = QualityTier(job.payload.get("quality", QualityTier.STANDARD.value))
+    entry = await audio_index.get(digest) if digest and not job.payload.get("force") else None
+    if entry and entry.transcript is not None and tier != QualityTier.HIGH:
+        print(f"Reusing transcript for audio {digest}")
+        return {"transcript": entry.transcript, "duration": entry.duration, "policy": None}
+
+    # This job is itself part of the backlog
+    backlog = max(0, await job_queue.depth("transcribe") - 1)
+    # Decoded once and cached, so retries and upgrades skip ffmpeg and the trimmed silence
+    with span("preprocess", context.timings):
+        prepared = await audio_preprocessor.get(digest) if digest else None
+        if prepared is None:
+            # The original is only fetched from storage when no PCM is cached
+            async with storage_service.local_file(job.payload["audio_url"]) as audio_path:
+                prepared = await audio_preprocessor.prepare(audio_path, digest)
+    print(f"Starting transcription of audio file: {job.payload['audio_url']}")
+    use_cache = job.payload.get("use_cache", True)
+    prefetch = NotesPrefetch(notes_service, job.lecture_id, store=note_chunk_repository.add,
+                             use_cache=use_cache) if NOTES_OVERLAP else None
+
+    def report(segments: List[dict], percent: float) -> None:
+        context.report(segments, percent)
+        if prefetch is not None:
+            prefetch.add(segments)
+
+    start = time.perf_counter()
+    try:
+        with span("whisper", context.timings):
+            transcript, duration, policy = await transcription_service.transcribe_with_policy(
+                job.payload["audio_url"], tier=tier, backlog=backlog, on_progress=report, prepared=prepared
+            )
+    except BaseException:
+        if prefetch is not None:
+            prefetch.cancel()
+        raise
+    elapsed = time.perf_counter() - start
+    rtf = elapsed / duration if duration else 0
+    print(f"Transcription completed. Length: {len(transcript)} chars, Duration: {duration}s, "
+          f"RTF {rtf:.3f} ({policy.name})")
+    TRANSCRIPTION_RTF.observe(rtf, policy=policy.name)
+    TRANSCRIBED_AUDIO.inc(duration, policy=policy.name)
+    context.timings.update(audio_seconds=duration, rtf=rtf, policy=policy.name)
+    await transcription_run_repository.record(job.lecture_id, policy.name, duration, elapsed, backlog)
+    if prefetch is not None:
+        # Usually only the chunk completed by the last segments is still being mapped
+        with span("notes_prefetch_wait", context.timings):
+            mapped = await prefetch.finish(context.timings)
+        if mapped:
+            print(f"Mapped {len(mapped)} chunks of lecture {job.lecture_id} during transcription")
+    # Drafts are not worth reusing for later uploads of the same audio
+    if digest and tier != QualityTier.DRAFT:
+        await audio_index.set_transcript(digest, transcript, duration)
+    return {"transcript": transcript, "duration": duration, "policy": policy.name}
+
+
+async def run_notes(job: Job, context: JobContext) -> dict:
+    """Generate notes from the transcript, reusing the outputs of chunks that did not change"""
+    print(f"Generating notes for lecture {job.lecture_id}")
+    previous = await note_chunk_repository.get(job.lecture_id)
+    sections, chunks = await notes_service.generate_notes_incremental(
+        job.payload["transcript"], job.payload["title"], lecture_id=job.lecture_id, previous=previous,
+        use_cache=job.payload.get("use_cache", True), timings=context.timings,
+    )
+    await note_chunk_repository.replace(job.lecture_id, chunks)
+    print(f"Notes generation completed. Length: {sum(len(text) for text in sections.values())} chars")
+    if job.payload.get("audio_digest"):
+        await audio_index.set_notes(job.payload["audio_digest"], sections, job.payload["title"])
+    return {"sections": sections}
+
+
+HANDLERS = {
+    "transcribe": run_transcribe,
+    "notes": run_notes,
+}
+
+
+def next_stage(job: Job, result: dict):
+    """The stage queued after a job succeeds, if any"""
+    if job.stage == "transcribe":
+        return "notes", {
+            "transcript": result["transcript"],
+            "title": job.payload["title"],
+            "audio_digest": job.payload.get("audio_digest"),
+            "use_cache": job.payload.get("use_cache", True),
+        }
+    return None
+
+
+def lecture_fields(job: Job, result: dict) -> dict:
+    """Lecture columns written when a stage succeeds"""
+    if job.stage == "transcribe":
+        return {
+            "transcript": result["transcript"],
+            "duration": result["duration"],
+            "transcription_policy": result.get("policy"),
+            "transcribed_at": datetime.now().isoformat(),
+            "progress": 100,
+        }
+    return {
+        "sections": json.dumps(result["sections"]),
+        "notes_version": notes_version(result["sections"]),
+        "notes": None,  # HTML is rendered from the sections on request
+        "status": ProcessingStatus.COMPLETED,
+    }
+
+
+class Worker:
+    """Claims jobs for a set of stages and runs them while keeping their lease alive"""
+
+    def __init__(self, stages: List[str], queue: JobQueue = job_queue, poll_interval: float = 1.0):
+        self.stages = stages
+        self.queue = queue
+        self.poll_interval = poll_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._stopping = False
+
+    def stop(self) -> None:
+        self._stopping = True
+
+    async def run(self) -> None:
+        print(f"Worker {self.worker_id} started for stages {', '.join(self.stages)}")
+        while not self._stopping:
+            try:
+                abandoned: List[str] = []
+                job = await self.queue.claim(self.stages, self.worker_id, abandoned=abandoned)
+                for lecture_id in abandoned:
+                    print(f"Giving up on lecture {lecture_id}: its worker stopped responding too often")
+                    await lecture_repository.update(lecture_id, status=ProcessingStatus.FAILED)
+                if job is None:
+                    await asyncio.sleep(self.poll_interval)
+                    continue
+                await self.run_job(job)
+            except Exception as e:
+                # One job must never take the worker down with it
+                print(f"Worker {self.worker_id} error: {str(e)}")
+                await asyncio.sleep(self.poll_interval)
+
+    async def run_job(self, job: Job) -> None:
+        print(f"Worker {self.worker_id} running {job.stage} for lecture {job.lecture_id} (attempt {job.attempts})")
+        context = JobContext()
+        context.timings["queue_wait"] = max(0.0, time.time() - job.available_at)
+        JOB_QUEUE_WAIT.observe(context.timings["queue_wait"], stage=job.stage)
+        await lecture_repository.update(job.lecture_id, status=STAGE_STATUS[job.stage])
+        handler = asyncio.create_task(HANDLERS[job.stage](job, context))
+        heartbeat = asyncio.create_task(self._heartbeat(job, context, handler))
+        start = time.perf_counter()
+        try:
+            result = await handler
+            context.timings["total"] = time.perf_counter() - start
+            heartbeat.cancel()
+            # Results of a job that was cancelled or taken over meanwhile are dropped
+            if not await self.queue.heartbeat(job.id, self.worker_id):
+                raise LeaseLostError(f"Lease on job {job.id} was lost")
+            await lecture_repository.set_timings(job.lecture_id, job.stage, context.timings)
+            await lecture_repository.update(job.lecture_id, **lecture_fields(job, result))
+            await self.queue.complete(job.id, self.worker_id, result, next_stage=next_stage(job, result))
+        except asyncio.CancelledError:
+            if not context.lease_lost:
+                raise
+            self._lost(job, start)
+            return
+        except LeaseLostError:
+            self._lost(job, start)
+            return
+        except Exception as e:
+            try:
+                retry = await self.queue.fail(job.id, self.worker_id, str(e))
+            except LeaseLostError:
+                self._lost(job, start)
+                return
+            outcome = "retried" if retry else "failed"
+            JOB_SECONDS.observe(time.perf_counter() - start, stage=job.stage, outcome=outcome)
+            JOBS.inc(stage=job.stage, outcome=outcome)
+            print(f"Error in {job.stage} for lecture {job.lecture_id}: {str(e)} ({'will retry' if retry else 'giving up'})")
+            if not retry:
+                await lecture_repository.update(job.lecture_id, status=ProcessingStatus.FAILED)
+            return
+        finally:
+            heartbeat.cancel()
+            handler.cancel()
+        JOB_SECONDS.observe(context.timings["total"], stage=job.stage, outcome="succeeded")
+        JOBS.inc(stage=job.stage, outcome="succeeded")
+        if job.stage == "notes":
+            print(f"Lecture {job.lecture_id} processing completed successfully")
+
+    def _lost(self, job: Job, start: float) -> None:
+        JOB_SECONDS.observe(time.perf_counter() - start, stage=job.stage, outcome="lost")
+        JOBS.inc(stage=job.stage, outcome="lost")
+        print(f"Dropping {job.stage} result for lecture {job.lecture_id}: the job was cancelled or its lease expired")
+
+    async def _heartbeat(self, job: Job, context: JobContext, handler: asyncio.Task) -> None:
+        """Renew the lease periodically and push progress as soon as it is reported.
+
+        Once the lease is lost the handler is cancelled, so a cancelled or
+        reassigned job stops using Whisper and the LLM and writing to the lecture.
+        """
+        interval = self.queue.lease_seconds / 3
+        while True:
+            try:
+                await asyncio.wait_for(context.changed.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            context.changed.clear()
+            partial = list(context.partial)
+            try:
+                held = await self.queue.heartbeat(job.id, self.worker_id, progress=context.progress,
+                                                  segments=partial[context.flushed:], first_index=context.flushed)
+            except Exception as e:
+                print(f"Heartbeat of job {job.id} failed: {str(e)}")
+                continue
+            if not held:
+                context.lease_lost = True
+                handler.cancel()
+                return
+            new_segments = len(partial) > context.flushed
+            context.flushed = len(partial)
+            if new_segments:
+                # Expose the transcript as it grows instead of only at the end
+                await lecture_repository.update(
+                    job.lecture_id,
+                    progress=context.progress,
+                    transcript=" ".join(seg["text"] for seg in partial),
+                    transcribed_at=None,
+                )
+
+
+async def serve_metrics(port: int):
+    """Serve this worker's metrics registry; returns the runner to clean up"""
+    from aiohttp import web
+
+    async def metrics(request: web.Request) -> web.Response:
+        return web.Response(text=registry.render(), content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/metrics", metrics)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "0.0.0.0", port).start()
+    print(f"Serving worker metrics on port {port}")
+    return runner
+
+
+async def main(stages: List[str], concurrency: int, metrics_port: Optional[int] = None) -> None:
+    metrics_runner = await serve_metrics(metrics_port) if metrics_port else None
+    await llm_router.start()
+    if "transcribe" in stages:
+        # Claim nothing until the models are warm so the first job does not pay for loading
+        await transcription_service.ensure_model_loaded()
+    workers = [Worker(stages) for _ in range(concurrency)]
+    try:
+        await asyncio.gather(*(worker.run() for worker in workers))
+    finally:
+        await llm_router.close()
+        job_queue.close()
+        audio_index.close()
+        await database.close()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LectureMate processing worker")
+    parser.add_argument("--stage", action="append", choices=STAGES, help="stage to process (repeatable, default: all)")
+    parser.add_argument("--concurrency", type=int, default=1, help="jobs processed at once by this process")
+    parser.add_argument("--metrics-port", type=int, help="serve Prometheus metrics on this port")
+    args = parser.parse_args()
+    asyncio.run(main(args.stage or list(STAGES), args.concurrency, args.metrics_port))
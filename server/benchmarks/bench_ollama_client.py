@@ -0,0 +1,66 @@
+"""Compare the pooled OllamaClient with a fresh ClientSession per call.
+
+Usage: ``python -m benchmarks.bench_ollama_client --requests 200 --concurrency 16``
+"""
+import time
+import asyncio
+import argparse
+import statistics
+
+import aiohttp
+
+from app.services.llm_client import OllamaClient
+from benchmarks.stub_ollama import StubOllama, start_stub_server
+
+
+async def per_call_session(url: str, payload: dict) -> str:
+    """The pre-pool behaviour: one session (and connection) per prompt"""
+    async with aiohttp.ClientSession() as session:
+        async with session.post(url, json=payload) as response:
+            result = await response.json()
+            return result.get("response", "")
+
+
+async def run(label: str, call, requests: int, concurrency: int) -> None:
+    limit = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i: int):
+        async with limit:
+            start = time.perf_counter()
+            await call(i)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{label:>12}: {requests / elapsed:8.1f} req/s  p50={statistics.median(latencies) * 1000:7.2f}ms  p95={p95 * 1000:7.2f}ms")
+
+
+async def main(args) -> None:
+    stub = StubOllama(latency=args.latency, tokens_per_second=0, response_tokens=args.tokens)
+    runner, url = await start_stub_server(stub)
+    payload = {"model": "stub", "prompt": "benchmark prompt", "stream": False}
+    try:
+        await run("per-call", lambda i: per_call_session(url, payload), args.requests, args.concurrency)
+
+        client = OllamaClient(url, pool_size=args.concurrency)
+        await client.start()
+        try:
+            await run("pooled", lambda i: client.generate(payload), args.requests, args.concurrency)
+            await run("pooled+stream", lambda i: client.generate({**payload, "stream": True}), args.requests, args.concurrency)
+        finally:
+            await client.close()
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--tokens", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,209 @@
+"""End-to-end pipeline benchmark: upload to completed notes for concurrent lectures.
+
+Runs the real app with uvicorn in a scratch directory, with its embedded workers,
+job queue and notes pipeline, against StubTranscriber (configurable real-time
+factor) and local StubOllama hosts (configurable latency and tokens/s) behind
+the LLM router. Nothing is downloaded and no model is loaded, so runs are
+reproducible offline.
+
+Lectures cycle through the given lengths, are uploaded at once and polled until
+they finish. Reports p50/p95 latency, throughput, the mean time per pipeline
+span and peak memory; ``--output`` also writes the results as JSON.
+
+Usage: ``python -m benchmarks.bench_pipeline --lectures 8 --lengths 300 900 1800 --rtf 0.02``
+       ``python -m benchmarks.bench_pipeline --llm-hosts 3 --llm-api openai --llm-batch 8``
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import resource
+import tempfile
+import statistics
+
+import aiohttp
+import uvicorn
+
+from benchmarks.stub_ollama import StubOllama, start_stub_server
+
+
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[max(0, int(round(len(values) * q)) - 1)]
+
+
+def rss_mb() -> float:
+    """Current resident memory of this process"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    # Kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+async def run_lecture(session: aiohttp.ClientSession, base_url: str, path: str, index: int,
+                      poll_interval: float) -> dict:
+    """Upload one lecture and wait for it to finish; returns its latency and timings"""
+    start = time.perf_counter()
+    form = aiohttp.FormData()
+    form.add_field("file", open(path, "rb"), filename=os.path.basename(path), content_type="audio/wav")
+    form.add_field("folder_id", "benchmark")
+    form.add_field("title", f"Benchmark lecture {index}")
+    form.add_field("user_id", f"bench_user_{index}")
+    async with session.post(f"{base_url}/api/lectures/upload", data=form) as response:
+        if response.status != 200:
+            raise Exception(f"Upload {index} failed with {response.status}: {await response.text()}")
+        lecture_id = (await response.json())["id"]
+
+    while True:
+        async with session.get(f"{base_url}/api/lectures/{lecture_id}/progress") as response:
+            status = (await response.json())["status"]
+        if status in ("completed", "failed"):
+            break
+        await asyncio.sleep(poll_interval)
+    latency = time.perf_counter() - start
+
+    async with session.get(f"{base_url}/api/lectures/{lecture_id}", params={"timings": "true"}) as response:
+        lecture = await response.json()
+    return {"status": status, "latency": latency, "duration": lecture["duration"],
+            "timings": lecture.get("timings") or {}}
+
+
+def span_means(results: list) -> dict:
+    """Mean seconds of every numeric timing per stage across lectures"""
+    spans = {}
+    for result in results:
+        for stage, timings in result["timings"].items():
+            for name, value in timings.items():
+                if isinstance(value, (int, float)) and name not in ("audio_seconds", "rtf"):
+                    spans.setdefault(f"{stage}.{name}", []).append(value)
+    return {name: statistics.mean(values) for name, values in sorted(spans.items())}
+
+
+async def main(args) -> None:
+    stubs, runners, backends = [], [], []
+    for _ in range(args.llm_hosts):
+        stub = StubOllama(args.llm_latency, args.llm_tokens_per_second, args.llm_response_tokens)
+        runner, url = await start_stub_server(stub)
+        if args.llm_api == "openai":
+            backends.append(f"{url.replace('/api/generate', '/v1/completions')};api=openai;batch={args.llm_batch}")
+        else:
+            backends.append(url)
+        stubs.append(stub)
+        runners.append(runner)
+    os.environ["LLM_BACKENDS"] = ",".join(backends)
+
+    # Imported only now that the environment points at the scratch directory and the stub
+    from app.main import app
+    from benchmarks.stub_whisper import StubTranscriber, write_wav
+
+    transcriber = StubTranscriber(rtf=args.rtf, words_per_minute=args.words_per_minute,
+                                  seed=args.seed, decode=args.decode)
+    transcriber.install()
+
+    os.makedirs("audio", exist_ok=True)
+    paths = []
+    for i in range(args.lectures):
+        # Distinct lengths and content, so neither duplicate detection nor the LLM cache kicks in
+        seconds = args.lengths[i % len(args.lengths)] + i
+        path = os.path.join("audio", f"lecture_{i}.wav")
+        await asyncio.to_thread(write_wav, path, seconds, args.seed * 1000 + i)
+        paths.append(path)
+
+    config = uvicorn.Config(app, host="127.0.0.1", port=args.port, log_level="warning")
+    server = uvicorn.Server(config)
+    serve = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    try:
+        baseline = rss_mb()
+        async with aiohttp.ClientSession() as session:
+            start = time.perf_counter()
+            results = await asyncio.gather(*(
+                run_lecture(session, base_url, path, i, args.poll_interval) for i, path in enumerate(paths)
+            ))
+            makespan = time.perf_counter() - start
+    finally:
+        server.should_exit = True
+        await serve
+        for runner in runners:
+            await runner.cleanup()
+
+    completed = [r for r in results if r["status"] == "completed"]
+    latencies = [r["latency"] for r in completed]
+    audio_seconds = sum(r["duration"] for r in completed)
+    summary = {
+        "lectures": args.lectures,
+        "completed": len(completed),
+        "makespan_seconds": makespan,
+        "p50_seconds": statistics.median(latencies) if latencies else None,
+        "p95_seconds": percentile(latencies, 0.95) if latencies else None,
+        "max_seconds": max(latencies) if latencies else None,
+        "lectures_per_minute": len(completed) * 60 / makespan,
+        "audio_speedup": audio_seconds / makespan,
+        "llm_requests": [stub.requests for stub in stubs],
+        "llm_prompts": sum(stub.prompts for stub in stubs),
+        "rss_baseline_mb": baseline,
+        "rss_peak_mb": peak_rss_mb(),
+        "spans": span_means(completed),
+    }
+
+    print(f"{len(completed)}/{args.lectures} lectures completed in {makespan:.2f}s "
+          f"({summary['lectures_per_minute']:.1f} lectures/min, {summary['audio_speedup']:.1f}x real time)")
+    if latencies:
+        print(f"latency: p50={summary['p50_seconds']:.2f}s  p95={summary['p95_seconds']:.2f}s  "
+              f"max={summary['max_seconds']:.2f}s")
+    print(f"LLM prompts: {summary['llm_prompts']} in {sum(summary['llm_requests'])} requests "
+          f"(per host: {summary['llm_requests']}), audio transcribed: {transcriber.transcribed_seconds:.0f}s")
+    print(f"memory: baseline {baseline:.0f} MB RSS, peak {summary['rss_peak_mb']:.0f} MB RSS")
+    for name, seconds in summary["spans"].items():
+        print(f"{name:>32}: {seconds:8.3f}s mean")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"args": vars(args), "results": summary}, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lectures", type=int, default=8)
+    parser.add_argument("--lengths", type=float, nargs="+", default=[300, 900, 1800],
+                        help="lecture lengths in seconds, cycled over the lectures")
+    parser.add_argument("--rtf", type=float, default=0.02, help="stub transcription seconds per second of audio")
+    parser.add_argument("--words-per-minute", type=float, default=150)
+    parser.add_argument("--decode", action="store_true", help="decode uploads with the real preprocessor (needs ffmpeg)")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="stub LLM seconds before the first token")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=100.0)
+    parser.add_argument("--llm-response-tokens", type=int, default=50)
+    parser.add_argument("--llm-hosts", type=int, default=1, help="stub LLM hosts behind the router")
+    parser.add_argument("--llm-api", choices=["ollama", "openai"], default="ollama",
+                        help="openai serves batched /v1/completions instead of streamed /api/generate")
+    parser.add_argument("--llm-batch", type=int, default=8, help="prompts per request with --llm-api openai")
+    parser.add_argument("--workers", type=int, default=2, help="embedded processing workers")
+    parser.add_argument("--poll-interval", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+    if args.output:
+        args.output = os.path.abspath(args.output)
+
+    # Run against throwaway storage and databases, without quotas getting in the way
+    sys.path.insert(0, os.getcwd())
+    os.chdir(tempfile.mkdtemp(prefix="lecturemate-bench-"))
+    os.environ["JOB_EMBEDDED_WORKERS"] = str(args.workers)
+    os.environ.setdefault("ADMISSION_INTERACTIVE_BURST", "0")
+    os.environ.setdefault("ADMISSION_MAX_QUEUED", "0")
+    asyncio.run(main(args))
@@ -0,0 +1,94 @@
+"""Time notes rendering per KB of generated markdown, against the previous per-line regex formatter.
+
+Usage: ``python -m benchmarks.bench_render --sizes 10 100 1000 --repeat 20``
+"""
+import re
+import time
+import random
+import argparse
+
+from app.services.notes_render import notes_to_html
+
+WORDS = ("lecture entropy gradient theorem proof example model variance function market "
+         "protein neuron policy vector matrix equilibrium hypothesis data signal").split()
+
+
+def sentence(rng: random.Random) -> str:
+    words = rng.choices(WORDS, k=rng.randint(6, 18))
+    for _ in range(rng.randint(0, 2)):
+        i = rng.randrange(len(words))
+        words[i] = rng.choice(("**{}**", "*{}*", "`{}`", "**{} *x* {}**")).format(words[i], words[i])
+    return " ".join(words).capitalize() + rng.choice((".", ".", "?", " < 5 & done."))
+
+
+def section(rng: random.Random, kb: float) -> str:
+    """Markdown mixing headings, paragraphs and (nested) lists, roughly kb kilobytes long"""
+    parts = []
+    while sum(len(p) for p in parts) < kb * 1024:
+        kind = rng.random()
+        if kind < 0.1:
+            parts.append(f"### {sentence(rng)}")
+        elif kind < 0.5:
+            parts.append(" ".join(sentence(rng) for _ in range(rng.randint(2, 5))))
+        else:
+            items = []
+            for _ in range(rng.randint(2, 6)):
+                items.append(f"* {sentence(rng)}")
+                if rng.random() < 0.3:
+                    items.append(f"    - {sentence(rng)}")
+            parts.append("\n".join(items))
+    return "\n\n".join(parts)
+
+
+def legacy_inline(text: str) -> str:
+    """The previous formatting: recompiled, non-greedy patterns run per paragraph or line"""
+    text = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', text)
+    text = re.sub(r'\*(.*?)\*', r'<em>\1</em>', text)
+    text = re.sub(r'^##\s+(.*?)$', r'<h2>\1</h2>', text, flags=re.MULTILINE)
+    return re.sub(r'^###\s+(.*?)$', r'<h3>\1</h3>', text, flags=re.MULTILINE)
+
+
+def legacy_format(sections: dict) -> str:
+    out = ""
+    for key in ("overview", "key_concepts", "main_points", "examples", "summary"):
+        if key in ("overview", "summary"):
+            body = "\n".join(f"<p>{legacy_inline(p)}</p>" for p in sections[key].split("\n\n") if p.strip())
+        else:
+            body = "\n".join(f"<li>{legacy_inline(line.strip())}</li>" for line in sections[key].split("\n") if line.strip())
+        out += f"""
+        <section><h2>{key}</h2><div class="content">
+            {body}
+        </div></section>
+        """
+    return out
+
+
+def timed(label: str, render, sections: dict, repeat: int, kb: float) -> float:
+    render(sections)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        html = render(sections)
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label:>8}: {elapsed * 1000:9.2f} ms/render, {elapsed * 1e6 / kb:8.1f} us/KB, {len(html) / 1024:8.0f} KB out")
+    return elapsed
+
+
+def main(args) -> None:
+    rng = random.Random(args.seed)
+    for size in args.sizes:
+        sections = {key: section(rng, size / 5) for key in
+                    ("overview", "key_concepts", "main_points", "examples", "summary")}
+        sections["title"] = "Benchmark <Lecture>"
+        kb = sum(len(v) for v in sections.values()) / 1024
+        print(f"notes of {kb:.0f} KB")
+        new = timed("renderer", notes_to_html, sections, args.repeat, kb)
+        old = timed("legacy", legacy_format, sections, args.repeat, kb)
+        print(f" speedup: {old / new:.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=float, nargs="+", default=[10, 100, 1000], help="note sizes in KB")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    main(parser.parse_args())
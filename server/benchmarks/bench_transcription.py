@@ -0,0 +1,47 @@
+"""Compare single-call Whisper transcription with the chunked process-pool path.
+
+Usage: ``python -m benchmarks.bench_transcription lecture.mp3 --workers 4 --segment-seconds 120``
+"""
+import time
+import asyncio
+import argparse
+
+from app.services.transcription import TranscriptionService
+
+
+async def timed(label: str, service: TranscriptionService, audio_path: str) -> float:
+    start = time.perf_counter()
+    transcript, duration = await service.transcribe(audio_path)
+    elapsed = time.perf_counter() - start
+    rtf = elapsed / duration if duration else float("nan")
+    print(f"{label:>10}: {elapsed:8.1f}s wall, audio {duration:.0f}s, RTF {rtf:.3f}, {len(transcript)} chars")
+    return elapsed
+
+
+async def main(args) -> None:
+    single = TranscriptionService(model_name=args.model)
+    await single.ensure_model_loaded()
+    baseline = await timed("single", single, args.audio)
+
+    chunked = TranscriptionService(
+        model_name=args.model,
+        parallel_workers=args.workers,
+        segment_seconds=args.segment_seconds,
+        overlap_seconds=args.overlap_seconds,
+    )
+    # Start every worker and load its model so that loading is not counted as transcription time
+    await chunked.ensure_model_loaded()
+    elapsed = await timed("chunked", chunked, args.audio)
+    chunked.process_pool.shutdown()
+
+    print(f"speedup: {baseline / elapsed:.2f}x with {args.workers} workers")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("audio")
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--segment-seconds", type=float, default=120.0)
+    parser.add_argument("--overlap-seconds", type=float, default=2.0)
+    asyncio.run(main(parser.parse_args()))
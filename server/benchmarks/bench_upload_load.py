@@ -0,0 +1,96 @@
+"""Measure API latency while many large uploads are in flight.
+
+Starts the real app with uvicorn in a scratch directory (processing workers
+disabled), fires concurrent multipart uploads and probes ``GET /`` every few
+milliseconds, then reports probe latency with and without upload load.
+
+Usage: ``python -m benchmarks.bench_upload_load --uploads 16 --size-mb 64``
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+import aiohttp
+import uvicorn
+
+
+async def probe(session: aiohttp.ClientSession, base_url: str, stop: asyncio.Event, interval: float) -> list:
+    latencies = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        async with session.get(f"{base_url}/") as response:
+            await response.read()
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+def report(label: str, latencies: list) -> None:
+    latencies = sorted(latencies)
+    p99 = latencies[max(0, int(len(latencies) * 0.99) - 1)]
+    print(f"{label:>14}: n={len(latencies):5d}  p50={statistics.median(latencies) * 1000:7.2f}ms  "
+          f"p99={p99 * 1000:7.2f}ms  max={latencies[-1] * 1000:7.2f}ms")
+
+
+async def upload(session: aiohttp.ClientSession, base_url: str, payload: bytes, index: int) -> int:
+    form = aiohttp.FormData()
+    form.add_field("file", payload, filename=f"load_{index}.wav", content_type="audio/wav")
+    form.add_field("folder_id", "benchmark")
+    form.add_field("title", f"Load test {index}")
+    async with session.post(f"{base_url}/api/lectures/upload", data=form) as response:
+        await response.read()
+        return response.status
+
+
+async def main(args) -> None:
+    from app.main import app
+
+    config = uvicorn.Config(app, host="127.0.0.1", port=args.port, log_level="warning")
+    server = uvicorn.Server(config)
+    serve = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    try:
+        async with aiohttp.ClientSession() as session:
+            idle_stop = asyncio.Event()
+            idle = asyncio.create_task(probe(session, base_url, idle_stop, args.probe_interval))
+            await asyncio.sleep(2)
+            idle_stop.set()
+            report("idle", await idle)
+
+            # Distinct payloads so duplicate detection does not short-circuit the writes
+            payloads = [os.urandom(1024) * (args.size_mb * 1024) for _ in range(args.uploads)]
+            stop = asyncio.Event()
+            loaded = asyncio.create_task(probe(session, base_url, stop, args.probe_interval))
+            start = time.perf_counter()
+            statuses = await asyncio.gather(*(upload(session, base_url, p, i) for i, p in enumerate(payloads)))
+            elapsed = time.perf_counter() - start
+            stop.set()
+            report("during uploads", await loaded)
+
+            total_mb = args.uploads * args.size_mb
+            print(f"uploaded {total_mb} MB in {elapsed:.2f}s ({total_mb / elapsed:.1f} MB/s), statuses: {sorted(set(statuses))}")
+    finally:
+        server.should_exit = True
+        await serve
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--uploads", type=int, default=16)
+    parser.add_argument("--size-mb", type=int, default=64)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--probe-interval", type=float, default=0.01)
+    args = parser.parse_args()
+
+    # Run against throwaway storage and keep uploads from being processed
+    sys.path.insert(0, os.getcwd())
+    os.chdir(tempfile.mkdtemp(prefix="lecturemate-bench-"))
+    os.environ.setdefault("JOB_EMBEDDED_WORKERS", "0")
+    asyncio.run(main(args))
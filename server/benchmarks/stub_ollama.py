@@ -0,0 +1,101 @@
+"""Local stand-in for an Ollama /api/generate endpoint, and for an OpenAI-compatible
+/v1/completions endpoint that takes a batch of prompts per request.
+
+Run standalone with ``python -m benchmarks.stub_ollama --port 11434`` and point
+``OLLAMA_API_URL`` (or an entry of ``LLM_BACKENDS``) at it, or start it
+in-process with ``start_stub_server``.
+"""
+import json
+import random
+import asyncio
+import argparse
+
+from aiohttp import web
+
+
+class StubOllama:
+    """Deterministic fake LLM with configurable latency, throughput and failures"""
+
+    def __init__(self, latency: float = 0.05, tokens_per_second: float = 200.0,
+                 response_tokens: int = 50, failure_rate: float = 0.0):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.response_tokens = response_tokens
+        self.failure_rate = failure_rate
+        self.requests = 0
+        self.prompts = 0
+
+    def _tokens(self, prompt: str) -> list[str]:
+        words = prompt.split() or ["notes"]
+        return [f"{words[i % len(words)]} " for i in range(self.response_tokens)]
+
+    async def generate(self, request: web.Request) -> web.StreamResponse:
+        self.requests += 1
+        self.prompts += 1
+        payload = await request.json()
+        await asyncio.sleep(self.latency)
+        if self.failure_rate and random.random() < self.failure_rate:
+            return web.json_response({"error": "stub failure"}, status=503)
+
+        tokens = self._tokens(payload.get("prompt", ""))
+        delay = 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0
+        model = payload.get("model", "stub")
+
+        if not payload.get("stream", True):
+            await asyncio.sleep(delay * len(tokens))
+            return web.json_response({"model": model, "response": "".join(tokens), "done": True})
+
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await response.prepare(request)
+        for token in tokens:
+            await asyncio.sleep(delay)
+            await response.write((json.dumps({"model": model, "response": token, "done": False}) + "\n").encode())
+        await response.write((json.dumps({"model": model, "response": "", "done": True}) + "\n").encode())
+        await response.write_eof()
+        return response
+
+    async def complete(self, request: web.Request) -> web.Response:
+        """Batched completions: a batch takes as long as its longest prompt, as on a GPU"""
+        self.requests += 1
+        payload = await request.json()
+        prompts = payload.get("prompt", "")
+        prompts = prompts if isinstance(prompts, list) else [prompts]
+        self.prompts += len(prompts)
+        await asyncio.sleep(self.latency)
+        if self.failure_rate and random.random() < self.failure_rate:
+            return web.json_response({"error": "stub failure"}, status=503)
+        if self.tokens_per_second > 0:
+            await asyncio.sleep(self.response_tokens / self.tokens_per_second)
+        return web.json_response({
+            "model": payload.get("model", "stub"),
+            "choices": [{"index": i, "text": "".join(self._tokens(prompt))} for i, prompt in enumerate(prompts)],
+        })
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/api/generate", self.generate)
+        app.router.add_post("/v1/completions", self.complete)
+        return app
+
+
+async def start_stub_server(stub: StubOllama, host: str = "127.0.0.1", port: int = 0) -> tuple[web.AppRunner, str]:
+    """Start the stub on a background site and return (runner, generate_url)"""
+    runner = web.AppRunner(stub.make_app())
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{bound_port}/api/generate"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub Ollama server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--response-tokens", type=int, default=50)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    stub = StubOllama(args.latency, args.tokens_per_second, args.response_tokens, args.failure_rate)
+    web.run_app(stub.make_app(), host=args.host, port=args.port)
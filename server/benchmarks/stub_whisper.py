@@ -0,0 +1,100 @@
+"""Stand-in for Whisper transcription with a configurable real-time factor.
+
+``StubTranscriber(...).install()`` replaces the transcription entry points of the
+app's transcription service, and by default the audio preprocessor, so lectures
+go through the whole pipeline without model weights or ffmpeg. Uploads must be
+WAV files, whose header gives the duration.
+"""
+import wave
+import random
+import asyncio
+from typing import List, Optional
+
+from app.models.lecture import QualityTier
+from app.services.audio_preprocessing import AudioPreprocessor, PreparedAudio, audio_preprocessor
+from app.services.transcription import TranscriptionService, transcription_service
+from app.services.transcription_policy import policy_engine
+
+WORDS = ("lecture entropy gradient theorem proof example model variance function market "
+         "protein neuron policy vector matrix equilibrium hypothesis data signal experiment "
+         "the a of and to in is that we this").split()
+
+
+def wav_duration(path: str) -> float:
+    with wave.open(path, "rb") as f:
+        return f.getnframes() / f.getframerate()
+
+
+def write_wav(path: str, seconds: float, seed: int, sample_rate: int = 8000) -> None:
+    """Write seconds of deterministic noise as a 16-bit mono WAV"""
+    rng = random.Random(seed)
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        remaining = int(seconds * sample_rate)
+        while remaining > 0:
+            frames = min(remaining, sample_rate * 10)
+            f.writeframes(rng.randbytes(frames * 2))
+            remaining -= frames
+
+
+class StubTranscriber:
+    """Deterministic fake transcription that takes rtf seconds per second of audio.
+
+    Segments of segment_seconds are reported through on_progress as they are
+    "transcribed", like the chunked Whisper path. The transcript of a file
+    depends only on the seed and its duration.
+    """
+
+    def __init__(self, rtf: float = 0.05, words_per_minute: float = 150, segment_seconds: float = 30,
+                 seed: int = 0, decode: bool = False):
+        self.rtf = rtf
+        self.words_per_minute = words_per_minute
+        self.segment_seconds = segment_seconds
+        self.seed = seed
+        self.decode = decode
+        self.transcribed_seconds = 0.0
+
+    async def ensure_model_loaded(self) -> None:
+        return None
+
+    async def prepare(self, audio_path: str, digest: Optional[str] = None) -> PreparedAudio:
+        """Read the duration from the WAV header instead of decoding with ffmpeg"""
+        duration = await asyncio.to_thread(wav_duration, audio_path)
+        return PreparedAudio(pcm_path=audio_path, duration=duration, kept_seconds=duration, timemap=[(0, 0)])
+
+    def _text(self, rng: random.Random, seconds: float) -> str:
+        words = []
+        for _ in range(max(1, round(seconds * self.words_per_minute / 60))):
+            word = rng.choice(WORDS)
+            # About one sentence every twelve words
+            words.append(word + "." if rng.random() < 1 / 12 else word)
+        return " ".join(words)
+
+    async def transcribe_with_policy(self, audio_path: str, tier: QualityTier = QualityTier.STANDARD,
+                                     backlog: int = 0, on_progress=None, prepared: Optional[PreparedAudio] = None):
+        duration = prepared.duration if prepared is not None else await asyncio.to_thread(wav_duration, audio_path)
+        policy = policy_engine.select(duration, backlog, tier, ["tiny", "base", "small"])
+        rng = random.Random(f"{self.seed}:{round(duration * 1000)}")
+
+        segments: List[dict] = []
+        start = 0.0
+        while start < duration:
+            end = min(duration, start + self.segment_seconds)
+            await asyncio.sleep((end - start) * self.rtf)
+            segment = {"start": start, "end": end, "text": " " + self._text(rng, end - start)}
+            segments.append(segment)
+            if on_progress is not None:
+                on_progress([segment], 100.0 * end / duration)
+            start = end
+
+        self.transcribed_seconds += duration
+        return " ".join(seg["text"] for seg in segments), duration, policy
+
+    def install(self, service: TranscriptionService = transcription_service,
+                preprocessor: AudioPreprocessor = audio_preprocessor) -> None:
+        service.transcribe_with_policy = self.transcribe_with_policy
+        service.ensure_model_loaded = self.ensure_model_loaded
+        if not self.decode:
+            preprocessor.prepare = self.prepare
@@ -0,0 +1,18 @@
+import os
+import sys
+import tempfile
+
+# Point every module-level service at a scratch directory before the app is imported
+_scratch = tempfile.mkdtemp(prefix="lecturemate-tests-")
+for name, filename in (
+    ("DATABASE_PATH", "lecturemate.db"),
+    ("JOB_QUEUE_PATH", "jobs.db"),
+    ("AUDIO_INDEX_PATH", "audio_index.db"),
+    ("LLM_CACHE_PATH", "llm_sections.db"),
+    ("AUDIO_CACHE_DIR", "pcm"),
+    ("STORAGE_DIR", "uploads"),
+):
+    os.environ[name] = os.path.join(_scratch, filename)
+os.environ["STORAGE_BACKEND"] = "local"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
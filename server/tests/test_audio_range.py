@@ -0,0 +1,91 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.api import audio
+from app.api.audio import parse_range
+from app.services.storage import StorageService
+from app.services.storage_backends import LocalDiskBackend
+
+DATA = bytes(range(256)) * 40
+KEY = "lecture.mp3"
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    ("bytes=990-5000", (990, 999)),
+    ("bytes=0-1,5-9", None),
+    ("items=0-1", None),
+    ("bytes=-", None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=5-4", "bytes=-0"])
+def test_parse_range_not_satisfiable(header):
+    with pytest.raises(ValueError):
+        parse_range(header, 1000)
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    storage = StorageService(LocalDiskBackend(str(tmp_path / "uploads")), str(tmp_path / "staging"))
+    source = tmp_path / KEY
+    source.write_bytes(DATA)
+    asyncio.run(storage.put_local(str(source), KEY))
+    monkeypatch.setattr(audio, "storage_service", storage)
+    app = FastAPI()
+    app.include_router(audio.files_router)
+
+    def request(method: str, url: str, **kwargs) -> httpx.Response:
+        async def send():
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as c:
+                return await c.request(method, url, **kwargs)
+        return asyncio.run(send())
+
+    return request
+
+
+def test_whole_file(client):
+    response = client("GET", f"/files/{KEY}")
+    assert response.status_code == 200
+    assert response.content == DATA
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["content-length"] == str(len(DATA))
+
+
+def test_partial_content(client):
+    response = client("GET", f"/files/{KEY}", headers={"Range": "bytes=100-299"})
+    assert response.status_code == 206
+    assert response.content == DATA[100:300]
+    assert response.headers["content-range"] == f"bytes 100-299/{len(DATA)}"
+    assert response.headers["content-length"] == "200"
+
+    response = client("GET", f"/files/{KEY}", headers={"Range": "bytes=-10"})
+    assert response.content == DATA[-10:]
+
+
+def test_unsatisfiable_range(client):
+    response = client("GET", f"/files/{KEY}", headers={"Range": f"bytes={len(DATA)}-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(DATA)}"
+
+
+def test_if_range_and_conditional_get(client):
+    etag = client("HEAD", f"/files/{KEY}").headers["etag"]
+    assert client("GET", f"/files/{KEY}", headers={"If-None-Match": etag}).status_code == 304
+
+    current = client("GET", f"/files/{KEY}", headers={"Range": "bytes=0-9", "If-Range": etag})
+    assert current.status_code == 206 and current.content == DATA[:10]
+    stale = client("GET", f"/files/{KEY}", headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert stale.status_code == 200 and stale.content == DATA
+
+
+def test_missing_file(client):
+    assert client("GET", "/files/missing.mp3").status_code == 404
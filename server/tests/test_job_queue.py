@@ -0,0 +1,139 @@
+import asyncio
+
+import pytest
+
+from app import worker
+from app.repositories.database import database
+from app.services.job_queue import FAILED, QUEUED, SUCCEEDED, JobQueue, LeaseLostError
+
+
+def _status(queue: JobQueue, job_id: int) -> tuple:
+    return queue._read(lambda conn: conn.execute(
+        "SELECT status, attempts, error FROM jobs WHERE id = ?", (job_id,)
+    ).fetchone())
+
+
+def test_complete_queues_next_stage(tmp_path):
+    async def scenario():
+        queue = JobQueue(str(tmp_path / "jobs.db"))
+        await queue.enqueue("l1", "transcribe", {"audio_url": "a"})
+        job = await queue.claim(["transcribe"], "w1")
+        assert job.lecture_id == "l1" and job.attempts == 1
+        assert await queue.claim(["transcribe"], "w2") is None
+        await queue.complete(job.id, "w1", {"transcript": "t"}, next_stage=("notes", {"x": 1}))
+        notes = await queue.claim(["notes"], "w1")
+        assert notes.lecture_id == "l1" and notes.payload == {"x": 1}
+        assert _status(queue, job.id)[0] == SUCCEEDED
+        queue.close()
+
+    asyncio.run(scenario())
+
+
+def test_expired_lease_is_taken_over(tmp_path):
+    async def scenario():
+        queue = JobQueue(str(tmp_path / "jobs.db"), lease_seconds=0.05)
+        await queue.enqueue("l1", "transcribe", {})
+        job = await queue.claim(["transcribe"], "w1")
+        await asyncio.sleep(0.1)
+        taken = await queue.claim(["transcribe"], "w2")
+        assert taken.id == job.id and taken.attempts == 2
+
+        # The first worker can no longer renew, finish or fail the job
+        assert not await queue.heartbeat(job.id, "w1")
+        with pytest.raises(LeaseLostError):
+            await queue.complete(job.id, "w1", {})
+        with pytest.raises(LeaseLostError):
+            await queue.fail(job.id, "w1", "boom")
+        assert await queue.heartbeat(job.id, "w2")
+        queue.close()
+
+    asyncio.run(scenario())
+
+
+def test_cancel_fails_unfinished_jobs(tmp_path):
+    async def scenario():
+        queue = JobQueue(str(tmp_path / "jobs.db"))
+        await queue.enqueue("l1", "transcribe", {})
+        job = await queue.claim(["transcribe"], "w1")
+        await queue.heartbeat(job.id, "w1", progress=50, segments=[{"text": "a"}])
+        await queue.cancel("l1")
+
+        assert _status(queue, job.id)[0] == FAILED
+        assert _status(queue, job.id)[2] == "cancelled"
+        assert await queue.segments(job.id) == []
+        assert not await queue.heartbeat(job.id, "w1")
+        with pytest.raises(LeaseLostError):
+            await queue.complete(job.id, "w1", {})
+        queue.close()
+
+    asyncio.run(scenario())
+
+
+def test_failures_are_retried_until_max_attempts(tmp_path):
+    async def scenario():
+        queue = JobQueue(str(tmp_path / "jobs.db"), max_attempts=2, retry_backoff=0)
+        await queue.enqueue("l1", "transcribe", {})
+        job = await queue.claim(["transcribe"], "w1")
+        assert await queue.fail(job.id, "w1", "first")
+        assert _status(queue, job.id)[0] == QUEUED
+        job = await queue.claim(["transcribe"], "w1")
+        assert not await queue.fail(job.id, "w1", "second")
+        assert _status(queue, job.id) == (FAILED, 2, "second")
+        assert await queue.claim(["transcribe"], "w1") is None
+        queue.close()
+
+    asyncio.run(scenario())
+
+
+def test_expired_leases_count_as_attempts(tmp_path):
+    async def scenario():
+        queue = JobQueue(str(tmp_path / "jobs.db"), lease_seconds=0.05, max_attempts=2)
+        await queue.enqueue("l1", "transcribe", {})
+        for attempt in (1, 2):
+            job = await queue.claim(["transcribe"], f"w{attempt}")
+            assert job.attempts == attempt
+            await asyncio.sleep(0.1)
+
+        abandoned = []
+        assert await queue.claim(["transcribe"], "w3", abandoned=abandoned) is None
+        assert abandoned == ["l1"]
+        assert _status(queue, job.id)[0] == FAILED
+        queue.close()
+
+    asyncio.run(scenario())
+
+
+def test_worker_cancels_handler_when_lease_is_lost(tmp_path, monkeypatch):
+    started, cancelled = asyncio.Event(), []
+
+    async def slow_handler(job, context):
+        started.set()
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            cancelled.append(job.id)
+            raise
+        return {}
+
+    async def scenario():
+        queue = JobQueue(str(tmp_path / "jobs.db"), lease_seconds=0.3)
+        monkeypatch.setitem(worker.HANDLERS, "transcribe", slow_handler)
+        await queue.enqueue("l1", "transcribe", {})
+        runner = worker.Worker(["transcribe"], queue=queue)
+        job = await queue.claim(["transcribe"], runner.worker_id)
+
+        try:
+            run = asyncio.create_task(runner.run_job(job))
+            await started.wait()
+            await queue.cancel("l1")
+            await asyncio.wait_for(run, timeout=5)
+        finally:
+            await database.close()
+
+        # The job stays cancelled, rather than being retried or failed again by the worker
+        assert cancelled == [job.id]
+        assert _status(queue, job.id)[0] == FAILED
+        assert _status(queue, job.id)[2] == "cancelled"
+        queue.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,145 @@
+import asyncio
+
+import pytest
+
+from app.services.notes import REDUCE_INSTRUCTION, NotesPrefetch, NotesService
+from app.services.scheduler import section_scheduler
+
+
+def _service(chunk_tokens: int = 200, overlap_tokens: int = 20) -> NotesService:
+    service = NotesService()
+    service.chunk_tokens = chunk_tokens
+    service.chunk_overlap_tokens = overlap_tokens
+    return service
+
+
+def _transcript(sentences: int) -> str:
+    return " ".join(f"Sentence number {i} explains topic {i % 7} in some detail." for i in range(sentences))
+
+
+def test_chunks_fit_and_keep_every_sentence_in_order():
+    service = _service()
+    text = _transcript(300)
+    chunks = service._chunk_text(text)
+    assert len(chunks) > 1
+    assert all(service._estimate_tokens(chunk) <= service.chunk_tokens for chunk in chunks)
+
+    # Apart from the overlap carried into the next chunk, the chunks rebuild the text
+    seen = []
+    for chunk in chunks:
+        for sentence in chunk.split(". "):
+            sentence = sentence.rstrip(".")
+            if not seen or sentence not in seen[-10:]:
+                seen.append(sentence)
+    assert seen == [sentence.rstrip(".") for sentence in text.split(". ")]
+
+
+def test_oversized_sentence_is_split_by_words():
+    service = _service(chunk_tokens=50, overlap_tokens=0)
+    text = " ".join(f"word{i}" for i in range(500))
+    chunks = service._chunk_text(text, content_defined=False)
+    assert all(service._estimate_tokens(chunk) <= 50 for chunk in chunks)
+    assert " ".join(chunks).split() == text.split()
+
+
+def test_edit_only_changes_nearby_chunks():
+    service = _service()
+    sentences = [f"Sentence number {i} explains topic {i % 7} in some detail." for i in range(300)]
+    before = service._chunk_text(" ".join(sentences))
+    sentences[150] = "A corrected sentence that replaces the original one in the middle."
+    after = service._chunk_text(" ".join(sentences))
+    unchanged = set(before) & set(after)
+    assert len(unchanged) >= len(before) - 3
+
+
+def test_stable_chunks_match_the_final_chunks():
+    service = _service()
+    text = _transcript(300)
+    final = service._chunk_text(text)
+    partial = text[:len(text) * 2 // 3]
+    stable = service.stable_chunks(partial)
+    assert stable and stable == final[:len(stable)]
+
+
+def _recording_job(calls: list):
+    def job(text: str, instruction: str):
+        async def run():
+            calls.append((text, instruction))
+            return f"merged({len(text)})"
+        return run
+    return job
+
+
+def test_reduce_joins_summaries_with_blank_lines():
+    service = _service(chunk_tokens=1000)
+    calls = []
+    result = asyncio.run(service._reduce(["first summary", "second summary"], _recording_job(calls)))
+    assert calls == [("first summary\n\nsecond summary", REDUCE_INSTRUCTION)]
+    assert result == f"merged({len(calls[0][0])})"
+
+
+def test_reduce_splits_oversized_pairs_instead_of_truncating():
+    service = _service(chunk_tokens=100)
+    service.max_input_tokens = 150
+    summaries = [_transcript(12), _transcript(12), _transcript(12)]
+    assert all(service._estimate_tokens(summary) > service.chunk_tokens for summary in summaries)
+    calls = []
+    asyncio.run(service._reduce(summaries, _recording_job(calls)))
+
+    assert all(service._estimate_tokens(text) <= service.max_input_tokens for text, _ in calls)
+    # Every sentence of the first level reaches the model
+    first_level = " ".join(text for text, _ in calls if not text.startswith("merged("))
+    for summary in summaries:
+        for sentence in summary.split(". "):
+            assert sentence.rstrip(".") in first_level
+
+
+def test_sections_of_consecutive_chunks_are_separated(monkeypatch):
+    service = _service(chunk_tokens=100, overlap_tokens=0)
+
+    async def generate(text, instruction, use_cache=True):
+        return f"- point {len(text)}\n- end"
+
+    monkeypatch.setattr(service, "_generate_section", generate)
+    sections, outputs = asyncio.run(service.generate_notes_incremental(_transcript(40)))
+    assert len(outputs) > 1
+    blocks = sections["main_points"].split("\n\n")
+    assert len(blocks) == len(service._chunk_text(_transcript(40)))
+    assert all(block.startswith("- point") for block in blocks)
+
+
+def test_prefetch_maps_chunks_completed_by_the_last_segments(monkeypatch):
+    service = _service(chunk_tokens=400, overlap_tokens=0)
+
+    async def generate(text, instruction, use_cache=True):
+        return "output"
+
+    monkeypatch.setattr(service, "_generate_section", generate)
+    sentences = [f"Sentence number {i} explains topic {i % 7} in some detail." for i in range(60)]
+    first = len(service._chunk_text(" ".join(sentences))[0].split(". "))
+    # A short lecture: one chunk, then a few sentences too short to trigger chunking in add()
+    sentences = sentences[:first + 3]
+    chunks = service._chunk_text(" ".join(sentences))
+    assert len(chunks) == 2
+
+    async def scenario():
+        prefetch = NotesPrefetch(service, "short-lecture")
+        prefetch.add([{"text": " ".join(sentences[:first])}])
+        for sentence in sentences[first:]:
+            prefetch.add([{"text": sentence}])
+        return await prefetch.finish()
+
+    # Only the last chunk is left for the notes stage
+    assert set(asyncio.run(scenario())) == {service._chunk_hash(chunks[0])}
+
+
+def test_failed_runs_do_not_keep_section_timings(monkeypatch):
+    service = _service(chunk_tokens=100, overlap_tokens=0)
+
+    async def fail(text, instruction, use_cache=True):
+        raise RuntimeError("backend down")
+
+    monkeypatch.setattr(service, "_generate_section", fail)
+    with pytest.raises(Exception):
+        asyncio.run(service.generate_notes_incremental(_transcript(40), lecture_id="failing-lecture"))
+    assert section_scheduler.pop_latencies("failing-lecture") == []
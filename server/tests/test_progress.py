@@ -0,0 +1,49 @@
+import asyncio
+
+from app.api import lectures
+from app.services.job_queue import JobQueue
+from app.services.progress import ProgressHub
+
+
+async def _relay(queue: JobQueue, seq: int) -> int:
+    for job in await queue.changes_since(seq):
+        seq = job.updated_seq
+        await lectures._publish_job(job)
+    return seq
+
+
+def test_retried_transcription_restarts_the_relayed_segments(tmp_path, monkeypatch):
+    queue = JobQueue(str(tmp_path / "jobs.db"), retry_backoff=0)
+    hub = ProgressHub()
+    monkeypatch.setattr(lectures, "job_queue", queue)
+    monkeypatch.setattr(lectures, "progress_hub", hub)
+
+    async def scenario():
+        subscriber = hub.subscribe("l1")
+        await queue.enqueue("l1", "transcribe", {})
+        seq = await queue.latest_seq()
+
+        job = await queue.claim(["transcribe"], "w1")
+        await queue.heartbeat(job.id, "w1", progress=20, segments=[{"text": "a"}, {"text": "b"}])
+        seq = await _relay(queue, seq)
+        await queue.heartbeat(job.id, "w1", progress=30, segments=[{"text": "c"}], first_index=2)
+        seq = await _relay(queue, seq)
+        assert [s["text"] for s in hub.get("l1").segments] == ["a", "b", "c"]
+        first = await subscriber.__anext__()
+        assert [s["text"] for s in first["segments"]] == ["a", "b", "c"] and "reset" not in first
+
+        await queue.fail(job.id, "w1", "crashed")
+        retry = await queue.claim(["transcribe"], "w2")
+        assert retry.id == job.id and retry.attempts == 2
+        await queue.heartbeat(job.id, "w2", progress=10, segments=[{"text": "x"}])
+        await _relay(queue, seq)
+        assert [s["text"] for s in hub.get("l1").segments] == ["x"]
+
+        # Subscribers are told to drop what they received from the failed attempt
+        restarted = await subscriber.__anext__()
+        assert restarted["reset"] is True
+        assert [s["text"] for s in restarted["segments"]] == ["x"]
+        await subscriber.aclose()
+        queue.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,78 @@
+import asyncio
+import sqlite3
+from datetime import datetime
+
+import httpx
+from fastapi import FastAPI
+
+from app.api import lectures
+from app.models.lecture import Lecture, ProcessingStatus
+from app.repositories.database import SCHEMA, Database, database
+from app.repositories.lectures import LectureRepository, lecture_repository
+from app.services.admission import AdmissionController
+from app.services.job_queue import INTERACTIVE, JobQueue
+
+
+def _regenerate(*stored: Lecture) -> list:
+    """Store the lectures and ask to regenerate the notes of each; returns the status codes"""
+    async def scenario():
+        try:
+            for lecture in stored:
+                await lecture_repository.create(lecture)
+            app = FastAPI()
+            app.include_router(lectures.router)
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as c:
+                return [(await c.post(f"/lectures/{lecture.id}/regenerate")).status_code for lecture in stored]
+        finally:
+            await database.close()
+
+    return asyncio.run(scenario())
+
+
+def _completed(lecture_id: str, user_id: str = "u1") -> Lecture:
+    return Lecture(id=lecture_id, title="Lecture", audio_url="a.wav", user_id=user_id, folder_id="f1",
+                   transcript="A full transcript.", transcribed_at=datetime.now(),
+                   status=ProcessingStatus.COMPLETED, progress=100)
+
+
+def test_regenerate_is_admission_controlled(tmp_path, monkeypatch):
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    monkeypatch.setattr(lectures, "job_queue", queue)
+    monkeypatch.setattr(lectures, "admission_controller",
+                        AdmissionController({INTERACTIVE: (1, 3600)}, max_queued=0, queue=queue))
+    assert _regenerate(_completed("quota-1", "quota-user"), _completed("quota-2", "quota-user")) == [200, 429]
+    queue.close()
+
+
+def test_regenerate_requires_a_complete_transcript(tmp_path, monkeypatch):
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    monkeypatch.setattr(lectures, "job_queue", queue)
+    partial = Lecture(id="partial", title="Lecture", audio_url="a.wav", user_id="u1", folder_id="f1",
+                      transcript="The first half of", status=ProcessingStatus.FAILED, progress=100)
+    failed_notes = _completed("failed-notes")
+    failed_notes.status = ProcessingStatus.FAILED
+    assert _regenerate(partial, failed_notes) == [409, 200]
+    queue.close()
+
+
+
+def test_migration_marks_completed_lectures_as_transcribed(tmp_path):
+    path = str(tmp_path / "old.db")
+    with sqlite3.connect(path) as conn:
+        conn.executescript(SCHEMA)
+        conn.executemany(
+            """INSERT INTO lectures (id, title, audio_url, transcript, status, created_at, updated_at, user_id, folder_id)
+               VALUES (?, 'Lecture', 'a.wav', 'text', ?, '2025-01-01T00:00:00', '2025-01-02T00:00:00', 'u1', 'f1')""",
+            [("done", "completed"), ("broken", "failed")],
+        )
+
+    async def scenario():
+        db = Database(path)
+        try:
+            repository = LectureRepository(db)
+            return (await repository.get("done")).transcribed_at, (await repository.get("broken")).transcribed_at
+        finally:
+            await db.close()
+
+    done, broken = asyncio.run(scenario())
+    assert done == datetime(2025, 1, 2) and broken is None
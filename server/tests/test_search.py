@@ -0,0 +1,83 @@
+import asyncio
+import json
+
+from app.models.lecture import Lecture, ProcessingStatus
+from app.repositories.database import Database
+from app.repositories.lectures import LectureRepository
+from app.repositories.search import SearchRepository, build_match_query
+
+
+def _lecture(lecture_id: str, title: str, **fields) -> Lecture:
+    return Lecture(id=lecture_id, title=title, audio_url=f"{lecture_id}.wav", user_id="u1",
+                   folder_id="f1", **fields)
+
+
+def _run(tmp_path, scenario):
+    async def main():
+        db = Database(str(tmp_path / "lecturemate.db"))
+        try:
+            await scenario(LectureRepository(db), SearchRepository(db))
+        finally:
+            await db.close()
+
+    asyncio.run(main())
+
+
+async def _ids(search: SearchRepository, query: str, **filters) -> list:
+    results, _ = await search.search(query, **filters)
+    return [result["id"] for result in results]
+
+
+def test_match_query_quotes_terms():
+    assert build_match_query('photo-synthesis OR "x"') == '"photo" "synthesis" "OR" "x"*'
+    assert build_match_query("  ...  ") is None
+
+
+def test_insert_update_and_delete_keep_the_index_current(tmp_path):
+    async def scenario(lectures: LectureRepository, search: SearchRepository):
+        await lectures.create(_lecture("l1", "Thermodynamics", transcript="Entropy always increases."))
+        await lectures.create(_lecture("l2", "Genetics"))
+        assert await _ids(search, "entropy") == ["l1"]
+        assert await _ids(search, "genet") == ["l2"]
+
+        await lectures.update("l2", title="Cell biology")
+        assert await _ids(search, "genetics") == []
+        assert await _ids(search, "cell") == ["l2"]
+
+        await lectures.update("l1", sections=json.dumps({"title": "Ignored", "summary": "Carnot cycles"}))
+        assert await _ids(search, "carnot") == ["l1"]
+        assert await _ids(search, "ignored") == []
+
+        await lectures.delete("l1")
+        assert await _ids(search, "entropy") == []
+        assert await _ids(search, "cell") == ["l2"]
+
+    _run(tmp_path, scenario)
+
+
+def test_partial_transcripts_are_indexed_when_transcription_ends(tmp_path):
+    async def scenario(lectures: LectureRepository, search: SearchRepository):
+        await lectures.create(_lecture("l1", "Optics"))
+        await lectures.update("l1", status=ProcessingStatus.TRANSCRIBING, transcript="Light refracts")
+        assert await _ids(search, "refracts") == []
+
+        await lectures.update("l1", status=ProcessingStatus.GENERATING_NOTES)
+        assert await _ids(search, "refracts") == ["l1"]
+
+    _run(tmp_path, scenario)
+
+
+def test_results_are_filtered_and_highlighted(tmp_path):
+    async def scenario(lectures: LectureRepository, search: SearchRepository):
+        await lectures.create(_lecture("l1", "Algebra <basics>"))
+        await lectures.create(Lecture(id="l2", title="Algebra again", audio_url="l2.wav",
+                                      user_id="u2", folder_id="f2"))
+        assert sorted(await _ids(search, "algebra")) == ["l1", "l2"]
+        assert await _ids(search, "algebra", user_id="u2") == ["l2"]
+        assert await _ids(search, "algebra", folder_id="f1") == ["l1"]
+
+        results, more = await search.search("basics", limit=1)
+        assert not more
+        assert results[0]["snippet"] == "Algebra &lt;<mark>basics</mark>&gt;"
+
+    _run(tmp_path, scenario)
@@ -0,0 +1,37 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services import transcription
+from app.services.transcription import TranscriptionService
+
+
+def test_parallel_mode_loads_only_the_worker_processes(monkeypatch):
+    service = TranscriptionService(model_name="base", parallel_workers=2)
+    warmed, started = [], []
+
+    async def warm_up(executor):
+        warmed.append(executor)
+
+    monkeypatch.setattr(service.pool, "warm_up", warm_up)
+    monkeypatch.setattr(service, "_get_process_pool", lambda: ThreadPoolExecutor(max_workers=2))
+    monkeypatch.setattr(transcription, "_worker_ready", lambda: started.append(1))
+
+    assert not service.ready
+    asyncio.run(service.ensure_model_loaded())
+    asyncio.run(service.ensure_model_loaded())
+    assert warmed == []
+    assert len(started) == 2
+    assert service.ready
+    assert service.status() == {"base": {"total": 2, "processes": 2}}
+
+
+def test_single_process_mode_warms_the_model_pool(monkeypatch):
+    service = TranscriptionService(model_name="base")
+    warmed = []
+
+    async def warm_up(executor):
+        warmed.append(executor)
+
+    monkeypatch.setattr(service.pool, "warm_up", warm_up)
+    asyncio.run(service.ensure_model_loaded())
+    assert warmed == [service.executor]
@@ -0,0 +1,89 @@
+import asyncio
+from datetime import datetime
+
+import httpx
+from fastapi import FastAPI
+
+from app import worker
+from app.api import lectures
+from app.models.lecture import Lecture, ProcessingStatus
+from app.repositories.database import database
+from app.repositories.lectures import lecture_repository
+from app.repositories.note_chunks import note_chunk_repository
+from app.services.job_queue import job_queue
+
+TRANSCRIPT = " ".join(f"Sentence {i} of the lecture." for i in range(20))
+
+
+class RecordingCache:
+    def __init__(self):
+        self.values, self.lookups = {}, 0
+
+    async def get(self, key):
+        self.lookups += 1
+        return self.values.get(key)
+
+    async def set(self, key, value):
+        self.values[key] = value
+
+
+class EchoClient:
+    def __init__(self):
+        self.calls = 0
+
+    async def stream(self, payload, timeout=None):
+        self.calls += 1
+        yield f"generated {self.calls}"
+
+
+async def _regenerate(monkeypatch, lecture_id: str, **params) -> tuple:
+    """Queue notes for a completed lecture through the API and run the job; returns cache and client"""
+    cache, client = RecordingCache(), EchoClient()
+    monkeypatch.setattr(worker.notes_service, "cache", cache)
+    monkeypatch.setattr(worker.notes_service, "client", client)
+
+    await lecture_repository.create(Lecture(
+        id=lecture_id, title="Lecture", audio_url="a.wav", user_id="u1", folder_id="f1",
+        transcript=TRANSCRIPT, transcribed_at=datetime.now(), status=ProcessingStatus.COMPLETED, progress=100,
+    ))
+    await note_chunk_repository.add(lecture_id, "stale", {"main_points": "old"})
+
+    app = FastAPI()
+    app.include_router(lectures.router)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as c:
+        response = await c.post(f"/lectures/{lecture_id}/regenerate", params=params)
+    assert response.status_code == 200
+
+    job = await job_queue.claim(["notes"], "w1")
+    assert job.lecture_id == lecture_id
+    await worker.run_notes(job, worker.JobContext())
+    await job_queue.complete(job.id, "w1", {})
+    return job, cache, client
+
+
+def test_use_cache_false_skips_the_section_cache(monkeypatch):
+    async def scenario():
+        try:
+            job, cache, client = await _regenerate(monkeypatch, "fresh", use_cache="false")
+            assert job.payload["use_cache"] is False
+            assert cache.lookups == 0
+            assert client.calls > 0
+            # Fresh results replace what was cached before
+            assert len(cache.values) == client.calls
+            assert "stale" not in await note_chunk_repository.get("fresh")
+        finally:
+            await database.close()
+
+    asyncio.run(scenario())
+
+
+def test_cache_is_used_by_default(monkeypatch):
+    async def scenario():
+        try:
+            job, cache, client = await _regenerate(monkeypatch, "cached")
+            assert job.payload["use_cache"] is True
+            assert cache.lookups == client.calls
+        finally:
+            await database.close()
+
+    asyncio.run(scenario())